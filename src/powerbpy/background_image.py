@@ -3,9 +3,8 @@
     See add_background_image() for more details.
 '''
 
-import os
-import shutil
 import json
+import os
 
 class _BackgroundImage:
 
@@ -21,7 +20,11 @@ class _BackgroundImage:
                  page,
                  img_path,
                  alpha = 51,
-                 scaling_method = "Fit"):
+                 scaling_method = "Fit",
+                 optimize = False,
+                 quality = 80,
+                 image_format = None,
+                 max_size = None):
 
 
 
@@ -35,6 +38,14 @@ class _BackgroundImage:
             The transparency of the background image. Must be a whole integer between 1 and 100.
         scaling_method: str
             The method used to scale the image available options include ["Fit", ]
+        optimize: bool
+            Shrink the image before adding it: downscale it to fit the page, re-encode it and drop its metadata. Needs Pillow.
+        quality: int
+            The JPEG quality (1-95) used when optimizing.
+        image_format: str
+            "JPEG" or "PNG" to convert the image when optimizing. Defaults to keeping JPEGs as JPEG and saving everything else as PNG.
+        max_size: tuple
+            The (width, height) to fit the image in when optimizing. Defaults to the page's size.
 
         Notes
         ----
@@ -64,45 +75,29 @@ class _BackgroundImage:
         if not isinstance(alpha, int) or not 1 <= alpha <= 100:
             raise ValueError("alpha must be an integer between 1–100")
 
-        # file paths
-        # Convert dashboard path to an absolute path if a relative path was provided
+        # Optimize the image -----------------------------------------------------------------------------------
+        self.optimization_report = None
         img_name = os.path.basename(img_path)
 
-        # This is the location of the image within the dashboard
-        registered_img_path = os.path.join(self.dashboard.registered_resources_folder, img_name)
-
+        if optimize:
+            from powerbpy.image_optimize import _optimize_image, _FORMATS
 
+            if max_size is None:
+                with open(self.page.page_json_path, "r", encoding="utf-8") as file:
+                    page_json = json.load(file)
 
-        # Upload image to dashboard's registered resources ---------------------------------------------------
-
-        # create registered resources folder if it doesn't exist
-        if not os.path.exists(self.dashboard.registered_resources_folder):
-            os.makedirs(self.dashboard.registered_resources_folder)
+                max_size = (page_json.get("width", 1280), page_json.get("height", 720))
 
-        # move image to registered resources folder
-        shutil.copy(img_path, registered_img_path)
+            img_path, self.optimization_report = _optimize_image(img_path,
+                                                                 max_size,
+                                                                 quality = quality,
+                                                                 image_format = image_format)
 
-        # add new registered resource (the image) to report.json ----------------------------------------------
-        with open(self.dashboard.report_json_path,'r', encoding="utf-8") as file:
-            report_json = json.load(file)
+            img_name = os.path.splitext(img_name)[0] + _FORMATS[self.optimization_report["format"].item()]
 
-        # add the image as an item to the registered resources items list
-        for pack in report_json["resourcePackages"]:
-            if pack["name"] == "RegisteredResources":
-                existing_paths = {item.get("path") for item in pack.get("items", [])}
-
-                if img_name not in existing_paths:
-                    pack["items"].append(
-                        {
-                            "name": img_name,
-                            "path": img_name,
-                            "type": "Image"
-                            }
-                            )
-
-        # write to file
-        with open(self.dashboard.report_json_path,'w', encoding="utf-8") as file:
-            json.dump(report_json, file, indent = 2)
+        # Upload image to dashboard's registered resources ---------------------------------------------------
+        # the same image is only copied once, however many pages use it
+        img_name = self.dashboard._resources().add(img_path, "Image", name = img_name) # pylint: disable=protected-access
 
         # Add image to page -------------------------------------------------------------------------------
         with open(self.page.page_json_path,'r', encoding="utf-8") as file:
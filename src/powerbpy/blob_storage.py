@@ -0,0 +1,645 @@
+'''Read csv files from Azure storage without downloading more of them than needed.
+    You should never call these functions directly, instead use the add_blob_csv() method attached to the Dashboard class.
+'''
+
+import asyncio
+import concurrent.futures
+import getpass
+import hashlib
+import io
+import os
+import shutil
+import tempfile
+
+import pandas as pd # pylint: disable=import-error
+
+from powerbpy.cache import _cache_folder, _evict
+
+_MB = 1024 * 1024
+
+# how big the blob sample cache can get, unless POWERBPY_BLOB_CACHE_MB says otherwise
+_DEFAULT_CACHE_MB = 1024
+
+# how much of one downloaded file is held in memory before it spills to a temporary file, unless POWERBPY_BLOB_MEMORY_MB says otherwise
+_DEFAULT_MEMORY_MB = 64
+
+_STORAGE_SCOPE = "https://storage.azure.com/.default"
+
+
+def _newline(encoding):
+
+    '''The bytes a line break is written as in an encoding (without a byte order mark)'''
+
+    one = "\n".encode(encoding)
+    two = "\n\n".encode(encoding)
+
+    return two[len(one):]
+
+
+def _trim_to_row(content, encoding = "utf-8"):
+
+    '''Cut a partial download back to the end of its last complete row'''
+
+    newline = _newline(encoding)
+    end = content.rfind(newline)
+
+    # in utf-16 the line break has to start on a character boundary
+    while end > 0 and end % len(newline):
+        end = content.rfind(newline, 0, end)
+
+    if end <= 0:
+        raise ValueError("The sample doesn't contain a complete row. Please use a larger sample_mb or leave it as None to download the whole file")
+
+    return content[:end + len(newline)]
+
+
+def _memory_bytes(max_memory_mb = None):
+
+    if max_memory_mb is None:
+        max_memory_mb = float(os.environ.get("POWERBPY_BLOB_MEMORY_MB", _DEFAULT_MEMORY_MB))
+
+    if max_memory_mb <= 0:
+        raise ValueError("max_memory_mb must be a positive number of megabytes")
+
+    return int(max_memory_mb * _MB)
+
+
+def _spool(max_memory_mb = None):
+
+    '''A file that stays in memory until it holds more than max_memory_mb, then moves to a temporary file on disk'''
+
+    return tempfile.SpooledTemporaryFile(max_size = _memory_bytes(max_memory_mb))
+
+
+def _blob_size(downloader):
+
+    '''The size of the whole blob behind a ranged download
+
+    For a ranged download the azure downloader's properties.size is the size of the range, so the total comes from its Content-Range header ("bytes 0-1023/52874").
+    '''
+
+    content_range = getattr(downloader.properties, "content_range", None)
+
+    if content_range:
+        total = content_range.rsplit("/", 1)[-1]
+
+        if total.isdigit():
+            return int(total)
+
+    return downloader.properties.size
+
+
+def _download(client, sample_mb = None, max_memory_mb = None):
+
+    '''Download a file, or only its first sample_mb megabytes
+
+    The download is streamed chunk by chunk into a spooled file, so a big file never has to fit in memory.
+
+    Parameters
+    ----------
+    client: DataLakeFileClient or BlobClient
+        Anything with a download_file() or download_blob() method that accepts offset and length, like the azure clients.
+    sample_mb: float
+        How many megabytes to download from the start of the file. None downloads the whole file.
+    max_memory_mb: float
+        How much of the download to keep in memory before spilling it to disk. Defaults to POWERBPY_BLOB_MEMORY_MB or 64.
+
+    Returns
+    -------
+    tuple
+        The downloaded file (rewound to the start) and whether it is only part of the blob.
+    '''
+
+    download = client.download_file if hasattr(client, "download_file") else client.download_blob
+
+    file = _spool(max_memory_mb)
+
+    if sample_mb is None:
+        download().readinto(file)
+        file.seek(0)
+        return file, False
+
+    if sample_mb <= 0:
+        raise ValueError("sample_mb must be a positive number of megabytes")
+
+    downloader = download(offset = 0, length = int(sample_mb * _MB))
+    size = downloader.readinto(file)
+    file.seek(0)
+
+    return file, _blob_size(downloader) > size
+
+
+def _properties(client):
+
+    '''The file's properties (including its ETag), without downloading it'''
+
+    get = client.get_file_properties if hasattr(client, "get_file_properties") else client.get_blob_properties
+
+    return get()
+
+
+def _size(file):
+
+    position = file.tell()
+    file.seek(0, os.SEEK_END)
+    size = file.tell()
+    file.seek(position)
+
+    return size
+
+
+def _common_dtype(first, second):
+
+    '''The type a column needs to hold the values of two chunks: numbers stay numbers, anything else mixed becomes text'''
+
+    if first == second:
+        return first
+
+    if pd.api.types.is_numeric_dtype(first) and pd.api.types.is_numeric_dtype(second) \
+            and not pd.api.types.is_bool_dtype(first) and not pd.api.types.is_bool_dtype(second):
+        return pd.Series(dtype="float64").dtype
+
+    return pd.Series(dtype="object").dtype
+
+
+def _read_csv_in_chunks(file, encoding, max_bytes):
+
+    '''Read a csv that is too big for memory a chunk at a time
+
+    Every row is parsed, so the column types are the ones the whole file needs, but only the first chunk of rows is kept.
+    '''
+
+    # pandas needs a few times more memory than the csv text, so aim for chunks of about a quarter of max_bytes
+    head = file.read(_MB)
+    rows = max(head.count(_newline(encoding)), 1)
+    chunk_rows = max(int(max_bytes / 4 / (len(head) / rows)), 1)
+    file.seek(0)
+
+    frame = None
+    dtypes = {}
+
+    with pd.read_csv(file, encoding=encoding, chunksize=chunk_rows) as reader:
+        for chunk in reader:
+            if frame is None:
+                frame = chunk
+
+            for column, dtype in chunk.dtypes.items():
+                dtypes[column] = _common_dtype(dtypes.get(column, dtype), dtype)
+
+    return frame.astype(dtypes)
+
+
+def _parse_sample(file, sampled, encoding, max_memory_mb = None):
+
+    '''Parse a downloaded csv, returning the DataFrame and whether it only holds the first rows of the file
+
+    Files bigger than max_memory_mb are read in chunks, see _read_csv_in_chunks().
+    '''
+
+    file.seek(0)
+
+    if sampled:
+        # a sample is already limited by sample_mb
+        return pd.read_csv(io.BytesIO(_trim_to_row(file.read(), encoding)), encoding=encoding), True
+
+    max_bytes = _memory_bytes(max_memory_mb)
+
+    if _size(file) <= max_bytes:
+        return pd.read_csv(file, encoding=encoding), False
+
+    return _read_csv_in_chunks(file, encoding, max_bytes), True
+
+
+def _read_csv_sample(client, sample_mb = None, encoding = "utf-8", session = None, use_cache = False, max_memory_mb = None):
+
+    '''Read a csv file (or a sample of its first rows) into a DataFrame
+
+    Parameters
+    ----------
+    session: _StorageSession
+        Optional. The session to count the download in, and whose cache to use.
+    use_cache: bool
+        Reuse the sample from an earlier build if the file's ETag hasn't changed since.
+    max_memory_mb: float
+        The most of the file to hold in memory. Bigger files are spilled to disk and read in chunks, keeping only their first rows.
+
+    Returns
+    -------
+    tuple
+        The DataFrame and whether it only holds the first rows of the file.
+    '''
+
+    cache = session.cache if session is not None and use_cache else None
+    key = cached = None
+
+    if cache is not None:
+        key = cache.key(client.url, _properties(client).etag, sample_mb)
+        cached = cache.open(key)
+
+    if cached is None:
+        file, sampled = _download(client, sample_mb, max_memory_mb)
+
+        if cache is not None:
+            cache.put(key, file, sampled)
+    else:
+        file, sampled = cached
+
+    with file:
+        if session is not None:
+            session.count(_size(file), cache_hit = cached is not None)
+
+        frame, partial = _parse_sample(file, sampled, encoding, max_memory_mb)
+
+    return frame, partial
+
+
+async def _download_async(client, sample_mb = None, max_memory_mb = None):
+
+    '''The same as _download() for the azure .aio clients'''
+
+    download = client.download_file if hasattr(client, "download_file") else client.download_blob
+
+    file = _spool(max_memory_mb)
+
+    if sample_mb is None:
+        await (await download()).readinto(file)
+        file.seek(0)
+        return file, False
+
+    if sample_mb <= 0:
+        raise ValueError("sample_mb must be a positive number of megabytes")
+
+    downloader = await download(offset = 0, length = int(sample_mb * _MB))
+    size = await downloader.readinto(file)
+    file.seek(0)
+
+    return file, _blob_size(downloader) > size
+
+
+async def _read_csv_sample_async(client, sample_mb = None, encoding = "utf-8", session = None, use_cache = False, max_memory_mb = None):
+
+    '''The same as _read_csv_sample() for the azure .aio clients. The csv is parsed in a thread, so other files keep downloading meanwhile'''
+
+    cache = session.cache if session is not None and use_cache else None
+    key = cached = None
+
+    if cache is not None:
+        get = client.get_file_properties if hasattr(client, "get_file_properties") else client.get_blob_properties
+        key = cache.key(client.url, (await get()).etag, sample_mb)
+        cached = cache.open(key)
+
+    if cached is None:
+        file, sampled = await _download_async(client, sample_mb, max_memory_mb)
+
+        if cache is not None:
+            await asyncio.to_thread(cache.put, key, file, sampled)
+    else:
+        file, sampled = cached
+
+    with file:
+        if session is not None:
+            session.count(_size(file), cache_hit = cached is not None)
+
+        return await asyncio.to_thread(_parse_sample, file, sampled, encoding, max_memory_mb)
+
+
+class _SampleCache:
+
+    '''Downloaded blob samples, kept on disk between builds, readable only by the current user
+
+    A sample is found again by the file's url, ETag and sample size, so a changed file is always downloaded again.
+    When the cache gets bigger than max_mb, the samples that were used least recently are deleted.
+    '''
+
+    def __init__(self, max_mb = None):
+
+        if max_mb is None:
+            max_mb = float(os.environ.get("POWERBPY_BLOB_CACHE_MB", _DEFAULT_CACHE_MB))
+
+        self.max_bytes = int(max_mb * _MB)
+
+    @staticmethod
+    def key(url, etag, sample_mb):
+
+        # SAS tokens expire and change, the file they point to doesn't
+        url = url.split("?", 1)[0]
+
+        return hashlib.sha256(f"{url}|{etag}|{sample_mb}".encode()).hexdigest()
+
+    def open(self, key):
+
+        '''The cached file (open for reading) and whether it is a sample, or None'''
+
+        folder = _cache_folder("blob_samples")
+
+        for sampled in (False, True):
+            path = os.path.join(folder, f"{key}{'.sample' if sampled else ''}.csv")
+
+            try:
+                file = open(path, "rb") # pylint: disable=consider-using-with
+            except FileNotFoundError:
+                continue
+
+            # mark it as recently used
+            os.utime(path)
+            return file, sampled
+
+        return None
+
+    def put(self, key, file, sampled):
+
+        '''Copy a downloaded file into the cache, a chunk at a time, and rewind it'''
+
+        if _size(file) > self.max_bytes:
+            return
+
+        folder = _cache_folder("blob_samples")
+        path = os.path.join(folder, f"{key}{'.sample' if sampled else ''}.csv")
+
+        # the data came from a storage account that needs a login, so only the user who downloaded it can read the copy
+        os.chmod(folder, 0o700)
+
+        file.seek(0)
+        temp_path = f"{path}.{os.getpid()}.tmp"
+        with os.fdopen(os.open(temp_path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600), "wb") as cached:
+            shutil.copyfileobj(file, cached)
+        os.replace(temp_path, path)
+        file.seek(0)
+
+        _evict(folder, self.max_bytes)
+
+
+class _StorageSession:
+
+    '''The Azure credentials and clients a dashboard reuses for every blob it reads
+
+    Each credential is created once per tenant or storage account, so the browser login (and its token) is shared by all the files.
+    Each storage account gets one service client and each container one file system client, so every file read from them reuses the same connection pool.
+
+    Parameters
+    ----------
+    service_client_factory: callable
+        Called with account_url and credential to create a service client. Defaults to DataLakeServiceClient. Tests pass a stand-in for a local storage emulator here.
+    credential_factory: callable
+        Called with tenant_id to create a browser login credential. Defaults to InteractiveBrowserCredential.
+    async_service_client_factory: callable
+        The same as service_client_factory for the clients add_blob_csvs() uses. Defaults to the .aio DataLakeServiceClient.
+    cache: _SampleCache
+        Where to keep downloaded samples between builds. Defaults to a cache in the user's cache folder.
+    '''
+
+    def __init__(self, service_client_factory = None, credential_factory = None, async_service_client_factory = None, cache = None):
+        self.service_client_factory = service_client_factory
+        self.credential_factory = credential_factory
+        self.async_service_client_factory = async_service_client_factory
+        self.cache = cache if cache is not None else _SampleCache()
+
+        self.stats = {"files": 0, "cache_hits": 0, "bytes_downloaded": 0, "bytes_from_cache": 0}
+
+        self._credentials = {}
+        self._service_clients = {}
+        self._file_systems = {}
+
+    def count(self, size, cache_hit):
+
+        '''Record one file read for get_blob_stats()'''
+
+        self.stats["files"] += 1
+        self.stats["cache_hits"] += int(cache_hit)
+        self.stats["bytes_from_cache" if cache_hit else "bytes_downloaded"] += size
+
+    def browser_credential(self, tenant_id):
+
+        '''One interactive browser login per tenant'''
+
+        key = ("browser", tenant_id)
+
+        if key not in self._credentials:
+            factory = self.credential_factory
+
+            if factory is None:
+                from azure.identity import InteractiveBrowserCredential # pylint: disable=import-error,import-outside-toplevel
+                factory = InteractiveBrowserCredential
+
+            self._credentials[key] = factory(tenant_id = tenant_id)
+
+        return key, self._credentials[key]
+
+    def saved_key_credential(self, account_name):
+
+        '''The storage account key from the system's credential manager, asking the user for it (once) if it isn't there'''
+
+        key = ("account_key", account_name)
+
+        if key not in self._credentials:
+            self._credentials[key] = {"account_name": account_name,
+                                      "account_key": _saved_account_key()}
+
+        return key, self._credentials[key]
+
+    def file_client(self, *, account_url, blob_name, file_path, credential):
+
+        '''A client for one file, made from the container's shared file system client
+
+        Parameters
+        ----------
+        credential: tuple
+            The (key, credential) pair returned by browser_credential() or saved_key_credential().
+        '''
+
+        credential_key, credential_value = credential
+        account = (account_url.rstrip("/"), credential_key)
+
+        if account not in self._service_clients:
+            factory = self.service_client_factory
+
+            if factory is None:
+                from azure.storage.filedatalake import DataLakeServiceClient # pylint: disable=import-error,import-outside-toplevel
+                factory = DataLakeServiceClient
+
+            self._service_clients[account] = factory(account_url = account_url, credential = credential_value)
+
+        file_system = account + (blob_name,)
+
+        if file_system not in self._file_systems:
+            self._file_systems[file_system] = self._service_clients[account].get_file_system_client(blob_name)
+
+        return self._file_systems[file_system].get_file_client(file_path)
+
+
+class _AsyncCredential:
+
+    '''Lets the .aio clients use a credential from the session. Tokens are fetched in a thread, from the same token cache'''
+
+    def __init__(self, credential):
+        self.credential = credential
+
+    async def get_token(self, *scopes, **kwargs):
+        return await asyncio.to_thread(self.credential.get_token, *scopes, **kwargs)
+
+    async def close(self):
+        pass
+
+
+class _AsyncStorage:
+
+    '''The .aio clients for one add_blob_csvs() call
+
+    Async clients belong to the event loop they were made in, so they can't be kept in the session between calls.
+    Use it as an async context manager, it closes the clients it made on the way out.
+    '''
+
+    def __init__(self, session):
+        self.session = session
+        self._service_clients = {}
+        self._file_systems = {}
+        self._other_clients = []
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc_info):
+        for client in list(self._service_clients.values()) + self._other_clients:
+            await client.close()
+
+    def file_client(self, *, account_url, blob_name, file_path, credential):
+
+        '''A .aio client for one file, made from the container's shared file system client'''
+
+        credential_key, credential_value = credential
+        account = (account_url.rstrip("/"), credential_key)
+
+        if account not in self._service_clients:
+            factory = self.session.async_service_client_factory
+
+            if factory is None:
+                from azure.storage.filedatalake.aio import DataLakeServiceClient # pylint: disable=import-error,import-outside-toplevel
+                factory = DataLakeServiceClient
+
+            if not isinstance(credential_value, dict):
+                credential_value = _AsyncCredential(credential_value)
+
+            try:
+                self._service_clients[account] = factory(account_url = account_url, credential = credential_value)
+            except ImportError as exc:
+                raise ImportError("Reading blobs concurrently needs aiohttp. Install it with `pip install powerbpy[async]` or `pip install aiohttp`.") from exc
+
+        file_system = account + (blob_name,)
+
+        if file_system not in self._file_systems:
+            self._file_systems[file_system] = self._service_clients[account].get_file_system_client(blob_name)
+
+        return self._file_systems[file_system].get_file_client(file_path)
+
+    def sas_client(self, sas_url):
+
+        '''A .aio client for a file shared with an SAS url'''
+
+        from azure.storage.blob.aio import BlobClient # pylint: disable=import-error,import-outside-toplevel
+
+        try:
+            client = BlobClient.from_blob_url(sas_url)
+        except ImportError as exc:
+            raise ImportError("Reading blobs concurrently needs aiohttp. Install it with `pip install powerbpy[async]` or `pip install aiohttp`.") from exc
+
+        self._other_clients.append(client)
+        return client
+
+
+async def _gather_samples(session, requests, max_concurrency):
+
+    '''Download and parse many csv files, at most max_concurrency at a time
+
+    Parameters
+    ----------
+    requests: list
+        One dictionary per file with the keys account_url, blob_name, data_path, credential (a session credential, or None with an sas_url), sas_url, sample_mb, encoding, use_cache and max_memory_mb.
+
+    Returns
+    -------
+    list
+        A (DataFrame, sampled) tuple per file, in the same order as requests.
+    '''
+
+    if not isinstance(max_concurrency, int) or max_concurrency < 1:
+        raise ValueError("max_concurrency must be a positive whole number")
+
+    semaphore = asyncio.Semaphore(max_concurrency)
+
+    async with _AsyncStorage(session) as storage:
+
+        async def fetch(request):
+            async with semaphore:
+                if request["sas_url"] is not None:
+                    client = storage.sas_client(request["sas_url"])
+                else:
+                    client = storage.file_client(account_url = request["account_url"],
+                                                 blob_name = request["blob_name"],
+                                                 file_path = request["data_path"],
+                                                 credential = request["credential"])
+
+                return await _read_csv_sample_async(client, request["sample_mb"], request["encoding"],
+                                                    session = session, use_cache = request["use_cache"],
+                                                    max_memory_mb = request["max_memory_mb"])
+
+        return await asyncio.gather(*(fetch(request) for request in requests))
+
+
+def _fetch_samples(session, requests, max_concurrency = 8):
+
+    '''Download and parse many csv files concurrently, see _gather_samples()
+
+    Works from plain scripts and from notebooks (which already run an event loop).
+    '''
+
+    # log in once up front, instead of every file opening its own browser window
+    credentials = {request["credential"][0]: request["credential"][1] for request in requests if request["credential"] is not None}
+
+    for credential in credentials.values():
+        if hasattr(credential, "get_token"):
+            credential.get_token(_STORAGE_SCOPE)
+
+    coroutine = _gather_samples(session, requests, max_concurrency)
+
+    try:
+        asyncio.get_running_loop()
+    except RuntimeError:
+        return asyncio.run(coroutine)
+
+    # asyncio.run() can't be called from inside a running event loop, so use a new one in another thread
+    with concurrent.futures.ThreadPoolExecutor(max_workers = 1) as executor:
+        return executor.submit(asyncio.run, coroutine).result()
+
+
+def _saved_account_key():
+
+    '''Get the storage account key from the system's credential manager, prompting the user to add one if there isn't one yet'''
+
+    import keyring # pylint: disable=import-error,import-outside-toplevel
+
+    # retrieve the storage token
+    account_token = keyring.get_password('azure_account_key', 'token')
+
+    # if no storage token was found, prompt the user for it
+    if not account_token:
+
+        add_key = "No key has been added yet..."
+
+        while add_key not in ("y", "n"):
+            add_key = input("Would you like to add an Azure Storage Container Key to your operating system's default credential manager?(y/n): ")
+
+            if add_key == "n":
+                raise ValueError("Loading files from azure requires using either an account_key, a sas_url, or an interactive browser login.\nPlease change use_saved_storage_key to 'True', allow the system to store an azure_account_key, or provide an sas_url")
+
+            if add_key == "y":
+                user_provided_key =  getpass.getpass(prompt="Please provide an Azure Storage Account Key: ", stream=None)
+
+                # strip out white space
+                user_provided_key = user_provided_key.strip()
+
+                keyring.set_password('azure_account_key', 'token', user_provided_key)
+
+                # Retrieve the stored API token
+                account_token = keyring.get_password('azure_account_key', 'token')
+
+    return account_token
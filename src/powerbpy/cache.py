@@ -0,0 +1,52 @@
+'''A small on-disk cache for work that is slow to redo, like re-encoding images.
+    These are internal helpers, you should never need to call them directly.
+'''
+
+import os
+
+
+def _cache_folder(kind):
+
+    '''The folder to cache one kind of file in, created if needed
+
+    The cache lives outside the dashboard folder so it's never published with the report.
+    Set the POWERBPY_CACHE_DIR environment variable to put it somewhere else.
+    '''
+
+    base = os.environ.get("POWERBPY_CACHE_DIR")
+
+    if not base:
+        if os.name == "nt":
+            base = os.path.join(os.environ.get("LOCALAPPDATA", os.path.expanduser("~")), "powerbpy", "cache")
+        else:
+            base = os.path.join(os.environ.get("XDG_CACHE_HOME", os.path.expanduser("~/.cache")), "powerbpy")
+
+    folder = os.path.join(base, kind)
+    os.makedirs(folder, exist_ok = True)
+
+    return folder
+
+
+def _evict(folder, max_bytes):
+
+    '''Delete the least recently used files in a cache folder until it holds at most max_bytes
+
+    Reading a cached file should touch it (os.utime), so the modified time is when it was last used.
+    '''
+
+    entries = sorted((entry for entry in os.scandir(folder) if entry.is_file()), key=lambda entry: entry.stat().st_mtime)
+    total = sum(entry.stat().st_size for entry in entries)
+
+    for entry in entries:
+        if total <= max_bytes:
+            break
+
+        size = entry.stat().st_size
+
+        try:
+            os.remove(entry.path)
+        except FileNotFoundError:
+            # another build removed it first
+            pass
+
+        total -= size
@@ -29,6 +29,9 @@ class _Chart(_Visual):
     # pylint: disable=too-many-arguments
     # pylint: disable=duplicate-code
 
+    # more categories than this don't fit on an axis
+    _default_top_n = 30
+
     def __init__(self,
                  page,
                  *,
@@ -63,7 +66,10 @@ class _Chart(_Visual):
                  title_bold=None,
                  border_color=None,
                  border_width=None,
-                 tooltip_page=None):
+                 tooltip_page=None,
+                 top_n=None,
+                 top_n_by=None,
+                 top_n_direction="Top"):
 
         '''This function adds a new chart to a page in a power BI dashboard report.
         Parameters
@@ -99,6 +105,12 @@ class _Chart(_Visual):
             The order which the screen reader reads different elements on the page. Defaults to -1001 for now. (I need to do more to figure out what the numbers correpond to. It should also be possible to create a function to automatically order this left to right top to bottom by looping through all the visuals on a page and comparing their x and y positions)
         z_position: int
             The z index for the visual. (Larger number means more to the front, smaller number means more to the back). Defaults to 6000
+        top_n: int or bool
+            Optional. Only query the top (or bottom) top_n x_axis_var categories, ranked by top_n_by. This is written as a visual level TopN filter, so high cardinality columns don't pull every value into the visual. True keeps 30 categories.
+        top_n_by: dict
+            Optional. What to rank the categories by, either {"measure": "measure name"} or {"column": "column name", "aggregation": "Sum"}. Defaults to the chart's y axis value.
+        top_n_direction: str
+            "Top" (the default) keeps the largest values, "Bottom" the smallest.
         '''
 
 
@@ -336,6 +348,13 @@ class _Chart(_Visual):
                 }
             }
 
+        if top_n is not None:
+            self._add_top_n_filter(data_source=data_source,
+                                   column=x_axis_var,
+                                   top_n=top_n,
+                                   top_n_by=top_n_by or {"column": y_axis_var, "aggregation": y_axis_var_aggregation_type},
+                                   direction=top_n_direction)
+
         # Write out the new json
         with open(self.visual_json_path, "w", encoding="utf-8") as file:
             json.dump(self.visual_json, file, indent = 2)
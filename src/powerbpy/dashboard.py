@@ -78,6 +78,34 @@ class Dashboard:
         self.diagram_layout_path = os.path.join(self.semantic_model_folder_path, 'diagramLayout.json')
         self.tables_folder = os.path.join(self.sm_definition_folder, 'tables')
 
+        # registered resources (images, shape files), created the first time a resource is added
+        self._resource_registry = None
+
+        # Azure credentials and clients, created the first time a blob is read
+        self._storage_session = None
+
+    def _resources(self):
+
+        '''The registry that copies images and shape files into the report, once per unique file'''
+
+        from powerbpy.registered_resources import _ResourceRegistry
+
+        if self._resource_registry is None:
+            self._resource_registry = _ResourceRegistry(self)
+
+        return self._resource_registry
+
+    def _storage(self):
+
+        '''The Azure credentials and clients shared by every blob dataset added to the dashboard'''
+
+        from powerbpy.blob_storage import _StorageSession
+
+        if self._storage_session is None:
+            self._storage_session = _StorageSession()
+
+        return self._storage_session
+
     @classmethod
     def create(cls, file_path):
 
@@ -447,11 +475,81 @@ class Dashboard:
         return dataset
 
 
+    def add_csv_folder(self,
+                       folder_path,
+                       pattern = "*.csv",
+                       *,
+                       table_name = None,
+                       partition_by = "folder",
+                       encoding = "utf-8",
+                       max_workers = 8):
+
+        '''Add a folder of CSV files with the same columns (e.g. daily drops) to a dashboard as one table
+
+        Parameters
+        ----------
+        folder_path : str
+            The folder where the csv files are stored. Can be a relative path. Files in its subfolders aren't included.
+        pattern : str
+            Which files in the folder to include, e.g. "sales_*.csv". Defaults to "*.csv". The "folder" and "month" partitions can only use * wildcards, because Power Query matches the file names again at every refresh.
+        table_name : str
+            The name of the table. Defaults to the name of the folder.
+        partition_by : str
+            How the table is split into partitions, which Power BI refreshes side by side. Defaults to "folder".
+            "folder": one partition that reads every matching file with Folder.Files, so files added later are picked up by the next refresh.
+            "file": one partition per file that exists now.
+            "month": one partition per month of the date in the file names (like sales_2024-01-31.csv or sales_20240131.csv), each reading that month's files with Folder.Files. Months that start after this runs need add_csv_folder() to be run again.
+        encoding : str
+            The encoding of the CSV files. Defaults to "utf-8". See add_local_csv() for the other values.
+        max_workers : int
+            How many files python reads at once while it works out the columns. Defaults to 8.
+
+        Returns
+        -------
+        dataset : class
+            An instance of the internal _CsvFolder dataset class. Its schema_drift attribute is a DataFrame with one row per file and column that doesn't match the rest of the files.
+
+        Notes
+        -----
+        Every file is read in python to work out the columns. The table has every column found in any of the files, in the order they first appear, and each column gets a type that fits all of them:
+        a column with whole numbers in some files and decimals in others is a decimal column, and one with numbers in some files and text in others is a text column.
+        A warning is shown when the files don't all match, and files without a column get nulls for it.
+
+        The same rules as add_local_csv() apply to the files themselves: NA values must display as "NA" or "null", and a column without a name is renamed to "probably_an_index_column".
+
+        ```python
+        from powerbpy import Dashboard
+
+        my_dashboard = Dashboard.create("C:/Users/Russ/PowerBI/test_dashboard")
+
+        sales = my_dashboard.add_csv_folder("C:/Users/Russ/drops/sales",
+                                            pattern = "sales_*.csv",
+                                            partition_by = "month")
+
+        print(sales.schema_drift)
+        ```
+        '''
+
+        from powerbpy.dataset_csv import _CsvFolder
+
+        dataset = _CsvFolder(self,
+                             folder_path,
+                             pattern,
+                             table_name=table_name,
+                             partition_by=partition_by,
+                             encoding=encoding,
+                             max_workers=max_workers)
+
+        self.datasets.append(dataset)
+        return dataset
+
+
     def add_web_csv(self,
                     table_name,
                     url,
                     sample_csv,
-                    encoding="utf-8"):
+                    encoding="utf-8",
+                    pagination=None):
 
         '''Add a CSV API endpoint as a data source.
 
@@ -474,6 +572,11 @@ class Dashboard:
             Path to a sample CSV file for column type detection.
         encoding : str
             Encoding for the sample CSV and PQ encoding param. Default "utf-8".
+        pagination : dict, optional
+            Request the endpoint one page at a time instead of in one giant
+            response. A dictionary with a "type" of "offset" or
+            "date_window" and its settings. See `add_web_json()` for the
+            settings of each type.
 
         Returns
         -------
@@ -496,7 +599,8 @@ class Dashboard:
                           table_name=table_name,
                           url=url,
                           sample_csv_path=sample_csv,
-                          encoding=encoding)
+                          encoding=encoding,
+                          pagination=pagination)
 
         self.datasets.append(dataset)
         return dataset
@@ -505,9 +609,11 @@ class Dashboard:
     def add_web_json(self,
                      table_name,
                      url,
-                     sample_csv,
+                     sample_csv=None,
                      type_transforms=None,
-                     encoding="utf-8"):
+                     encoding="utf-8",
+                     sample_json=None,
+                     pagination=None):
 
         '''Add a JSON API endpoint as a data source.
 
@@ -516,8 +622,16 @@ class Dashboard:
         PBI Desktop prompts for credentials (Basic auth, OAuth2, API Key, etc.)
         which are then stored securely in the PBI credential manager.
 
-        A sample CSV file is required for column type detection. The CSV data
-        is NOT included in the dashboard — only used to infer the schema.
+        A sample CSV file, or a sample of the API's JSON response, is required
+        for column type detection. The sample data is NOT included in the
+        dashboard — only used to infer the schema.
+
+        With a sample JSON, every record in the sample is read to find all the
+        fields (not just the first record's) and the type each one needs. The
+        sample is read one record at a time, so it can be a large download.
+        Nested records become "parent.child" columns, lists of records are
+        expanded to new rows, lists of values are joined into one text value
+        and fields that mix records, lists and values are kept as JSON text.
 
         Parameters
         ----------
@@ -532,9 +646,38 @@ class Dashboard:
             - "step_name": str — M code variable name (e.g. "TypedDates")
             - "columns": list of {"name": str, "type": str} where type is
               a Power Query type string (e.g. "type number", "type datetimezone")
-            If not provided, transforms are auto-generated from CSV column types.
+            If not provided, transforms are auto-generated from the sample's column types.
         encoding : str
-            Encoding for reading the sample CSV. Default "utf-8".
+            Encoding for reading the sample file. Default "utf-8".
+        sample_json : str
+            Path to a file holding a sample of the API's response (a JSON
+            array of records). Use it instead of sample_csv.
+        pagination : dict, optional
+            Request the endpoint one page at a time instead of in one giant
+            response, which can time out on refresh. A dictionary with a
+            "type" and that type's settings (the defaults are shown):
+            - {"type": "offset", "offset_param": "offset", "limit_param": "limit",
+              "page_size": 1000, "start": 0} stops after the first page with
+              fewer than page_size items.
+            - {"type": "next_link", "next_field": "next"} follows the url in each
+              response's next_field until it's null or missing.
+            - {"type": "cursor", "cursor_param": "cursor", "cursor_field": "next_cursor"}
+              passes each response's cursor_field back as cursor_param.
+            - {"type": "date_window", "start_param": "start", "end_param": "end",
+              "start": None, "end": None, "window_days": 30, "date_format": "yyyy-MM-dd",
+              "end_inclusive": False}
+              makes one request per window from start (required, "YYYY-MM-DD")
+              to end (today when None). Use "unix" as the date_format for
+              seconds since 1970. Each window's end_param is the next window's
+              start_param, which suits APIs that leave out the rows on the end
+              date. Set end_inclusive to True when the API includes them, so
+              each window ends the day (or for "unix", the second) before the
+              next one starts and no day is read twice.
+            Every type also takes "items_field", the (dotted) field that holds
+            the records when each page is a record like {"data": [...]}.
+            The pages are read with List.Generate, and every request uses the
+            same base url with Web.Contents' RelativePath and Query options,
+            so the Power BI service can refresh the table on a schedule.
 
         Returns
         -------
@@ -550,6 +693,21 @@ class Dashboard:
         ... )
         >>> ds.add_measure("Total Rows", "COUNTROWS('my_data')", "#,0")
 
+        >>> # A paged API: 500 records per request
+        >>> ds = db.add_web_json(
+        ...     table_name="tickets",
+        ...     url="https://api.example.com/v1/tickets?status=open",
+        ...     sample_json="data/tickets_sample.json",
+        ...     pagination={"type": "offset", "page_size": 500, "items_field": "results"},
+        ... )
+
+        >>> # With a sample of the JSON response instead of a CSV
+        >>> ds = db.add_web_json(
+        ...     table_name="orders",
+        ...     url="https://api.example.com/orders",
+        ...     sample_json="data/orders_sample.json",
+        ... )
+
         >>> # With custom type transforms
         >>> ds = db.add_web_json(
         ...     table_name="survey",
@@ -572,7 +730,9 @@ class Dashboard:
                            url=url,
                            sample_csv_path=sample_csv,
                            type_transforms=type_transforms,
-                           encoding=encoding)
+                           encoding=encoding,
+                           sample_json_path=sample_json,
+                           pagination=pagination)
 
         self.datasets.append(dataset)
         return dataset
@@ -589,7 +749,10 @@ class Dashboard:
                  sas_url = None,
                  storage_account_key = None,
                  show_warnings = True,
-                 encoding = "utf-8"):
+                 encoding = "utf-8",
+                 sample_mb = None,
+                 use_cache = False,
+                 max_memory_mb = None):
 
         '''Add a csv file stored in a ADLS blob container to a dashboard
 
@@ -616,6 +779,20 @@ class Dashboard:
         encoding : str
             The encoding of the CSV file. Defaults to "utf-8". Common values:
             "utf-8" (65001), "windows-1252" (1252), "utf-16" (1200), "iso-8859-1" (28591).
+        sample_mb : float
+            Optional. Only download the first `sample_mb` megabytes of the file to work out the column types, instead of the whole file. The download is cut back to the last complete row. Power BI still loads the whole file when the report refreshes. Defaults to None, which downloads the whole file.
+
+            Python then only has the sampled rows. Features that need every row, like precomputed shape map percentiles or `links_from_data` in sanky charts, won't use a sampled dataset, and `estimate_model_size()` only sees the sampled rows.
+
+        use_cache : bool
+            Keep the downloaded file (or sample) in a cache on your computer, and reuse it in later builds as long as the blob's ETag shows it hasn't changed. Checking the ETag is a single small request, so unchanged files aren't downloaded again. Defaults to False.
+
+            The cached data is kept on disk, unencrypted, after the build finishes, even though the blob itself needs a login or SAS token to read. Only turn this on for data that is fine to keep on your computer.
+            The cache files can only be read by your user account. The cache is in your user cache folder (set the POWERBPY_CACHE_DIR environment variable to move it) and is limited to 1024 MB, deleting the least recently used files first. Set the POWERBPY_BLOB_CACHE_MB environment variable to change the limit. Use `get_blob_stats()` to see how many files came from the cache.
+        max_memory_mb : float
+            Optional. The most of the file to hold in memory while it's read. The download is streamed to a temporary file once it gets bigger than this, so memory use stays flat however big the blob is. Defaults to the POWERBPY_BLOB_MEMORY_MB environment variable, or 64.
+
+            A file bigger than this is parsed in chunks: every row is checked to work out the column types, but python only keeps the first chunk of rows, the same as with `sample_mb`.
 
         Returns
         -------
@@ -629,6 +806,7 @@ class Dashboard:
         The csv file should probably not have row numbers. (Any column without a column name will be renamed to "probably_an_index_column").
         NA values must display as "NA" or "null" not as N/A.
         If the data is malformed in Power BI, try cleaning it first in python and then rerunning this function.
+        With `sample_mb`, a quoted value that contains a line break can be cut off at the end of the sample, so use a larger sample (or no sample) for those files.
 
         This function creates a new TMDL file defining the dataset in TMDL format and also in M code.
         The DiagramLayout and Model.tmdl files are updated to include references to the new dataset.      
@@ -650,7 +828,178 @@ class Dashboard:
                  sas_url = sas_url,
                  storage_account_key = storage_account_key,
                  show_warnings = show_warnings,
-                 encoding = encoding)
+                 encoding = encoding,
+                 sample_mb = sample_mb,
+                 use_cache = use_cache,
+                 max_memory_mb = max_memory_mb)
+
+        self.datasets.append(dataset)
+        return dataset
+
+
+    def add_blob_csvs(self,
+                      files,
+                      *,
+                      max_concurrency = 8,
+                      account_url = None,
+                      blob_name = None,
+                      tenant_id = None,
+                      use_saved_storage_key = False,
+                      storage_account_key = None,
+                      show_warnings = True,
+                      encoding = "utf-8",
+                      sample_mb = None,
+                      use_cache = False,
+                      max_memory_mb = None):
+
+        '''Add many csv files stored in ADLS blob containers to a dashboard, downloading them at the same time
+
+        Parameters
+        ----------
+        files : list
+            The files to add. Each one is either a data_path (relative to `blob_name`) or a dictionary of `add_blob_csv()` arguments, for example `{"data_path": "sales/2024.csv", "sample_mb": 5}`. Arguments left out of a dictionary use the values passed to this function.
+        max_concurrency : int
+            The most files to download and read at once. Defaults to 8.
+        account_url, blob_name, tenant_id, use_saved_storage_key, storage_account_key, show_warnings, encoding, sample_mb, use_cache, max_memory_mb
+            The defaults for every file. See `add_blob_csv()`.
+
+        Returns
+        -------
+        list
+            The new datasets, in the same order as files.
+
+        Notes
+        -----
+        The files are downloaded and their column types worked out concurrently, then they're added to the model one at a time, in order. If any file can't be read, nothing is added to the model.
+        Each download in flight can hold up to `max_memory_mb` in memory, so the most memory used is about `max_concurrency` times `max_memory_mb`.
+        Credentials are checked (and the browser login happens) once, before any download starts.
+        This uses the azure async clients, which need aiohttp (`pip install powerbpy[async]`).
+
+        Here's some example code that adds every table in a lake folder, reading the first 5 MB of each file:
+
+        ```python
+        my_dashboard.add_blob_csvs([f"gold/{table}.csv" for table in tables],
+                                   account_url = "https://mylake.blob.core.windows.net",
+                                   blob_name = "warehouse",
+                                   tenant_id = "my-tenant-id",
+                                   sample_mb = 5)
+        ```
+        '''
+
+        from powerbpy.blob_storage import _fetch_samples
+        from powerbpy.dataset_csv import _BlobCsv, _blob_request
+
+        defaults = {"account_url": account_url,
+                    "blob_name": blob_name,
+                    "tenant_id": tenant_id,
+                    "use_saved_storage_key": use_saved_storage_key,
+                    "sas_url": None,
+                    "storage_account_key": storage_account_key,
+                    "show_warnings": show_warnings,
+                    "encoding": encoding,
+                    "sample_mb": sample_mb,
+                    "use_cache": use_cache,
+                    "max_memory_mb": max_memory_mb}
+
+        arguments = []
+        for file in files:
+            file = {"data_path": file} if isinstance(file, str) else file
+
+            unknown = set(file) - set(defaults) - {"data_path"}
+            if unknown:
+                raise TypeError(f"Unknown add_blob_csv arguments: {', '.join(sorted(unknown))}")
+
+            arguments.append({**defaults, **file})
+
+        # check everything before downloading anything
+        requests = [_blob_request(self, **file_arguments) for file_arguments in arguments]
+
+        samples = _fetch_samples(self._storage(), requests, max_concurrency)
+
+        datasets = []
+        for file_arguments, sample in zip(arguments, samples):
+            dataset = _BlobCsv(self, **file_arguments, sample = sample)
+
+            self.datasets.append(dataset)
+            datasets.append(dataset)
+
+        return datasets
+
+
+    def get_blob_stats(self):
+
+        '''How many blob files the dashboard has read, and how many of them came from the local cache
+
+        Returns
+        -------
+        DataFrame
+            One row with the columns files, cache_hits, cache_hit_rate, bytes_downloaded and bytes_from_cache.
+
+        Notes
+        -----
+        The counts cover every `add_blob_csv()` and `add_blob_csvs()` call since the dashboard was created or loaded.
+        '''
+
+        stats = dict(self._storage().stats)
+        stats["cache_hit_rate"] = round(stats["cache_hits"] / stats["files"], 3) if stats["files"] else None
+
+        return pd.DataFrame([stats], columns=["files", "cache_hits", "cache_hit_rate", "bytes_downloaded", "bytes_from_cache"])
+
+
+    def add_dimension_table(self,
+                            table_name,
+                            from_table,
+                            columns,
+                            from_source_query = False):
+
+        '''Add a table of the distinct values of some columns of another table, without reading the source again
+
+        Parameters
+        ----------
+        table_name : str
+            The name of the new table, for example "dim_state".
+        from_table : str
+            The name of the table to build it from, for example a fact table added with `add_local_csv()`, `add_blob_csv()`, `add_web_csv()`, `add_web_json()` or `add_csv_folder()`.
+        columns : list
+            The columns to keep. The new table has one row for each distinct combination of their values.
+        from_source_query : bool
+            Make a Power Query table that shares `from_table`'s source query, instead of a DAX calculated table. Defaults to False.
+
+        Returns
+        -------
+        dataset : _DimensionTable
+            The new table.
+
+        Notes
+        -----
+        By default the new table is a DAX calculated table, `DISTINCT ( SELECTCOLUMNS ( 'sales', "state", 'sales'[state], ... ) )`.
+        It's calculated from the rows `from_table` already imported, so the source file or API is only read once per refresh, for `from_table`.
+        More dimension tables can be built from the same table the same way.
+
+        Use `from_source_query = True` when the dimension has to be a Power Query table (for example to add more M steps to it).
+        `from_table`'s query is then moved into a shared expression in `expressions.tmdl` (named after the table, e.g. `sales_source`) and both tables reference it.
+        That only shares the query's definition: Power Query doesn't cache a shared expression between the tables that use it, so each table still reads the source at every refresh.
+        `from_table` has to have a single partition for this. Tables added with `add_csv_folder()` can be used when they're partitioned by "folder".
+
+        Here's some example code that splits the state columns out of a sales fact table and relates the two:
+
+        ```python
+        my_dashboard.add_local_csv("data/sales.csv")
+        my_dashboard.add_dimension_table("dim_state", "sales", ["state", "state_name", "region"])
+        my_dashboard.add_relationship("dim_state", "state", "sales", "state")
+        ```
+        '''
+
+        from powerbpy.dataset_staging import _DimensionTable
+
+        source = next((dataset for dataset in self.datasets
+                       if getattr(dataset, "dataset_name", None) == from_table), None)
+
+        if source is None:
+            raise ValueError(f"There isn't a table called {from_table!r} in this dashboard. "
+                             "Dimension tables can only be built from tables added since the dashboard was created or loaded.")
+
+        dataset = _DimensionTable(self, table_name, source, columns, from_source_query = from_source_query)
 
         self.datasets.append(dataset)
         return dataset
@@ -765,6 +1114,318 @@ class Dashboard:
             print("Measures not found")
 
 
+    def estimate_model_size(self,
+                            row_counts = None,
+                            level = "column",
+                            max_model_size_mb = None):
+
+        '''Estimate how much memory the semantic model will use after it is refreshed
+
+        Parameters
+        ----------
+        row_counts : dict
+            Optional. The real number of rows for tables that were added from a sample (for example `add_web_csv()` or `add_web_json()`), keyed by dataset name. Identifier-like columns are scaled up with the row count.
+        level : str
+            Either "column" (the default) to rank individual columns, or "table" to rank whole tables.
+        max_model_size_mb : float
+            Optional. If the estimated model is larger than this many MB a warning is raised. Useful for catching models that will blow past a capacity's memory limit before you publish.
+
+        Returns
+        -------
+        report : DataFrame
+            One row per column (or table) with the probable encoding, the estimated dictionary, data and hierarchy sizes in bytes, and each row's share of the whole model. The biggest consumers are listed first.
+
+        Notes
+        -----
+        - The estimate uses the column profiles (row count, cardinality and value width) recorded while each dataset was added in this python session, in the spirit of VertiPaq Analyzer. Datasets added with `add_tmdl()` or by a previous session are not included.
+        - Segment sizes assume bit packing without run length encoding, so they are an upper bound. Real models are usually smaller, especially for low cardinality columns in sorted tables.
+
+        Examples
+        --------
+        >>> db.add_local_csv("data/colony.csv")
+        >>> db.estimate_model_size().head()
+        >>> db.estimate_model_size(level="table", max_model_size_mb=1024)
+        '''
+
+        from powerbpy.model_size import _estimate_model_size
+
+        return _estimate_model_size(self.datasets,
+                                    row_counts = row_counts,
+                                    level = level,
+                                    max_model_size_mb = max_model_size_mb)
+
+
+    def analyze_vpax(self,
+                     vpax_path,
+                     top_n = 25):
+
+        '''Map a VertiPaq Analyzer (.vpax) export of the published model back onto the tables and columns this dashboard generated
+
+        Parameters
+        ----------
+        vpax_path : str
+            The path to a .vpax file exported from DAX Studio, Tabular Editor or Bravo after the model was refreshed.
+        top_n : int
+            How many of the biggest consumers to return. Use None to return every column and relationship.
+
+        Returns
+        -------
+        report : DataFrame
+            One row per column and relationship, biggest first. Each row shows the real cardinality, encoding and dictionary, data and hierarchy sizes, its share of the model, whether (and with which data type) the generated TMDL defines it, the size `estimate_model_size()` predicted for it, and a suggested fix.
+
+        Notes
+        -----
+        - The .vpax file is a zip archive. The statistics are streamed out of it, so exports of very large models can be read without loading the whole file.
+        - Suggestions are heuristics: dropping columns not in the generated model or that are almost unique, splitting datetimes, changing hash encoded decimals to a type that can be value encoded, and computing calculated columns in the source.
+
+        Examples
+        --------
+        >>> db.analyze_vpax("exports/my_dashboard.vpax", top_n=10)
+        '''
+
+        from powerbpy.vpax import _analyze_vpax
+
+        return _analyze_vpax(vpax_path,
+                             self.sm_definition_folder,
+                             datasets = self.datasets,
+                             top_n = top_n)
+
+
+    def load_performance_log(self,
+                             log_path,
+                             by = "visual"):
+
+        '''Find the slow visuals and pages in a Power BI Desktop Performance Analyzer export
+
+        Parameters
+        ----------
+        log_path : str
+            The path to the json file created by the "Export" button in Performance Analyzer.
+        by : str
+            Either "visual" (the default) to get one row per visual, or "page" to add up all the visuals on each page.
+
+        Returns
+        -------
+        report : DataFrame
+            The time spent on DAX queries, DirectQuery, visual display and other work, in milliseconds, slowest first.
+            Per visual rows include the page, visual type, title, the model fields the visual queries and how many times it was loaded during the recording. Visuals that aren't in this report's definition have `in_report` set to False.
+            Per page rows include the number of visuals and the slowest visual on the page.
+
+        Notes
+        -----
+        - The export is streamed, so logs from long recording sessions across hundreds of pages can be read without loading the whole file.
+        - Events are matched to visuals through their parentId chain and the visualId Performance Analyzer records, which is the `visual_id` you gave the visual when you created it.
+
+        Examples
+        --------
+        >>> db.load_performance_log("PowerBIPerformanceData.json").head(10)
+        >>> db.load_performance_log("PowerBIPerformanceData.json", by="page")
+        '''
+
+        from powerbpy.performance_log import _load_performance_log
+
+        return _load_performance_log(log_path,
+                                     self.pages_folder,
+                                     by = by)
+
+
+    def find_unused_fields(self,
+                           drop = False):
+
+        '''Find the columns and measures in the semantic model that the report never uses
+
+        Parameters
+        ----------
+        drop : bool
+            If True, the unused columns and measures are also removed from the TMDL files, and the columns are taken out of the `#"Changed Type"` (and `#"Replaced Value"`) M steps and removed by a final `#"Removed Unused Columns"` step so they aren't imported at all. Defaults to False.
+
+        Returns
+        -------
+        report : DataFrame
+            One row per unused column or measure with its table, kind, data type and whether it is calculated.
+
+        Notes
+        -----
+        - A field counts as used if any visual, visual level filter, page filter or report filter references it, if a relationship uses it, or if a used measure, calculated column, calculated table or sort by column depends on it (directly or through other measures).
+        - Visuals that don't reference any fields (text boxes, buttons, images) are skipped without being parsed, and the fields are collected one file at a time, so this stays fast on projects with tens of thousands of visuals.
+        - Run this after all the pages have been added. Anything added later can't be taken into account.
+
+        Examples
+        --------
+        >>> db.find_unused_fields()
+        >>> db.find_unused_fields(drop=True)
+        '''
+
+        from powerbpy.field_usage import _find_unused_fields
+
+        return _find_unused_fields(self.sm_definition_folder,
+                                   self.pages_folder,
+                                   self.report_json_path,
+                                   drop = drop,
+                                   datasets = self.datasets)
+
+
+    def dax_dependencies(self):
+
+        '''Build the dependency graph of the measures, columns and tables in the semantic model
+
+        Returns
+        -------
+        graph : _DaxDependencyGraph
+            The graph of every table, column and measure in the model's TMDL files, including the ones added with `add_measure()` and `add_column()` and the ones in files loaded with `add_tmdl()`. Nodes are (table, name) tuples, with name set to None for a whole table. The graph has the following methods:
+
+            - `dependencies(table, name, transitive=False)`: what an object refers to.
+            - `impact(table, name)`: a DataFrame of everything that breaks if the object is dropped or changed.
+            - `topological_order()`: every object, after all the objects it depends on. Raises a ValueError if the model has circular dependencies.
+            - `find_cycles()`: the circular dependencies in the model.
+            - `unresolved()`: a DataFrame of references to tables, columns or measures that don't exist.
+            - `add(table, name, kind, expression)` and `remove(table, name)`: update the graph without rebuilding it.
+
+        Notes
+        -----
+        The graph is built from the TMDL files on disk, so call this again after adding measures or columns. DAX expressions are tokenized once and cached, so rebuilding the graph for models with thousands of measures is cheap.
+
+        Examples
+        --------
+        >>> graph = db.dax_dependencies()
+        >>> graph.impact("colony", "colony_lost")
+        >>> graph.topological_order()
+        '''
+
+        from powerbpy.dax import _build_graph
+
+        return _build_graph(self.sm_definition_folder)
+
+
+    def lint_dax(self):
+
+        '''Check every measure and calculated column in the semantic model for DAX performance anti-patterns
+
+        Returns
+        -------
+        findings : DataFrame
+            One row per finding with the table, object, rule, severity, the line and column in the TMDL file (given in the path column), a message explaining the fix and a snippet of the offending DAX.
+
+        Notes
+        -----
+        The rules are:
+
+        - filter-whole-table: `FILTER()` over a whole table used as a `CALCULATE()` filter.
+        - nested-iterator: an iterator (SUMX, FILTER, ...) over a fact table inside the row expression of another iterator.
+        - blank-to-zero: `IF(ISBLANK(...), 0, ...)`, `SWITCH(TRUE(), ISBLANK(...), 0, ...)` or `COALESCE(..., 0)`, which forces visuals to evaluate every combination of their fields.
+        - repeated-subexpression: the same function call evaluated more than once, which should be a VAR.
+        - calculated-column-in-source: a calculated column that only uses values from its own row and could be computed in the source.
+
+        Measures and calculated columns are also checked when they are added with `add_measure()` or `add_column()` (pass `lint=False` to turn this off), and the bin measures are checked when a shape map is added. This method also covers measures from loaded TMDL files.
+
+        Examples
+        --------
+        >>> findings = db.lint_dax()
+        >>> findings[findings["severity"] == "warning"]
+        '''
+
+        from powerbpy.dax_lint import _lint_model
+
+        return _lint_model(self.sm_definition_folder)
+
+
+    def simplify_shape_file(self,
+                            shape_file_path,
+                            output_path,
+                            tolerance = None,
+                            quantization = 100_000,
+                            properties = None):
+
+        '''Shrink a GeoJSON or TopoJSON shape file so shape maps built from it load and draw faster
+
+        Parameters
+        ----------
+        shape_file_path : str
+            The path to the GeoJSON or TopoJSON file.
+        output_path : str
+            Where to write the simplified TopoJSON file. Pass this to `add_shape_map()` as its `shape_file_path`.
+        tolerance : float
+            Points closer than this distance to the simplified border are removed, in the units of the file's coordinates (for longitude and latitude 0.001 is roughly 100 meters). Use None to keep every point.
+        quantization : int
+            Round the coordinates to a grid this many steps wide and tall. Use None to keep the full precision.
+        properties : list
+            The feature properties to keep, for example the column your `location_var` matches. Use None to keep them all.
+
+        Returns
+        -------
+        report : DataFrame
+            A single row with the size in bytes and number of points of the input and output files, the number of shared arcs, and the tolerance and quantization used.
+
+        Notes
+        -----
+        - The shapes are split into arcs wherever neighbors meet, and each arc is simplified once with Douglas-Peucker. Borders between neighbors stay identical, so simplifying doesn't open gaps or overlaps between shapes.
+        - Rings always keep at least three corners. Very small shapes can still lose their detail at large tolerances.
+
+        Examples
+        --------
+        >>> for tolerance in [0.0005, 0.001, 0.005]:
+        ...     print(db.simplify_shape_file("data/tracts.geojson", f"data/tracts_{tolerance}.json", tolerance=tolerance))
+        '''
+
+        from powerbpy.geo_simplify import _simplify_shape_file
+
+        return _simplify_shape_file(shape_file_path,
+                                    output_path,
+                                    tolerance = tolerance,
+                                    quantization = quantization,
+                                    properties = properties)
+
+
+    def check_shape_map_keys(self,
+                             shape_file_path,
+                             data_source,
+                             location_var,
+                             key_property = None):
+
+        '''Check which locations in a dataset match a feature in a shape map's shape file
+
+        Parameters
+        ----------
+        shape_file_path : str
+            The path to the GeoJSON or TopoJSON file.
+        data_source : str
+            The name of the dataset, as used by `add_shape_map()`. The dataset must already be loaded.
+        location_var : str
+            The column in data_source that holds the locations.
+        key_property : str
+            The feature property the locations should match, for example "NAME" or "GEOID". Defaults to the property that matches the most locations.
+
+        Returns
+        -------
+        report : DataFrame
+            One row per distinct location with the number of rows it has in the dataset, whether it matches a feature, the property it was matched against and, when it doesn't match, the closest feature key. Locations that don't match come first.
+
+        Notes
+        -----
+        - Power BI leaves locations that don't match any feature blank without any error, so `add_shape_map()` runs this check and warns when it finds any.
+        - The shape file is streamed once to index its feature properties, so files with tens of thousands of features are fine.
+        - Suggestions ignore case, spaces and punctuation first, then look for the most similar key starting with the same letters.
+        - For web datasets only the sample csv is checked.
+
+        Examples
+        --------
+        >>> report = db.check_shape_map_keys("data/wa_counties.json", "wa_bigfoot_by_county", "county")
+        >>> report[~report["matched"]]
+        '''
+
+        from powerbpy.shape_keys import _check_shape_keys, _dataset_frame
+
+        frame = _dataset_frame(self.datasets, data_source)
+
+        if frame is None:
+            raise ValueError(f"The {data_source} dataset doesn't exist yet, or its data isn't available in python (TMDL datasets)")
+
+        if location_var not in frame.columns:
+            raise ValueError(f"{location_var} isn't a column in {data_source}")
+
+        return _check_shape_keys(shape_file_path, frame[location_var], key_property = key_property)
+
+
     def add_relationship(self,
                          from_table,
                          from_column,
@@ -38,6 +38,7 @@ class _DataSet:
         self.col_names = None
         self.col_deets = None
         self.col_attributes = None
+        self.col_profiles = None
 
         # generate a random id for the data set
         if dataset_id is None:
@@ -258,13 +259,74 @@ class _DataSet:
 
         # create a dictionary containing col_deets and col_names
         self.col_attributes = {"col_deets":self.col_deets, "col_names": self.col_names}
+
+        # record cardinality, widths and row counts for the model size estimator
+        self._profile_columns()
+
         return self.col_attributes
 
 
+    def _profile_columns(self):
+
+        '''An internally called function that records a profile of every column in the dataset
+
+        Returns
+        -------
+        col_profiles: list
+            A list of dictionaries, one per column, with the keys column, data_type, row_count, cardinality, null_count, avg_width, min and max.
+
+        Notes
+        -----
+        The profiles are gathered once, while the dataset is being ingested, and are used by `Dashboard.estimate_model_size()`.
+        avg_width is the average length (in characters) of the distinct values of text columns and 8 bytes for numbers and dates, which is how VertiPaq stores them.
+        '''
+        # pylint: disable=no-member
+
+        self.col_profiles = []
+        row_count = len(self.dataset)
+
+        for col in self.dataset:
+            values = self.dataset[col]
+            non_null = values.dropna()
+
+            profile = {"column": col,
+                       "row_count": row_count,
+                       "cardinality": int(non_null.nunique()),
+                       "null_count": int(row_count - len(non_null)),
+                       "avg_width": 8.0,
+                       "min": None,
+                       "max": None}
+
+            if pd.api.types.is_datetime64_any_dtype(values):
+                profile["data_type"] = "dateTime"
+
+            elif pd.api.types.is_numeric_dtype(values):
+                profile["data_type"] = "double"
+
+                if len(non_null) > 0:
+                    profile["min"] = float(non_null.min())
+                    profile["max"] = float(non_null.max())
+
+                    # whole numbers can be value encoded instead of hash encoded
+                    profile["is_whole_number"] = bool((non_null % 1 == 0).all())
+
+            else:
+                profile["data_type"] = "string"
+
+                distinct_values = pd.Series(non_null.unique()).astype(str)
+                if len(distinct_values) > 0:
+                    profile["avg_width"] = float(distinct_values.str.len().mean())
+
+            self.col_profiles.append(profile)
+
+        return self.col_profiles
+
+
     def add_measure(self,
                     name,
                     expression,
-                    format_string = None):
+                    format_string = None,
+                    lint = True):
 
         '''Add a DAX measure to this dataset's TMDL file.
 
@@ -277,6 +339,8 @@ class _DataSet:
         format_string : str, optional
             Power BI format string (e.g. "#,0", "0.00%", "$#,0.00").
             If not provided, no format string is written.
+        lint : bool, optional
+            Check the expression for DAX performance anti-patterns and raise a warning for each one found. Default True.
 
         Returns
         -------
@@ -297,12 +361,16 @@ class _DataSet:
                 file.write(f"\t\tformatString: {format_string}\n")
             file.write(f"\t\tlineageTag: {measure_id}\n\n")
 
+        if lint:
+            self._lint(name, expression, "measure")
+
 
     def add_column(self,
                    name,
                    expression,
                    data_type="string",
-                   format_string=None):
+                   format_string=None,
+                   lint=True):
 
         '''Add a DAX calculated column to this dataset's TMDL file.
 
@@ -316,6 +384,8 @@ class _DataSet:
             The data type: "string", "double", or "dateTime". Default "string".
         format_string : str, optional
             Power BI format string (e.g. "#,0", "0.00%").
+        lint : bool, optional
+            Check the expression for DAX performance anti-patterns (including calculated columns that could be computed in the source) and raise a warning for each one found. Default True.
 
         Examples
         --------
@@ -338,6 +408,26 @@ class _DataSet:
             if data_type == "double":
                 file.write('\t\tannotation PBI_FormatHint = {"isGeneralNumber":true}\n\n')
 
+        if lint:
+            self._lint(name, expression, "calculated column")
+
+
+    def _lint(self, name, expression, kind):
+
+        '''Warn about DAX performance anti-patterns in a measure or calculated column that was just added'''
+
+        from powerbpy.dax_lint import _lint_dax, _warn_findings
+
+        table_names = {os.path.splitext(file_name)[0] for file_name in os.listdir(self.dashboard.tables_folder)}
+
+        # so [Measure] references in calculated columns aren't mistaken for columns
+        with open(self.dataset_file_path, 'r', encoding="utf-8") as file:
+            measure_names = set(re.findall(r"^\tmeasure '((?:[^']|'')+)'", file.read(), flags=re.MULTILINE))
+
+        _warn_findings(_lint_dax(expression, self.dataset_name, name, kind,
+                                 table_names = table_names,
+                                 measure_names = measure_names))
+
 
     # Patterns that indicate a column is a unique identifier / key
     _ID_PATTERNS = re.compile(
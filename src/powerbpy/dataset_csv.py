@@ -1,15 +1,18 @@
 '''This class is used to represent csv datasets that can be added to dashboards.
-    You should never call this class directly, instead use the add_local_csv() or add_blob_csv() methods attached to the Dashboard class.
+    You should never call this class directly, instead use the add_local_csv(), add_blob_csv() or add_csv_folder() methods attached to the Dashboard class.
 '''
 
 
-import getpass
+import glob
+import os
 import re
 import warnings
+from concurrent.futures import ThreadPoolExecutor
 
 import pandas as pd # pylint: disable=import-error
 
 from powerbpy.data_set import _DataSet
+from powerbpy.dataset_staging import _tmdl_name
 
 # Power Query encoding codes — used by both _LocalCsv and _BlobCsv
 _ENCODING_CODES = {
@@ -19,6 +22,66 @@ _ENCODING_CODES = {
     "iso-8859-1": 28591,
 }
 
+# the pandas dtypes _create_tmdl() writes columns for -> how Power Query converts the csv text, the column's type
+# and what a missing value looks like in the csv text (pandas reads all of these as NaN)
+_M_CONVERSIONS = {"int64": ('Number.From(_, "en-US")', "type number", ("NA", "null", "")),
+                  "float64": ('Number.From(_, "en-US")', "type number", ("NA", "null", "")),
+                  "datetime64[ns]": ('Date.From(_, "en-US")', "type date", ("NA", "null", "")),
+                  "object": (None, "type text", ("NA", "null"))}
+
+
+def _csv_options(dataset):
+
+    '''The options record for Csv.Document. QuoteStyle.Csv reads quoted values (with commas or line breaks in them) the way pandas does'''
+
+    return f'[Delimiter=",", Columns={len(dataset.dataset.columns)}, Encoding={dataset.pq_encoding}, QuoteStyle=QuoteStyle.Csv]'
+
+
+def _changed_type(dataset, previous_step, complete = True):
+
+    '''The M expression that turns the promoted csv text into typed columns, in a single pass over the cells
+
+    Missing values are turned into nulls by the same function that converts the column's type, instead of a separate Table.ReplaceValue over every column.
+    The column profiles (recorded while the dataset was ingested) say which columns have missing values, so the others skip the check,
+    and text columns without missing values aren't touched at all (Csv.Document already returns text).
+
+    Parameters
+    ----------
+    previous_step: str
+        The step with the promoted headers.
+    complete: bool
+        Whether python saw every row of the file. When it only saw a sample, any column might have missing values.
+    '''
+
+    transforms = []
+    null_counts = {profile["column"]: profile["null_count"] for profile in dataset.col_profiles}
+
+    for column, dtype in dataset.dataset.dtypes.items():
+        if str(dtype) not in _M_CONVERSIONS:
+            continue
+
+        # unnamed columns are "" in the csv, see _create_tmdl()
+        column_for_m = "" if column == "probably_an_index_column" else column.replace('"', '""')
+
+        convert, m_type, null_text = _M_CONVERSIONS[str(dtype)]
+        maybe_null = not complete or null_counts[column] > 0
+
+        if maybe_null:
+            missing = " or ".join(f'_ = "{text}"' for text in null_text)
+            function = f"each if {missing} then null else {convert or '_'}"
+        elif convert is not None:
+            function = f"each {convert}"
+        else:
+            continue
+
+        transforms.append(f'{{"{column_for_m}", {function}, {m_type}}}')
+
+    if not transforms:
+        return previous_step
+
+    return f'Table.TransformColumns({previous_step}, {{{", ".join(transforms)}}})'
+
+
 class _LocalCsv(_DataSet):
 
     # pylint: disable=too-few-public-methods
@@ -47,25 +110,14 @@ class _LocalCsv(_DataSet):
         self._create_tmdl()
 
         # write out M code
-
-        # for debugging:
-        #print(f"column attributes:\n {col_attributes}\n\n")
-
-        # define tricky bits of code
-        replacement_values =  '", "'.join(self.col_attributes["col_names"])
-        formatted_column_details = ', '.join(map(str, self.col_attributes["col_deets"]))
-
-        # for debugging:
-        #print(f"Replacement values:\n {replacement_values}\n\n")
-        #print(f"formatted_column_details values:\n {formatted_column_details}\n\n")
+        changed_type = _changed_type(self, '#"Promoted Headers"')
 
         with open(self.dataset_file_path, 'a', encoding="utf-8") as file:
             file.write(f'\tpartition {self.dataset_name} = m\n')
             file.write('\t\tmode: import\n\t\tsource =\n\t\t\t\tlet\n')
-            file.write(f'\t\t\t\t\tSource = Csv.Document(File.Contents("{self.data_path_reversed}"),[Delimiter=",", Columns={len(self.dataset.columns)}, Encoding={self.pq_encoding}, QuoteStyle=QuoteStyle.None]),\n')
+            file.write(f'\t\t\t\t\tSource = Csv.Document(File.Contents("{self.data_path_reversed}"),{_csv_options(self)}),\n')
             file.write('\t\t\t\t\t#"Promoted Headers" = Table.PromoteHeaders(Source, [PromoteAllScalars=true]),\n')
-            file.write(f'\t\t\t\t\t#"Replaced Value" = Table.ReplaceValue(#"Promoted Headers","NA",null,Replacer.ReplaceValue,{{"{ replacement_values  }"}}),\n')
-            file.write(f'\t\t\t\t\t#"Changed Type" = Table.TransformColumnTypes(#"Replaced Value",{{  {  formatted_column_details  }   }})\n')
+            file.write(f'\t\t\t\t\t#"Changed Type" = {changed_type}\n')
             file.write('\t\t\t\tin\n\t\t\t\t\t#"Changed Type"\n\n')
             file.write('\tannotation PBI_ResultType = Table\n\n\tannotation PBI_NavigationStepName = Navigation\n\n')
 
@@ -94,6 +146,14 @@ class _BlobCsv(_DataSet):
         A limited time single access url scoped to just the file you want to grant read access to. To generate one from Azure Storage Explorer, right click on the file you want and then choose "Get Shared Access Signature"
     storage_account_key: str
         It is not recommended to use this when running this function on a local computer. Hardcoding credentials into code is SUPER BAD practice. Please set use_saved_storage_key to true instead. It will store the key securely in your operating system's credential manger. You should only pass a storage account key to the function if you are running this code in a cloud environment such as databricks and using that cloud platform's secure secret manager. (Something like Github Secrets or Azure Key Vault)
+    sample_mb: float
+        Only download the first sample_mb megabytes of the file (cut back to the last complete row) to work out the column types, instead of the whole file. Power BI still loads the whole file. Defaults to None, which downloads the whole file.
+    use_cache: bool
+        Reuse the file (or sample) downloaded by an earlier build if the blob's ETag shows it hasn't changed since. The data is kept on disk (readable only by your user account) between builds. Defaults to False.
+    max_memory_mb: float
+        The most of the downloaded file to hold in memory. Bigger downloads are spilled to a temporary file and parsed in chunks, and only their first rows are kept. Defaults to the POWERBPY_BLOB_MEMORY_MB environment variable, or 64.
+    sample: tuple
+        A (DataFrame, sampled) pair that was already downloaded, so nothing is downloaded here. add_blob_csvs() uses this after fetching many files at once.
 
     Returns
     -------
@@ -131,15 +191,32 @@ class _BlobCsv(_DataSet):
                  sas_url = None,
                  storage_account_key = None,
                  show_warnings = True,
-                 encoding = "utf-8"):
+                 encoding = "utf-8",
+                 sample_mb = None,
+                 use_cache = False,
+                 max_memory_mb = None,
+                 sample = None):
 
         # pylint: disable=too-few-public-methods
         # pylint: disable=too-many-locals
 
-        # Lazy imports: azure and keyring are only needed for blob access
-        import keyring # pylint: disable=import-error
-        from azure.storage.filedatalake import DataLakeFileClient # pylint: disable=import-error
-        from azure.identity import InteractiveBrowserCredential # pylint: disable=import-error
+        from powerbpy.blob_storage import _read_csv_sample
+
+        # check the arguments and find the credentials before anything is added to the model
+        if sample is None:
+            request = _blob_request(dashboard,
+                                    data_path=data_path,
+                                    account_url=account_url,
+                                    blob_name=blob_name,
+                                    tenant_id=tenant_id,
+                                    use_saved_storage_key=use_saved_storage_key,
+                                    sas_url=sas_url,
+                                    storage_account_key=storage_account_key,
+                                    show_warnings=show_warnings,
+                                    encoding=encoding,
+                                    sample_mb=sample_mb,
+                                    use_cache=use_cache,
+                                    max_memory_mb=max_memory_mb)
 
         super().__init__(dashboard,data_path)
 
@@ -147,109 +224,360 @@ class _BlobCsv(_DataSet):
         self.pq_encoding = _ENCODING_CODES.get(encoding.lower(), 65001)
 
         # get the account name from the url
-        m = re.search("(?<=https://).*(?=\\.blob)", account_url)
+        account_name = _account_name(account_url)
 
-        account_name = m.group(0)
+        if sample is None:
+            sample = _read_csv_sample(_blob_client(dashboard, request), sample_mb, encoding,
+                                      session=dashboard._storage(), # pylint: disable=protected-access
+                                      use_cache=use_cache,
+                                      max_memory_mb=max_memory_mb)
 
+        # sampled is True when python only has the first rows of the file (from sample_mb, or a file bigger than max_memory_mb)
+        self.dataset, self.sampled = sample
 
-        if show_warnings:
-            if storage_account_key is not None:
-                warnings.warn("DO NOT HARD CODE CREDENTIALS!! Only provide a storage_account_key argument if you're securely retreiving it from something like azure key vault. If this code is running locally set use_saved_storage_key to true instead. Set show_warnings = False to disable this warning. ")
+        # Build the tmdl file based on the method defined on the parent class
+        self._create_tmdl()
 
-        if sas_url is not None and use_saved_storage_key is True:
-            raise ValueError("You can't save an azure storage key to your system's credential manager when providing an sas_url. Try changing use_saved_storage_key to False and try again")
+        # write out M code
+        # python only saw every row when the file wasn't sampled
+        changed_type = _changed_type(self, '#"Promoted Headers"', complete=not self.sampled)
 
+        with open(self.dataset_file_path, 'a', encoding="utf-8") as file:
+            file.write(f'\tpartition {self.dataset_name} = m\n')
+            file.write('\t\tmode: import\n\t\tsource =\n\t\t\t\tlet\n')
+            file.write(f'\t\t\t\t\tSource = AzureStorage.Blobs("{account_url}"),\n')
+            file.write(f'\t\t\t\t\t#"{blob_name}1" = Source{{[Name="{blob_name}"]}}[Data],\n')
+            file.write(f'\t\t\t\t\t#"https://{account_name} blob core windows net/{blob_name}/_{data_path.replace(".csv", "")} csv" = #"{blob_name}1"{{[#"Folder Path"="{account_url}/{blob_name}/",Name="{self.data_path}"]}}[Content],\n')
+            file.write(f'\t\t\t\t\t#"Imported CSV" = Csv.Document(#"https://{account_name} blob core windows net/{blob_name}/_{data_path.replace(".csv", "")} csv",{_csv_options(self)}),\n')
+            file.write('\t\t\t\t\t#"Promoted Headers" = Table.PromoteHeaders(#"Imported CSV", [PromoteAllScalars=true]),\n')
+            # python only saw every row when the file wasn't sampled
+            file.write(f'\t\t\t\t\t#"Changed Type" = {changed_type}\n')
+            file.write('\t\t\t\tin\n\t\t\t\t\t#"Changed Type"\n\n')
+            file.write('\tchangedProperty = Name\n\n\tannotation PBI_ResultType = Table\n\n\tannotation PBI_NavigationStepName = Navigation\n\n')
 
-        if use_saved_storage_key is False:
 
-            if tenant_id is None:
-                raise ValueError("You must provide a tenant_id when using interactive browser authentication. (This function's default method of authentication). Please either provide a tenant id or use a different authentication type. ")
+def _full_frame(datasets, data_source):
 
-            credential = InteractiveBrowserCredential(
-                        tenant_id= tenant_id
-                        )
+    '''The pandas copy of all of a dataset's rows, or None if python only has a sample of them (or none at all)'''
 
-            file_handle = DataLakeFileClient(
-                        account_url=account_url,
-                        credential=credential,
-                        file_system_name=blob_name,
-                        file_path=self.data_path
-                        )
+    return next((dataset.dataset for dataset in datasets
+                 if isinstance(dataset, (_LocalCsv, _BlobCsv)) and dataset.dataset_name == data_source
+                 and not getattr(dataset, "sampled", False)), None)
 
 
-            download = file_handle.download_file()
-            self.dataset = pd.read_csv(download)
+def _account_name(account_url):
 
-        elif sas_url is not None:
+    '''The storage account name from its url'''
 
-            print("You provided an SAS url!")
-            self.dataset = pd.read_csv(sas_url)
+    m = re.search("(?<=https://).*(?=\\.blob)", account_url)
 
+    return m.group(0)
 
-        else:
 
-            # retrieve the storage token
-            account_token = keyring.get_password('azure_account_key', 'token')
+def _blob_request(dashboard,
+                  *,
+                  data_path,
+                  account_url,
+                  blob_name,
+                  tenant_id,
+                  use_saved_storage_key,
+                  sas_url,
+                  storage_account_key,
+                  show_warnings,
+                  encoding,
+                  sample_mb,
+                  use_cache = False,
+                  max_memory_mb = None):
+
+    '''Check the arguments of a blob csv and pick its credential from the dashboard's storage session
+
+    Returns
+    -------
+    dict
+        Everything needed to read the file: account_url, blob_name, data_path, credential (None with an sas_url), sas_url, sample_mb, encoding, use_cache and max_memory_mb.
+    '''
+
+    # pylint: disable=too-many-arguments
+
+    if show_warnings:
+        if storage_account_key is not None:
+            warnings.warn("DO NOT HARD CODE CREDENTIALS!! Only provide a storage_account_key argument if you're securely retreiving it from something like azure key vault. If this code is running locally set use_saved_storage_key to true instead. Set show_warnings = False to disable this warning. ")
+
+    if sas_url is not None and use_saved_storage_key is True:
+        raise ValueError("You can't save an azure storage key to your system's credential manager when providing an sas_url. Try changing use_saved_storage_key to False and try again")
+
+    # credentials and clients are shared by all the blob datasets in the dashboard
+    storage = dashboard._storage() # pylint: disable=protected-access
+
+    credential = None
+
+    if use_saved_storage_key is False and sas_url is None:
+
+        if tenant_id is None:
+            raise ValueError("You must provide a tenant_id when using interactive browser authentication. (This function's default method of authentication). Please either provide a tenant id or use a different authentication type. ")
+
+        credential = storage.browser_credential(tenant_id)
+
+    elif sas_url is not None:
+        print("You provided an SAS url!")
+
+    else:
+        credential = storage.saved_key_credential(_account_name(account_url))
+
+    return {"account_url": account_url,
+            "blob_name": blob_name,
+            "data_path": data_path,
+            "credential": credential,
+            "sas_url": sas_url,
+            "sample_mb": sample_mb,
+            "encoding": encoding,
+            "use_cache": use_cache,
+            "max_memory_mb": max_memory_mb}
+
+
+def _blob_client(dashboard, request):
+
+    '''A client for the file described by a _blob_request()'''
+
+    if request["sas_url"] is not None:
+        # Lazy import: azure is only needed for blob access
+        from azure.storage.blob import BlobClient # pylint: disable=import-error,import-outside-toplevel
+
+        return BlobClient.from_blob_url(request["sas_url"])
+
+    return dashboard._storage().file_client(account_url=request["account_url"], # pylint: disable=protected-access
+                                            blob_name=request["blob_name"],
+                                            file_path=request["data_path"],
+                                            credential=request["credential"])
+
+
+# how add_csv_folder() can split a folder into partitions
+_FOLDER_PARTITIONS = ("folder", "file", "month")
+
+# a date in a file name, like sales_2024-01-31.csv or sales_20240131.csv
+_FILE_DATE = re.compile(r"(?<!\d)(\d{4})([-_]?)(0[1-9]|1[0-2])\2(\d{2})(?!\d)")
+
 
-            # if no storage token was found, prompt the user for it
-            if not account_token:
+def _dtype_kind(dtype):
 
-                add_key = "No key has been added yet..."
+    '''Whether a column holds numbers, dates or text, ignoring the int/float difference that nulls cause'''
 
-                while add_key not in ("y", "n"):
-                    add_key = input("Would you like to add an Azure Storage Container Key to your operating system's default credential manager?(y/n): ")
+    if pd.api.types.is_numeric_dtype(dtype) and not pd.api.types.is_bool_dtype(dtype):
+        return "number"
 
-                    if add_key == "n":
-                        raise ValueError("Loading files from azure requires using either an account_key, a sas_url, or an interactive browser login.\nPlease change use_saved_storage_key to 'True', allow the system to store an azure_account_key, or provide an sas_url")
+    if pd.api.types.is_datetime64_any_dtype(dtype):
+        return "date"
 
-                    if add_key == "y":
-                        user_provided_key =  getpass.getpass(prompt="Please provide an Azure Storage Account Key: ", stream=None)
+    return "text"
 
-                        # strip out white space
-                        user_provided_key = user_provided_key.strip()
 
-                        # test to make sure it's a reasonable key?....
+def _unify_schemas(paths, frames):
 
+    '''The columns (in the order they first appear) and dtypes that fit every file, and where each file differs from them
 
-                        keyring.set_password('azure_account_key', 'token', user_provided_key)
+    Returns
+    -------
+    tuple
+        A {column: dtype} dictionary and a DataFrame with one row per file and column that drifted.
+    '''
+
+    from powerbpy.blob_storage import _common_dtype
+
+    dtypes = {}
+
+    for frame in frames:
+        for column, dtype in frame.dtypes.items():
+            dtypes[column] = _common_dtype(dtypes[column], dtype) if column in dtypes else dtype
+
+    drift = []
+
+    for path, frame in zip(paths, frames):
+        for column, dtype in dtypes.items():
+            if column not in frame.columns:
+                drift.append({"file": os.path.basename(path), "column": column, "issue": "missing",
+                              "file_dtype": None, "table_dtype": str(dtype)})
+
+                # the missing values are filled with NaN, which whole numbers can't hold
+                if pd.api.types.is_integer_dtype(dtype):
+                    dtypes[column] = pd.Series(dtype="float64").dtype
+
+            elif _dtype_kind(frame[column].dtype) != _dtype_kind(dtype):
+                drift.append({"file": os.path.basename(path), "column": column, "issue": "type",
+                              "file_dtype": str(frame[column].dtype), "table_dtype": str(dtype)})
+
+    drift = pd.DataFrame(drift, columns=["file", "column", "issue", "file_dtype", "table_dtype"])
+
+    return dtypes, drift
+
+
+def _m_name_filter(pattern):
+
+    '''The M condition on a Folder.Files [Name] that matches the same files as a glob pattern'''
+
+    if "?" in pattern or "[" in pattern:
+        raise ValueError(f"Power Query can't match {pattern!r}. Patterns for the folder and month partitions can only use * wildcards, e.g. \"sales_*.csv\"")
+
+    parts = pattern.split("*")
 
-                        # Retrieve the stored API token
-                        account_token = keyring.get_password('azure_account_key', 'token')
+    if len(parts) == 1:
+        return f'Text.Lower([Name]) = "{pattern.lower()}"'
 
+    # windows file names don't care about case, and neither does glob there
+    conditions = []
 
+    if parts[0]:
+        conditions.append(f'Text.StartsWith([Name], "{parts[0]}", Comparer.OrdinalIgnoreCase)')
 
-            credential = {
-                                "account_name": account_name,
-                                "account_key": account_token}
+    conditions += [f'Text.Contains([Name], "{part}", Comparer.OrdinalIgnoreCase)' for part in parts[1:-1] if part]
+
+    if parts[-1]:
+        conditions.append(f'Text.EndsWith([Name], "{parts[-1]}", Comparer.OrdinalIgnoreCase)')
+
+    return " and ".join(conditions) or "true"
+
+
+class _CsvFolder(_DataSet):
+
+    '''A folder of csv files with the same columns (like daily drops) loaded as one table
+
+    Parameters
+    ----------
+    folder_path: str
+        The folder with the csv files. Files in its subfolders aren't included.
+    pattern: str
+        Which files to include, e.g. "sales_*.csv".
+    table_name: str
+        The name of the table. Defaults to the name of the folder.
+    partition_by: str
+        "folder" for one partition that combines every matching file (files added later are picked up by the next refresh),
+        "file" for one partition per file, or "month" for one partition per month of the date in the file names.
+    max_workers: int
+        How many files to read at once.
+    '''
+
+    # pylint: disable=too-few-public-methods
+    # pylint: disable=too-many-locals
+    # pylint: disable=too-many-arguments
+    # pylint: disable=too-many-instance-attributes
+
+    def __init__(self,
+                 dashboard,
+                 folder_path,
+                 pattern = "*.csv",
+                 *,
+                 table_name = None,
+                 partition_by = "folder",
+                 encoding = "utf-8",
+                 max_workers = 8):
 
+        folder_path = os.path.abspath(os.path.expanduser(folder_path))
 
-            # read the data using the storage token
-            file_handle = DataLakeFileClient(
-                        account_url=account_url,
-                        credential= credential,
-                        file_system_name=blob_name,
-                        file_path=self.data_path
-                        )
+        if not os.path.isdir(folder_path):
+            raise ValueError(f"{folder_path} isn't a folder")
 
+        if partition_by not in _FOLDER_PARTITIONS:
+            raise ValueError(f"partition_by must be one of: {', '.join(_FOLDER_PARTITIONS)}")
 
-            download = file_handle.download_file()
-            self.dataset = pd.read_csv(download)
+        paths = sorted(path for path in glob.glob(os.path.join(glob.escape(folder_path), pattern)) if os.path.isfile(path))
+
+        if not paths:
+            raise ValueError(f"No files in {folder_path} match {pattern!r}")
+
+        # check everything before anything is added to the model
+        name_filter = _m_name_filter(pattern) if partition_by != "file" else None
+
+        if partition_by == "month":
+            undated = [os.path.basename(path) for path in paths if not _FILE_DATE.search(os.path.basename(path))]
+            if undated:
+                raise ValueError(f"Partitioning by month needs a date like 2024-01-31 or 20240131 in every file name, but these don't have one: {', '.join(undated[:5])}")
+
+        # pandas' parser lets go of the GIL while it reads, so the files are read side by side
+        with ThreadPoolExecutor(max_workers=max_workers) as pool:
+            frames = list(pool.map(lambda path: pd.read_csv(path, encoding=encoding), paths))
+
+        dtypes, self.schema_drift = _unify_schemas(paths, frames)
+
+        if not self.schema_drift.empty:
+            warnings.warn(f"{self.schema_drift['file'].nunique()} of the {len(paths)} files in {folder_path} don't have the same columns or types as the rest. "
+                          "Missing columns are loaded as nulls, and columns with numbers in some files and text in others are loaded as text. "
+                          "See the schema_drift attribute of the returned dataset for the details.")
+
+        table_name = table_name or os.path.basename(folder_path)
+
+        # a fake path so _DataSet names the table table_name, the same way _WebCsv does
+        super().__init__(dashboard, os.path.join(folder_path, f"{table_name}.csv"))
+
+        self.folder_path = folder_path
+        self.pattern = pattern
+        self.partition_by = partition_by
+        self.files = paths
+
+        # Resolve encoding to Power Query code
+        self.pq_encoding = _ENCODING_CODES.get(encoding.lower(), 65001)
+
+        self.dataset = pd.concat(frames, ignore_index=True).reindex(columns=list(dtypes)).astype(dtypes)
 
         # Build the tmdl file based on the method defined on the parent class
         self._create_tmdl()
 
-        # write out M code
-        # define tricky bits
-        formatted_column_details = ', '.join(map(str, self.col_attributes["col_deets"]))
+        self._write_partitions(name_filter)
+
+    def _write_partitions(self, name_filter):
+
+        # the files don't all have the same columns, so Csv.Document isn't told how many there are
+        options = f'[Delimiter=",", Encoding={self.pq_encoding}, QuoteStyle=QuoteStyle.Csv]'
+
+        # M uses "" for the column _create_tmdl() calls probably_an_index_column
+        column_list = ", ".join('"' + ("" if column == "probably_an_index_column" else column).replace('"', '""') + '"'
+                                for column in self.dataset.columns)
+        aligned = f'Table.SelectColumns(#"Promoted Headers", {{{column_list}}}, MissingField.UseNull)'
+
+        # Reverse slash directions bc windows
+        folder_reversed = self.folder_path.replace('/', '\\')
+
+        if self.partition_by == "file":
+            # python saw every row of every file
+            changed_type = _changed_type(self, '#"Aligned Columns"')
+
+            partitions = []
+            for path in self.files:
+                path_reversed = path.replace('/', '\\')
+                partitions.append((os.path.splitext(os.path.basename(path))[0],
+                                   [("Source", f'Csv.Document(File.Contents("{path_reversed}"),{options})'),
+                                    ('#"Promoted Headers"', "Table.PromoteHeaders(Source, [PromoteAllScalars=true])")]))
+
+        else:
+            # files added after this runs will be picked up too, so any of their columns might have missing values
+            changed_type = _changed_type(self, '#"Aligned Columns"', complete=False)
+
+            groups = {self.dataset_name: None}
+
+            if self.partition_by == "month":
+                groups = {}
+                for path in self.files:
+                    year, separator, month, _ = _FILE_DATE.search(os.path.basename(path)).groups()
+                    groups[f"{self.dataset_name}_{year}-{month}"] = f"{year}{separator}{month}"
+
+            partitions = []
+            for name, month in groups.items():
+                # Folder.Files also lists the files in subfolders, and their [Folder Path] ends with a slash
+                condition = f'[Folder Path] = "{folder_reversed}\\" and {name_filter}'
+                if month is not None:
+                    condition += f' and Text.Contains([Name], "{month}")'
+
+                partitions.append((name,
+                                   [("Source", f'Folder.Files("{folder_reversed}")'),
+                                    ('#"Filtered Files"', f"Table.SelectRows(Source, each {condition})"),
+                                    ('#"Parsed Files"', f'Table.AddColumn(#"Filtered Files", "Data", each Table.PromoteHeaders(Csv.Document([Content],{options}), [PromoteAllScalars=true]))'),
+                                    ('#"Promoted Headers"', 'Table.Combine(#"Parsed Files"[Data])')]))
 
         with open(self.dataset_file_path, 'a', encoding="utf-8") as file:
-            file.write(f'\tpartition {self.dataset_name} = m\n')
-            file.write('\t\tmode: import\n\t\tsource =\n\t\t\t\tlet\n')
-            file.write(f'\t\t\t\t\tSource = AzureStorage.Blobs("{account_url}"),\n')
-            file.write(f'\t\t\t\t\t#"{blob_name}1" = Source{{[Name="{blob_name}"]}}[Data],\n')
-            file.write(f'\t\t\t\t\t#"https://{account_name} blob core windows net/{blob_name}/_{data_path.replace(".csv", "")} csv" = #"{blob_name}1"{{[#"Folder Path"="{account_url}/{blob_name}/",Name="{self.data_path}"]}}[Content],\n')
-            file.write(f'\t\t\t\t\t#"Imported CSV" = Csv.Document(#"https://{account_name} blob core windows net/{blob_name}/_{data_path.replace(".csv", "")} csv",[Delimiter=",", Columns={len(self.dataset.columns)}, Encoding={self.pq_encoding}, QuoteStyle=QuoteStyle.None]),\n')
-            file.write('\t\t\t\t\t#"Promoted Headers" = Table.PromoteHeaders(#"Imported CSV", [PromoteAllScalars=true]),\n')
-            file.write(f'\t\t\t\t\t#"Changed Type" = Table.TransformColumnTypes(#"Promoted Headers", {{{ formatted_column_details }}})\n')
-            file.write('\t\t\t\tin\n\t\t\t\t\t#"Changed Type"\n\n')
-            file.write('\tchangedProperty = Name\n\n\tannotation PBI_ResultType = Table\n\n\tannotation PBI_NavigationStepName = Navigation\n\n')
+            for name, steps in partitions:
+                steps = steps + [('#"Aligned Columns"', aligned), ('#"Changed Type"', changed_type)]
+
+                file.write(f'\tpartition {_tmdl_name(name)} = m\n')
+                file.write('\t\tmode: import\n\t\tsource =\n\t\t\t\tlet\n')
+                file.write(",\n".join(f"\t\t\t\t\t{step} = {expression}" for step, expression in steps) + "\n")
+                file.write('\t\t\t\tin\n\t\t\t\t\t#"Changed Type"\n\n')
+
+            file.write('\tannotation PBI_ResultType = Table\n\n\tannotation PBI_NavigationStepName = Navigation\n\n')
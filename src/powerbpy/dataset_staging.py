@@ -0,0 +1,218 @@
+'''Build dimension tables from the tables already in the model.
+    By default a dimension is a DAX calculated table over the loaded fact table, so the source file or API is only imported once, for the fact table.
+    Dimensions that have to be Power Query tables share the fact table's source query instead: its M code moves into a shared expression in expressions.tmdl
+    and both tables reference it. That shares the query's definition, but Power Query still evaluates the expression (and reads the source) for each table.
+    You should never call these directly, instead use the add_dimension_table() method attached to the Dashboard class.
+'''
+
+import ast
+import os
+import re
+import uuid
+
+from powerbpy.data_set import _DataSet
+
+
+def _expressions_path(dashboard):
+
+    return os.path.join(os.path.dirname(dashboard.model_path), "expressions.tmdl")
+
+
+def _m_name(name):
+
+    '''An M identifier for a query name, like #"sales source"'''
+
+    return '#"' + name.replace('"', '""') + '"'
+
+
+def _tmdl_name(name):
+
+    '''A TMDL object name, quoted when it has anything but letters, numbers and underscores'''
+
+    if re.fullmatch(r"\w+", name):
+        return name
+
+    return "'" + name.replace("'", "''") + "'"
+
+
+def _source_lines(lines):
+
+    '''The (start, end) indexes of the M code after a partition's "source =" line'''
+
+    start = next(i for i, line in enumerate(lines) if line.strip() == "source =") + 1
+    end = start
+
+    # the expression is indented deeper than the partition's properties
+    while end < len(lines) and (lines[end].startswith("\t\t\t") or not lines[end].strip()):
+        end += 1
+
+    # leave the blank lines after the expression where they are
+    while not lines[end - 1].strip():
+        end -= 1
+
+    return start, end
+
+
+def _stage_source(dataset):
+
+    '''Move a table's M code into a shared expression, if it isn't there already
+
+    Returns
+    -------
+    str
+        The name of the shared expression, e.g. colony_source.
+    '''
+
+    name = f"{dataset.dataset_name}_source"
+
+    if getattr(dataset, "staged_source", None) == name:
+        return name
+
+    with open(dataset.dataset_file_path, "r", encoding="utf-8") as file:
+        lines = file.read().split("\n")
+
+    # only the first partition would be moved, and the shared expression would miss the rows of the others
+    partitions = sum(1 for line in lines if line.startswith("\tpartition "))
+    if partitions > 1:
+        raise ValueError(f"{dataset.dataset_name} has {partitions} partitions, so no single query returns all of its rows to share. "
+                         "For a table added with add_csv_folder(), use partition_by=\"folder\" instead.")
+
+    try:
+        start, end = _source_lines(lines)
+    except StopIteration as exc:
+        raise ValueError(f"{dataset.dataset_name} doesn't have an M partition to share") from exc
+
+    # expressions sit two tabs further left than table partitions
+    expression = [line[2:] if line.startswith("\t\t") else line for line in lines[start:end]]
+
+    with open(_expressions_path(dataset.dashboard), "a", encoding="utf-8") as file:
+        file.write(f"expression {_tmdl_name(name)} =\n")
+        file.write("\n".join(expression) + "\n")
+        file.write(f"\tlineageTag: {uuid.uuid4()}\n\n")
+        file.write("\tannotation PBI_ResultType = Table\n\n")
+
+    lines[start:end] = ["\t\t\t\tlet",
+                        f"\t\t\t\t\tSource = {_m_name(name)}",
+                        "\t\t\t\tin",
+                        "\t\t\t\t\tSource"]
+
+    with open(dataset.dataset_file_path, "w", encoding="utf-8") as file:
+        file.write("\n".join(lines))
+
+    dataset.staged_source = name
+
+    return name
+
+
+def _dax_table(name):
+
+    return "'" + name.replace("'", "''") + "'"
+
+
+def _dax_column(name):
+
+    return "[" + name.replace("]", "]]") + "]"
+
+
+def _dax_text(value):
+
+    return '"' + value.replace('"', '""') + '"'
+
+
+def _remove_from_query_order(dashboard, name):
+
+    '''Take a table out of model.tmdl's PBI_QueryOrder, which only lists Power Query queries'''
+
+    with open(dashboard.model_path, "r", encoding="utf-8") as file:
+        text = file.read()
+
+    def remove(match):
+        return f"annotation PBI_QueryOrder = {[query for query in ast.literal_eval(match.group(1)) if query != name]}"
+
+    with open(dashboard.model_path, "w", encoding="utf-8") as file:
+        file.write(re.sub(r"annotation PBI_QueryOrder = (.*)", remove, text))
+
+
+class _DimensionTable(_DataSet):
+
+    '''A table of the distinct values of some columns of another table, e.g. a dimension built from a fact table's csv
+
+    Parameters
+    ----------
+    table_name: str
+        The name of the new table.
+    source: _DataSet
+        The table to take the columns from.
+    columns: list
+        The columns to keep. The new table has one row per distinct combination of them.
+    from_source_query: bool
+        False (the default) makes a DAX calculated table over the loaded source table, so the source isn't read again at refresh.
+        True makes a Power Query table instead. The source's M code is moved into a shared expression first, if it isn't already.
+    '''
+
+    # pylint: disable=too-few-public-methods
+
+    def __init__(self, dashboard, table_name, source, columns, from_source_query = False):
+
+        # pylint: disable=too-many-arguments
+
+        if getattr(source, "dataset", None) is None:
+            raise ValueError(f"{source.dataset_name} wasn't loaded into python, so its columns aren't known. "
+                             "Dimension tables can be built from csv and web tables added with this Dashboard.")
+
+        missing = [column for column in columns if column not in source.dataset.columns]
+        if missing:
+            raise ValueError(f"{source.dataset_name} doesn't have the columns {', '.join(missing)}. "
+                             f"Available columns include: {', '.join(source.dataset.columns)}")
+
+        staged_source = _stage_source(source) if from_source_query else None
+
+        # a fake path so _DataSet names the table table_name, the same way _WebCsv does
+        super().__init__(dashboard, os.path.join(os.path.dirname(source.dataset_file_path), f"{table_name}.csv"))
+
+        self.source = source
+        self.dimension_columns = list(columns)
+        self.from_source_query = from_source_query
+        self.dataset = source.dataset[self.dimension_columns].drop_duplicates().reset_index(drop = True)
+
+        self._create_tmdl()
+
+        if from_source_query:
+            self._write_query_partition(staged_source)
+        else:
+            self._write_calculated_partition()
+
+    def _write_calculated_partition(self):
+
+        with open(self.dataset_file_path, "r", encoding="utf-8") as file:
+            text = file.read()
+
+        # the columns of a calculated table come from the DAX expression's columns, not a query's
+        text = re.sub(r"^(\t\tsourceColumn: )(.*)$", lambda match: match.group(1) + _dax_column(match.group(2)), text, flags=re.MULTILINE)
+
+        table = _dax_table(self.source.dataset_name)
+        selected = ", ".join(f"{_dax_text(column)}, {table}{_dax_column(column)}" for column in self.dimension_columns)
+
+        with open(self.dataset_file_path, "w", encoding="utf-8") as file:
+            file.write(text)
+            file.write(f'\tpartition {_tmdl_name(self.dataset_name)} = calculated\n')
+            file.write('\t\tmode: import\n')
+            file.write(f'\t\tsource = DISTINCT ( SELECTCOLUMNS ( {table}, {selected} ) )\n\n')
+
+        # there's no Power Query query behind a calculated table
+        _remove_from_query_order(self.dashboard, self.dataset_name)
+
+    def _write_query_partition(self, staged_source):
+
+        # M uses "" for the column _create_tmdl() calls probably_an_index_column
+        column_list = ", ".join('"' + ("" if column == "probably_an_index_column" else column).replace('"', '""') + '"'
+                                for column in self.dimension_columns)
+
+        with open(self.dataset_file_path, 'a', encoding="utf-8") as file:
+            file.write(f'\tpartition {self.dataset_name} = m\n')
+            file.write('\t\tmode: import\n\t\tsource =\n\t\t\t\tlet\n')
+            file.write(f'\t\t\t\t\tSource = {_m_name(staged_source)},\n')
+            file.write(f'\t\t\t\t\t#"Selected Columns" = Table.SelectColumns(Source, {{{column_list}}}),\n')
+            file.write('\t\t\t\t\t#"Removed Duplicates" = Table.Distinct(#"Selected Columns")\n')
+            file.write('\t\t\t\tin\n\t\t\t\t\t#"Removed Duplicates"\n\n')
+            file.write('\tannotation PBI_ResultType = Table\n\n\tannotation PBI_NavigationStepName = Navigation\n\n')
@@ -4,7 +4,8 @@ Two classes:
 - _WebCsv: for APIs returning CSV (e.g. SurveyCTO /datasets/data/csv/)
   Uses Csv.Document(Web.Contents(url)) — same pattern PBI Desktop generates.
 - _WebJson: for APIs returning JSON arrays (e.g. SurveyCTO /forms/data/wide/json/)
-  Uses Json.Document(Web.Contents(url)) with record expansion.
+  Uses Json.Document(Web.Contents(url)) with record expansion. The columns
+  come from a sample CSV, or from a sample of the JSON itself (see json_schema.py).
 
 Authentication is handled by Power BI's credential manager — on first
 refresh, PBI Desktop prompts for credentials (Basic, OAuth2, API Key, etc.).
@@ -14,11 +15,12 @@ or Dashboard.add_web_json().
 '''
 
 import os
+import warnings
 
 import pandas as pd  # pylint: disable=import-error
 
 from powerbpy.data_set import _DataSet
-from powerbpy.dataset_csv import _ENCODING_CODES
+from powerbpy.dataset_csv import _ENCODING_CODES, _changed_type, _csv_options
 
 
 class _WebCsv(_DataSet):
@@ -37,7 +39,8 @@ class _WebCsv(_DataSet):
                  table_name,
                  url,
                  sample_csv_path,
-                 encoding="utf-8"):
+                 encoding="utf-8",
+                 pagination=None):
         '''Create a dataset connected to a CSV API endpoint.
 
         Parameters
@@ -54,8 +57,18 @@ class _WebCsv(_DataSet):
         encoding : str
             Encoding for reading the sample CSV and for the PQ encoding
             parameter. Default "utf-8".
+        pagination : dict, optional
+            Request the endpoint one page at a time. See web_pagination.py
+            for the offset and date_window settings.
         '''
 
+        if pagination is not None:
+            # Lazy import: only needed for paged APIs
+            from powerbpy.web_pagination import _check_pagination  # pylint: disable=import-outside-toplevel
+
+            # check the settings before anything is added to the model
+            _check_pagination(pagination, "csv")
+
         # Build a fake path so _DataSet derives dataset_name = table_name
         fake_path = os.path.join(
             os.path.dirname(os.path.abspath(sample_csv_path)),
@@ -64,6 +77,7 @@ class _WebCsv(_DataSet):
         super().__init__(dashboard, fake_path)
 
         self.url = url
+        self.pagination = pagination
         self.pq_encoding = _ENCODING_CODES.get(encoding.lower(), 65001)
 
         # Load sample CSV for column detection
@@ -73,18 +87,24 @@ class _WebCsv(_DataSet):
         self._create_tmdl()
 
         # Write M code — same as _LocalCsv but Web.Contents instead of File.Contents
-        replacement_values = '", "'.join(self.col_attributes["col_names"])
-        formatted_column_details = ', '.join(map(str, self.col_attributes["col_deets"]))
+        csv_options = _csv_options(self)
+
+        # the sample doesn't show which columns have missing values, so every column is checked
+        changed_type = _changed_type(self, '#"Promoted Headers"', complete=False)
 
         with open(self.dataset_file_path, 'a', encoding="utf-8") as file:
             file.write(f'\tpartition {self.dataset_name} = m\n')
             file.write('\t\tmode: import\n\t\tsource =\n\t\t\t\tlet\n')
-            file.write(f'\t\t\t\t\tSource = Csv.Document(Web.Contents("{self.url}"),'
-                        f'[Delimiter=",", Columns={len(self.dataset.columns)}, '
-                        f'Encoding={self.pq_encoding}, QuoteStyle=QuoteStyle.Csv]),\n')
-            file.write('\t\t\t\t\t#"Promoted Headers" = Table.PromoteHeaders(Source, [PromoteAllScalars=true]),\n')
-            file.write(f'\t\t\t\t\t#"Replaced Value" = Table.ReplaceValue(#"Promoted Headers","NA",null,Replacer.ReplaceValue,{{"{ replacement_values  }"}}),\n')
-            file.write(f'\t\t\t\t\t#"Changed Type" = Table.TransformColumnTypes(#"Replaced Value",{{  {  formatted_column_details  }   }})\n')
+            if self.pagination is None:
+                file.write(f'\t\t\t\t\tSource = Csv.Document(Web.Contents("{self.url}"),{csv_options}),\n')
+                file.write('\t\t\t\t\t#"Promoted Headers" = Table.PromoteHeaders(Source, [PromoteAllScalars=true]),\n')
+            else:
+                from powerbpy.web_pagination import _paged_steps  # pylint: disable=import-outside-toplevel
+
+                # every page has its own header row, so headers are promoted before the pages are combined
+                for name, expression in _paged_steps(self.url, self.pagination, "csv", csv_options, '#"Promoted Headers"'):
+                    file.write(f'\t\t\t\t\t{name} = {expression},\n')
+            file.write(f'\t\t\t\t\t#"Changed Type" = {changed_type}\n')
             file.write('\t\t\t\tin\n\t\t\t\t\t#"Changed Type"\n\n')
             file.write('\tannotation PBI_ResultType = Table\n\n\tannotation PBI_NavigationStepName = Navigation\n\n')
 
@@ -103,9 +123,11 @@ class _WebJson(_DataSet):
                  dashboard,
                  table_name,
                  url,
-                 sample_csv_path,
+                 sample_csv_path=None,
                  type_transforms=None,
-                 encoding="utf-8"):
+                 encoding="utf-8",
+                 sample_json_path=None,
+                 pagination=None):
         '''Create a dataset connected to a JSON API endpoint.
 
         Parameters
@@ -122,23 +144,56 @@ class _WebJson(_DataSet):
         type_transforms : list of dict, optional
             Custom M code type transforms applied after JSON expansion.
             Each dict: {"step_name": str, "columns": [{"name": str, "type": str}]}
-            If not provided, transforms are auto-generated from the sample CSV types.
+            If not provided, transforms are auto-generated from the sample types.
         encoding : str
-            Encoding for reading the sample CSV. Default "utf-8".
+            Encoding for reading the sample file. Default "utf-8".
+        sample_json_path : str
+            Path to a sample of the API's JSON response, used instead of
+            sample_csv_path. Every record is read (one at a time) to find
+            all the fields and their types, including nested records and lists.
+        pagination : dict, optional
+            Request the endpoint one page at a time. See web_pagination.py
+            for the offset, next_link, cursor and date_window settings.
         '''
 
+        if (sample_csv_path is None) == (sample_json_path is None):
+            raise ValueError("Please provide either a sample_csv or a sample_json to work out the columns from, but not both")
+
+        if pagination is not None:
+            # Lazy import: only needed for paged APIs
+            from powerbpy.web_pagination import _check_pagination  # pylint: disable=import-outside-toplevel
+
+            # check the settings before anything is added to the model
+            _check_pagination(pagination, "json")
+
+        sample_path = sample_csv_path or sample_json_path
+
         # Build a fake path so _DataSet derives dataset_name = table_name
         fake_path = os.path.join(
-            os.path.dirname(os.path.abspath(sample_csv_path)),
+            os.path.dirname(os.path.abspath(sample_path)),
             f"{table_name}.csv"
         )
         super().__init__(dashboard, fake_path)
 
         self.url = url
+        self.pagination = pagination
         self.user_type_transforms = type_transforms
+        self.schema = None
 
-        # Load sample CSV for column detection
-        self.dataset = pd.read_csv(sample_csv_path, encoding=encoding)
+        if sample_json_path is not None:
+            # Lazy import: only needed for JSON samples
+            from powerbpy.json_schema import _JsonSchema  # pylint: disable=import-outside-toplevel
+
+            self.schema = _JsonSchema.from_file(sample_json_path, encoding=encoding)
+
+            if sum(field.shape() == "record_list" for _, field in self._nested_fields()) > 1:
+                warnings.warn(f"{table_name} has more than one list of records. Each one is expanded to new rows, "
+                              "so the rows of the table multiply. Consider loading each list as its own table instead.")
+
+            self.dataset = self.schema.frame()
+        else:
+            # Load sample CSV for column detection
+            self.dataset = pd.read_csv(sample_csv_path, encoding=encoding)
 
         # Build TMDL column definitions (reuses parent's method)
         self._create_tmdl()
@@ -174,22 +229,46 @@ class _WebJson(_DataSet):
         return transforms
 
 
+    def _nested_fields(self):
+        '''Every field of the JSON sample, nested ones included, as (name, field) pairs.'''
+        pending = list(self.schema.fields.items())
+        while pending:
+            name, field = pending.pop(0)
+            yield name, field
+            pending += list(field.fields.items()) + list(field.item_fields.items())
+
+
     def _write_api_partition(self):
         '''Write the M code partition that fetches from the JSON API.'''
 
-        transforms = self.user_type_transforms or self._auto_type_transforms()
+        if self.schema is not None:
+            transforms = self.user_type_transforms or self.schema.type_transforms()
+        else:
+            transforms = self.user_type_transforms or self._auto_type_transforms()
 
         # Build M code steps
         steps = []
-        steps.append(f'\t\t\t\t\turl = "{self.url}"')
-        steps.append('\t\t\t\t\tSource = Json.Document(Web.Contents(url))')
+        if self.pagination is None:
+            steps.append(f'\t\t\t\t\turl = "{self.url}"')
+            steps.append('\t\t\t\t\tSource = Json.Document(Web.Contents(url))')
+        else:
+            from powerbpy.web_pagination import _paged_steps  # pylint: disable=import-outside-toplevel
+
+            # Source is the items of every page, in order
+            steps += [f'\t\t\t\t\t{name} = {expression}' for name, expression in _paged_steps(self.url, self.pagination, "json")]
         steps.append('\t\t\t\t\tToTable = Table.FromList(Source, Splitter.SplitByNothing(), null, null, ExtraValues.Error)')
-        steps.append('\t\t\t\t\tFirstRow = ToTable{0}[Column1]')
-        steps.append('\t\t\t\t\tColumnNames = Record.FieldNames(FirstRow)')
-        steps.append('\t\t\t\t\tExpanded = Table.ExpandRecordColumn(ToTable, "Column1", ColumnNames)')
+
+        if self.schema is not None:
+            # expand every field found in the sample, not just the first record's
+            expansion, prev_step = self.schema.expansion_steps("ToTable")
+            steps += [f'\t\t\t\t\t{name} = {expression}' for name, expression in expansion]
+        else:
+            steps.append('\t\t\t\t\tFirstRow = ToTable{0}[Column1]')
+            steps.append('\t\t\t\t\tColumnNames = Record.FieldNames(FirstRow)')
+            steps.append('\t\t\t\t\tExpanded = Table.ExpandRecordColumn(ToTable, "Column1", ColumnNames)')
+            prev_step = "Expanded"
 
         # Type transform steps
-        prev_step = "Expanded"
         for t in transforms:
             step_name = t["step_name"]
             col_specs = ", ".join(
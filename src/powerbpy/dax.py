@@ -0,0 +1,450 @@
+'''A small DAX tokenizer and the dependency graph of the measures, columns and tables in a semantic model.
+    You should never call these directly, instead use the dax_dependencies() method attached to the Dashboard class.
+'''
+
+import functools
+import re
+from collections import namedtuple, deque
+
+import pandas as pd # pylint: disable=import-error
+
+from powerbpy.tmdl_model import _TmdlModel
+
+_TOKEN = re.compile(r'''
+      (?P<comment>//[^\n]*|--[^\n]*|/\*.*?\*/)
+    | (?P<string>"(?:[^"]|"")*")
+    | (?P<quoted>'(?:[^']|'')*')
+    | (?P<bracket>\[(?:[^\]]|\]\])*\])
+    | (?P<number>(?:\d+\.?\d*|\.\d+)(?:[eE][+-]?\d+)?)
+    | (?P<name>[A-Za-z_][A-Za-z0-9_.]*)
+    | (?P<operator><>|<=|>=|&&|\|\||==|[-+*/^&=<>!])
+    | (?P<punct>[(),{}])
+    | (?P<space>\s+)
+    | (?P<unknown>.)
+''', re.VERBOSE | re.DOTALL)
+
+# DAX keywords that look like names but are never tables
+_KEYWORDS = {"VAR", "RETURN", "IN", "NOT", "AND", "OR", "TRUE", "FALSE", "DEFINE", "EVALUATE",
+             "ORDER", "BY", "ASC", "DESC", "MEASURE", "COLUMN", "TABLE", "START", "AT", "BLANK"}
+
+_Token = namedtuple("_Token", ["kind", "value", "position"])
+_Token.__doc__ = '''A DAX token. kind is one of function, table, column_ref, identifier, string, number, operator, punct or unknown.
+For column_ref tokens value is a (table, name) tuple, where table is None for unqualified [references].'''
+
+
+def _unquote_table(value):
+    return value[1:-1].replace("''", "'")
+
+
+def _unbracket(value):
+    return value[1:-1].replace("]]", "]")
+
+
+@functools.lru_cache(maxsize=16384)
+def _tokenize(expression):
+
+    '''Split a DAX expression into tokens
+
+    Parameters
+    ----------
+    expression: str
+        A DAX expression.
+
+    Returns
+    -------
+    tuple
+        A tuple of `_Token`s. Whitespace and comments are dropped, table qualifiers are merged with the [column] they qualify and names followed by "(" are marked as functions.
+
+    Notes
+    -----
+    Results are cached, so re-tokenizing the same expressions (for example when the dependency graph is rebuilt after adding one measure) is free.
+    '''
+
+    raw = [(match.lastgroup, match.group(), match.start())
+           for match in _TOKEN.finditer(expression or "")
+           if match.lastgroup not in ("space", "comment")]
+
+    tokens = []
+    i = 0
+
+    while i < len(raw):
+        kind, value, position = raw[i]
+        following = raw[i + 1] if i + 1 < len(raw) else (None, None, None)
+
+        if kind in ("quoted", "name") and following[0] == "bracket":
+            table = _unquote_table(value) if kind == "quoted" else value
+            tokens.append(_Token("column_ref", (table, _unbracket(following[1])), position))
+            i += 2
+            continue
+
+        if kind == "bracket":
+            tokens.append(_Token("column_ref", (None, _unbracket(value)), position))
+
+        elif kind == "name" and following[1] == "(":
+            tokens.append(_Token("function", value.upper(), position))
+
+        elif kind == "quoted":
+            tokens.append(_Token("table", _unquote_table(value), position))
+
+        elif kind == "name":
+            tokens.append(_Token("identifier", value, position))
+
+        else:
+            tokens.append(_Token(kind, value, position))
+
+        i += 1
+
+    return tuple(tokens)
+
+
+def _references(expression, home_table, measure_tables, table_names):
+
+    '''Find everything a DAX expression refers to
+
+    Parameters
+    ----------
+    expression: str
+        The DAX expression.
+    home_table: str
+        The table the object lives in. Unqualified [column] references point here.
+    measure_tables: dict
+        measure name -> table. Measure names are unique across a model, so [Measure] can be resolved without a table.
+    table_names: set
+        The tables in the model, used to tell bare table names apart from variables.
+
+    Returns
+    -------
+    set
+        (table, name) tuples. name is None for references to a whole table.
+    '''
+
+    tokens = _tokenize(expression)
+
+    # variables shadow table names and can be used like tables:  VAR t = ... RETURN SUMX(t, t[x])
+    variables = {tokens[i + 1].value for i, token in enumerate(tokens[:-1])
+                 if token.kind == "identifier" and token.value.upper() == "VAR" and tokens[i + 1].kind == "identifier"}
+
+    refs = set()
+
+    for token in tokens:
+        if token.kind == "column_ref":
+            table, name = token.value
+
+            if table is None:
+                table = measure_tables.get(name, home_table)
+
+            elif table in variables:
+                continue
+
+            refs.add((table, name))
+
+        elif token.kind == "table":
+            refs.add((token.value, None))
+
+        elif (token.kind == "identifier" and token.value in table_names
+              and token.value not in variables and token.value.upper() not in _KEYWORDS):
+            refs.add((token.value, None))
+
+    return refs
+
+
+class _DaxDependencyGraph:
+
+    '''The dependencies between the measures, columns and tables of a semantic model
+
+    Nodes are (table, name) tuples, with name set to None for a table itself. An edge A -> B means A depends on B: dropping or breaking B breaks A.
+    Every column and measure depends on its table, calculated columns and measures depend on whatever their DAX refers to, calculated tables on their DAX, and columns on their sort by column.
+
+    Parameters
+    ----------
+    model: _TmdlModel
+        Optional. The model to build the graph from. Use `add()` to add objects one at a time.
+    '''
+
+    def __init__(self, model = None):
+
+        self.kinds = {}
+        self.expressions = {}
+        self.depends_on = {}
+        self.dependents = {}
+
+        if model is not None:
+            self._add_model(model)
+
+    # building the graph ---------------------------------------------------------------------
+    def _add_model(self, model):
+
+        for table in model.tables.values():
+            calculated = [partition for partition in table.partitions if partition["kind"] == "calculated"]
+            self._add_node((table.name, None), "table", calculated[0]["expression"] if calculated else None)
+
+            for column in table.columns.values():
+                kind = "calculated column" if column["expression"] is not None else "column"
+                self._add_node((table.name, column["name"]), kind, column["expression"], column.get("sort_by_column"))
+
+            for measure in table.measures.values():
+                self._add_node((table.name, measure["name"]), "measure", measure["expression"])
+
+        self._resolve()
+
+    def _add_node(self, node, kind, expression = None, sort_by_column = None):
+        self.kinds[node] = kind
+        self.expressions[node] = (expression, sort_by_column)
+
+    def _resolve(self, nodes = None):
+        '''(Re)compute the outgoing edges of some nodes (all of them by default)'''
+
+        measure_tables = {name: table for (table, name), kind in self.kinds.items() if kind == "measure"}
+        table_names = {table for (table, name) in self.kinds if name is None}
+
+        for node in (self.kinds if nodes is None else nodes):
+            table, name = node
+            expression, sort_by_column = self.expressions[node]
+
+            edges = _references(expression, table, measure_tables, table_names) if expression else set()
+
+            if name is not None:
+                edges.add((table, None))
+
+            if sort_by_column:
+                edges.add((table, sort_by_column))
+
+            self._set_edges(node, edges)
+
+    def _set_edges(self, node, edges):
+        for old in self.depends_on.get(node, set()) - edges:
+            self.dependents.get(old, set()).discard(node)
+
+        self.depends_on[node] = edges
+
+        for new in edges:
+            self.dependents.setdefault(new, set()).add(node)
+
+    def add(self, table, name, kind, expression = None):
+
+        '''Add or replace a single measure, column or table without rebuilding the graph
+
+        Parameters
+        ----------
+        table: str
+            The table the object belongs to.
+        name: str
+            The name of the measure or column, or None for a table.
+        kind: str
+            One of "measure", "column", "calculated column" or "table".
+        expression: str
+            The DAX expression for measures, calculated columns and calculated tables.
+        '''
+
+        node = (table, name)
+        is_new_name = node not in self.kinds
+
+        self._add_node(node, kind, expression)
+
+        # a new measure or table can change how other expressions resolve, anything else only affects itself
+        if is_new_name and kind in ("measure", "table"):
+            self._resolve()
+        else:
+            self._resolve([node])
+
+    def remove(self, table, name = None):
+        '''Remove a node (references to it become unresolved)'''
+
+        node = (table, name)
+        self.kinds.pop(node, None)
+        self.expressions.pop(node, None)
+        self._set_edges(node, set())
+        self.depends_on.pop(node, None)
+
+    # queries --------------------------------------------------------------------------------
+    def _walk(self, node, edges):
+        '''Breadth first walk, returning node -> distance'''
+
+        distances = {}
+        queue = deque([(node, 0)])
+
+        while queue:
+            current, distance = queue.popleft()
+
+            for neighbour in edges.get(current, ()):
+                if neighbour not in distances and neighbour != node:
+                    distances[neighbour] = distance + 1
+                    queue.append((neighbour, distance + 1))
+
+        return distances
+
+    def dependencies(self, table, name = None, transitive = False):
+
+        '''The objects a measure, column or table depends on
+
+        Returns
+        -------
+        list
+            (table, name) tuples, sorted. name is None for whole tables.
+        '''
+
+        node = (table, name)
+
+        if transitive:
+            return sorted(self._walk(node, self.depends_on), key=_sort_key)
+
+        return sorted(self.depends_on.get(node, set()), key=_sort_key)
+
+    def impact(self, table, name = None):
+
+        '''What breaks if a column, measure or table is dropped or changed
+
+        Returns
+        -------
+        DataFrame
+            Every object that depends on it, directly (distance 1) or through other objects.
+        '''
+
+        distances = self._walk((table, name), self.dependents)
+
+        rows = [{"table": node_table, "name": node_name, "kind": self.kinds.get((node_table, node_name), "missing"),
+                 "distance": distance}
+                for (node_table, node_name), distance in distances.items()]
+
+        report = pd.DataFrame(rows, columns=["table", "name", "kind", "distance"])
+
+        return report.sort_values(["distance", "table", "name"], na_position="first").reset_index(drop=True)
+
+    def unresolved(self):
+
+        '''References to tables, columns or measures that aren't in the model
+
+        Returns
+        -------
+        DataFrame
+            One row per broken reference, with the object that contains it.
+        '''
+
+        rows = [{"table": table, "name": name, "missing_table": missing_table, "missing_name": missing_name}
+                for (table, name), edges in self.depends_on.items()
+                for missing_table, missing_name in edges
+                if (missing_table, missing_name) not in self.kinds]
+
+        return pd.DataFrame(rows, columns=["table", "name", "missing_table", "missing_name"])
+
+    def find_cycles(self):
+
+        '''Find circular dependencies
+
+        Returns
+        -------
+        list
+            One list of (table, name) nodes per cycle (strongly connected component).
+        '''
+
+        # iterative Tarjan, so deep chains of measures don't hit the recursion limit
+        index = {}
+        low = {}
+        on_stack = set()
+        stack = []
+        cycles = []
+        counter = 0
+
+        for start in list(self.depends_on):
+            if start in index:
+                continue
+
+            work = [(start, iter(self.depends_on.get(start, ())))]
+            index[start] = low[start] = counter
+            counter += 1
+            stack.append(start)
+            on_stack.add(start)
+
+            while work:
+                node, children = work[-1]
+                advanced = False
+
+                for child in children:
+                    if child not in index:
+                        index[child] = low[child] = counter
+                        counter += 1
+                        stack.append(child)
+                        on_stack.add(child)
+                        work.append((child, iter(self.depends_on.get(child, ()))))
+                        advanced = True
+                        break
+
+                    if child in on_stack:
+                        low[node] = min(low[node], index[child])
+
+                if advanced:
+                    continue
+
+                work.pop()
+
+                if work:
+                    parent = work[-1][0]
+                    low[parent] = min(low[parent], low[node])
+
+                if low[node] == index[node]:
+                    component = []
+
+                    while True:
+                        member = stack.pop()
+                        on_stack.discard(member)
+                        component.append(member)
+
+                        if member == node:
+                            break
+
+                    if len(component) > 1 or node in self.depends_on.get(node, ()):
+                        cycles.append(sorted(component, key=_sort_key))
+
+        return cycles
+
+    def topological_order(self):
+
+        '''Order the objects so everything comes after the objects it depends on
+
+        Returns
+        -------
+        list
+            (table, name) tuples.
+
+        Raises
+        ------
+        ValueError
+            If the model has circular dependencies.
+        '''
+
+        remaining = {node: len([dep for dep in self.depends_on.get(node, ()) if dep in self.kinds]) for node in self.kinds}
+        ready = deque(sorted((node for node, count in remaining.items() if count == 0), key=_sort_key))
+        order = []
+
+        while ready:
+            node = ready.popleft()
+            order.append(node)
+
+            for dependent in sorted(self.dependents.get(node, ()), key=_sort_key):
+                if dependent in remaining:
+                    remaining[dependent] -= 1
+
+                    if remaining[dependent] == 0:
+                        ready.append(dependent)
+
+        if len(order) < len(self.kinds):
+            cycle = self.find_cycles()[0]
+            raise ValueError(f"The model has a circular dependency: {' -> '.join(_format_node(node) for node in cycle)}")
+
+        return order
+
+
+def _sort_key(node):
+    return (node[0] or "", node[1] or "")
+
+
+def _format_node(node):
+    table, name = node
+    return f"'{table}'" if name is None else f"'{table}'[{name}]"
+
+
+def _build_graph(definition_folder):
+
+    '''Build the dependency graph of the model in a semantic model definition folder'''
+
+    return _DaxDependencyGraph(_TmdlModel(definition_folder))
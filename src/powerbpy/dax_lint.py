@@ -0,0 +1,324 @@
+'''A static analyzer that flags common DAX performance anti-patterns in measures and calculated columns.
+    It runs automatically when measures and calculated columns are added. To check a whole model use the lint_dax() method attached to the Dashboard class.
+'''
+
+import warnings
+
+import pandas as pd # pylint: disable=import-error
+
+from powerbpy.dax import _tokenize
+from powerbpy.tmdl_model import _TmdlModel
+
+# functions that evaluate an expression once per row of a table (their first argument)
+_ITERATORS = {"SUMX", "AVERAGEX", "MINX", "MAXX", "COUNTX", "COUNTAX", "PRODUCTX", "CONCATENATEX",
+              "RANKX", "FILTER", "ADDCOLUMNS", "GENERATE", "GENERATEALL", "MEDIANX",
+              "PERCENTILEX.INC", "PERCENTILEX.EXC", "STDEVX.S", "STDEVX.P", "VARX.S", "VARX.P"}
+
+# functions that change the filter context, so their filter arguments are evaluated as tables
+_CALCULATE_FUNCTIONS = {"CALCULATE", "CALCULATETABLE"}
+
+# functions that need the model (other rows, other tables or the filter context), so a calculated column using them can't simply be moved to the source
+_MODEL_FUNCTIONS = _ITERATORS | _CALCULATE_FUNCTIONS | {
+    "SUM", "AVERAGE", "COUNT", "COUNTA", "COUNTROWS", "DISTINCTCOUNT", "COUNTBLANK", "MEDIAN",
+    "RELATED", "RELATEDTABLE", "LOOKUPVALUE", "EARLIER", "EARLIEST", "ALL", "ALLEXCEPT",
+    "ALLSELECTED", "ALLNOBLANKROW", "VALUES", "DISTINCT", "PATH", "TOPN", "SUMMARIZE",
+    "SUMMARIZECOLUMNS", "USERELATIONSHIP", "CROSSFILTER", "TREATAS", "SELECTEDVALUE", "HASONEVALUE",
+    "PERCENTILE.INC", "PERCENTILE.EXC"}
+
+# repeated calls with fewer tokens than this are too small to be worth a VAR
+_MIN_REPEATED_TOKENS = 6
+
+_SEVERITIES = {"filter-whole-table": "warning",
+               "nested-iterator": "warning",
+               "blank-to-zero": "warning",
+               "repeated-subexpression": "info",
+               "calculated-column-in-source": "info"}
+
+_FINDING_COLUMNS = ["table", "object", "kind", "rule", "severity", "line", "column", "message", "snippet", "path"]
+
+
+def _parse_calls(tokens):
+
+    '''Find every function call in a token list
+
+    Returns
+    -------
+    list
+        One dictionary per call with the keys name, start (the index of the function token), end (the index of its closing parenthesis), args (a list of (start, end) token ranges), parent (the enclosing call or None) and parent_arg (which of the parent's arguments the call is in).
+    '''
+
+    calls = []
+    stack = []
+
+    for i, token in enumerate(tokens):
+        if token.kind != "punct":
+            continue
+
+        if token.value == "(" and i > 0 and tokens[i - 1].kind == "function":
+            parent = next((call for call in reversed(stack) if call is not None), None)
+            stack.append({"name": tokens[i - 1].value,
+                          "start": i - 1,
+                          "end": None,
+                          "args": [],
+                          "arg_start": i + 1,
+                          "parent": parent,
+                          "parent_arg": len(parent["args"]) if parent else None})
+
+        elif token.value in "({":
+            # grouping parentheses and table constructors
+            stack.append(None)
+
+        elif token.value == "," and stack and stack[-1] is not None:
+            call = stack[-1]
+            call["args"].append((call["arg_start"], i))
+            call["arg_start"] = i + 1
+
+        elif token.value in ")}" and stack:
+            call = stack.pop()
+
+            if call is not None:
+                if call["arg_start"] < i or call["args"]:
+                    call["args"].append((call["arg_start"], i))
+                call["end"] = i
+                calls.append(call)
+
+    return calls
+
+
+def _single_table(tokens, arg, table_names, variables):
+
+    '''If an argument is just a table (for example  sales  or  'sales'  or  ALL(sales)), return its name'''
+
+    start, end = arg
+    span = tokens[start:end]
+
+    if len(span) == 1:
+        token = span[0]
+        if token.kind == "table" or (token.kind == "identifier" and token.value in table_names and token.value not in variables):
+            return token.value
+
+    # ALL ( table )
+    if len(span) == 4 and span[0].kind == "function" and span[0].value == "ALL":
+        return _single_table(tokens, (start + 2, start + 3), table_names, variables)
+
+    return None
+
+
+def _is_zero(tokens, arg):
+    start, end = arg
+    return end - start == 1 and tokens[start].kind == "number" and float(tokens[start].value) == 0
+
+
+def _contains_blank_test(tokens, arg):
+    start, end = arg
+    span = tokens[start:end]
+
+    return any(token.kind == "function" and token.value == "ISBLANK" for token in span) or any(
+        span[i].kind == "operator" and span[i].value in ("=", "==") and span[i + 1].kind == "function" and span[i + 1].value == "BLANK"
+        for i in range(len(span) - 1))
+
+
+def _location(expression, position):
+    '''1-based line and column of a character position'''
+
+    line = expression.count("\n", 0, position) + 1
+    column = position - (expression.rfind("\n", 0, position) + 1) + 1
+    return line, column
+
+
+def _snippet(expression, tokens, start, end):
+    '''The text from token start to token end (a closing parenthesis, or the last token)'''
+
+    first = tokens[start].position
+    last = tokens[end].position + 1 if end < len(tokens) - 1 else len(expression)
+    text = " ".join(expression[first:last].split())
+    return text if len(text) <= 120 else text[:117] + "..."
+
+
+def _lint_dax(expression,
+              table,
+              name,
+              kind = "measure",
+              table_names = None,
+              fact_tables = None,
+              measure_names = None):
+
+    '''Check a DAX expression for performance anti-patterns
+
+    Parameters
+    ----------
+    expression: str
+        The DAX expression.
+    table: str
+        The table the measure or calculated column belongs to.
+    name: str
+        The name of the measure or calculated column.
+    kind: str
+        Either "measure" or "calculated column".
+    table_names: set
+        Optional. The tables in the model, used to recognize bare table names.
+    fact_tables: set
+        Optional. The tables on the many side of relationships. When given, only iterators over these tables count as nested iterators.
+    measure_names: set
+        Optional. The measures in the model, so [Measure] references aren't mistaken for columns.
+
+    Returns
+    -------
+    list
+        One dictionary per finding, with the keys table, object, kind, rule, severity, line, column (both relative to the expression), message and snippet.
+    '''
+
+    # pylint: disable=too-many-arguments
+    # pylint: disable=too-many-locals
+    # pylint: disable=too-many-branches
+
+    table_names = set(table_names or ()) | {table}
+    measure_names = set(measure_names or ())
+    tokens = _tokenize(expression)
+    calls = _parse_calls(tokens)
+
+    variables = {tokens[i + 1].value for i, token in enumerate(tokens[:-1])
+                 if token.kind == "identifier" and token.value.upper() == "VAR" and tokens[i + 1].kind == "identifier"}
+
+    findings = []
+
+    def add(rule, start, end, message):
+        line, column = _location(expression, tokens[start].position)
+        findings.append({"table": table, "object": name, "kind": kind, "rule": rule, "severity": _SEVERITIES[rule],
+                         "line": line, "column": column, "message": message,
+                         "snippet": _snippet(expression, tokens, start, end)})
+
+    for call in calls:
+        # FILTER over a whole table as a CALCULATE filter argument
+        parent = call["parent"]
+        if (call["name"] == "FILTER" and call["args"] and parent is not None
+                and parent["name"] in _CALCULATE_FUNCTIONS and (call["parent_arg"] or 0) >= 1):
+
+            filtered = _single_table(tokens, call["args"][0], table_names, variables)
+
+            if filtered is not None:
+                add("filter-whole-table", call["start"], call["end"],
+                    f"FILTER over the whole '{filtered}' table inside {parent['name']} materializes every row of the table. "
+                    f"Filter the columns you need instead, for example {parent['name']}(..., '{filtered}'[column] > 0) or KEEPFILTERS().")
+
+        # an iterator over a (fact) table inside the row expression of another iterator
+        if call["name"] in _ITERATORS and call["args"]:
+            iterated = _single_table(tokens, call["args"][0], table_names, variables)
+
+            if iterated is not None and (not fact_tables or iterated in fact_tables):
+                child, ancestor = call, call["parent"]
+
+                while ancestor is not None:
+                    if ancestor["name"] in _ITERATORS and child["parent_arg"] is not None and child["parent_arg"] >= 1:
+                        add("nested-iterator", call["start"], call["end"],
+                            f"{call['name']} over '{iterated}' is nested inside the row expression of {ancestor['name']}, "
+                            f"so the whole table is scanned once per row of the outer iterator. "
+                            "Pre-aggregate with SUMMARIZE/ADDCOLUMNS or move the inner calculation into a VAR.")
+                        break
+
+                    child, ancestor = ancestor, ancestor["parent"]
+
+        # IF(ISBLANK(x), 0, x), SWITCH(TRUE(), ISBLANK(x), 0, ...) and COALESCE(x, 0)
+        args = call["args"]
+        returns_zero = False
+
+        if call["name"] == "IF" and len(args) >= 2 and _contains_blank_test(tokens, args[0]):
+            returns_zero = any(_is_zero(tokens, arg) for arg in args[1:])
+
+        elif call["name"] == "SWITCH":
+            returns_zero = any(_contains_blank_test(tokens, args[i]) and _is_zero(tokens, args[i + 1])
+                               for i in range(1, len(args) - 1, 2))
+
+        elif call["name"] == "COALESCE" and len(args) >= 2:
+            returns_zero = _is_zero(tokens, args[-1])
+
+        if returns_zero:
+            add("blank-to-zero", call["start"], call["end"],
+                f"{call['name']} turns blanks into 0. Visuals then show (and evaluate) every combination of their fields instead of only the ones with data. "
+                "Return BLANK() instead, or format blanks in the visual.")
+
+    # repeated subexpressions: report the outermost repeated call once
+    signatures = {}
+    for call in calls:
+        if call["end"] - call["start"] + 1 >= _MIN_REPEATED_TOKENS:
+            signature = tuple((token.kind, token.value) for token in tokens[call["start"]:call["end"] + 1])
+            signatures.setdefault(signature, []).append(call)
+
+    repeated = {id(call) for group in signatures.values() if len(group) > 1 for call in group}
+
+    for group in signatures.values():
+        if len(group) < 2:
+            continue
+
+        first = min(group, key=lambda call: call["start"])
+        ancestor = first["parent"]
+
+        while ancestor is not None and id(ancestor) not in repeated:
+            ancestor = ancestor["parent"]
+
+        if ancestor is None:
+            add("repeated-subexpression", first["start"], first["end"],
+                f"This {first['name']}() is evaluated {len(group)} times. Compute it once in a VAR and reuse the variable.")
+
+    # calculated columns that only use values from their own row
+    if kind == "calculated column":
+        column_refs = [token.value for token in tokens if token.kind == "column_ref"]
+        functions = {token.value for token in tokens if token.kind == "function"}
+
+        only_own_row = (column_refs
+                        and all(ref_table in (None, table) and ref_name not in measure_names for ref_table, ref_name in column_refs)
+                        and not functions & _MODEL_FUNCTIONS
+                        and not any(token.kind == "table" for token in tokens))
+
+        if only_own_row:
+            add("calculated-column-in-source", 0, len(tokens) - 1,
+                "This calculated column only uses values from its own row. Compute it in the source (pandas or M) instead, "
+                "so it's compressed like an imported column and doesn't have to be recalculated after every refresh.")
+
+    findings.sort(key=lambda finding: (finding["line"], finding["column"]))
+
+    return findings
+
+
+def _warn_findings(findings):
+
+    '''Raise a warning for each finding'''
+
+    for finding in findings:
+        warnings.warn(f"DAX performance ({finding['rule']}) in {finding['table']}[{finding['object']}], "
+                      f"line {finding['line']}: {finding['message']}")
+
+
+def _lint_model(definition_folder):
+
+    '''Lint every measure and calculated column in a semantic model
+
+    Returns
+    -------
+    DataFrame
+        One row per finding. Lines are lines of the TMDL file, given in the path column.
+    '''
+
+    model = _TmdlModel(definition_folder)
+
+    table_names = set(model.tables)
+    measure_names = {name for table in model.tables.values() for name in table.measures}
+    fact_tables = {relationship["from_table"] for relationship in model.relationships}
+
+    rows = []
+
+    for table in model.tables.values():
+        objects = [("measure", measure) for measure in table.measures.values()]
+        objects += [("calculated column", column) for column in table.columns.values() if column["expression"] is not None]
+
+        for kind, obj in objects:
+            for finding in _lint_dax(obj["expression"], table.name, obj["name"], kind,
+                                     table_names = table_names,
+                                     fact_tables = fact_tables,
+                                     measure_names = measure_names):
+
+                finding["line"] += obj.get("expression_line", obj["line"]) - 1
+                finding["path"] = table.path
+                rows.append(finding)
+
+    return pd.DataFrame(rows, columns=_FINDING_COLUMNS)
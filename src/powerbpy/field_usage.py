@@ -0,0 +1,232 @@
+'''Find the columns and measures in a dashboard's semantic model that nothing in the report uses, and optionally remove them.
+    You should never call these functions directly, instead use the find_unused_fields() method attached to the Dashboard class.
+'''
+
+import json
+import os
+import re
+
+import pandas as pd # pylint: disable=import-error
+
+from powerbpy.dax import _DaxDependencyGraph
+from powerbpy.report_index import _field_refs, _iter_pages, _iter_visuals
+from powerbpy.tmdl_model import _TmdlModel
+
+# tables Power BI creates and manages itself
+_AUTO_TABLE_PREFIXES = ("LocalDateTable_", "DateTableTemplate_")
+
+_STEP_NAME = 'Removed Unused Columns'
+
+
+def _report_field_refs(pages_folder, report_json_path):
+
+    '''Index every field used by the report: visuals, visual, page and report level filters
+
+    Returns
+    -------
+    set
+        (table, field) tuples.
+    '''
+
+    refs = set()
+
+    if os.path.exists(report_json_path):
+        with open(report_json_path, "r", encoding="utf-8") as file:
+            refs |= {(table, field) for table, field, _ in _field_refs(json.load(file))}
+
+    for _, page_json in _iter_pages(pages_folder):
+        refs |= {(table, field) for table, field, _ in _field_refs(page_json)}
+
+    # text boxes, buttons and images don't query the model, so they aren't parsed
+    for visual in _iter_visuals(pages_folder, containing = '"Property"'):
+        refs |= {(table, field) for table, field, _ in _field_refs(visual["visual"])}
+
+    return refs
+
+
+def _used_fields(model, report_refs):
+
+    '''Everything the report needs: fields used by visuals and filters, relationships, and whatever those depend on'''
+
+    graph = _DaxDependencyGraph(model)
+
+    used = set(report_refs)
+
+    for relationship in model.relationships:
+        used.add((relationship["from_table"], relationship["from_column"]))
+        used.add((relationship["to_table"], relationship["to_column"]))
+
+    # calculated tables are always evaluated
+    for table in model.tables.values():
+        if any(partition["kind"] == "calculated" for partition in table.partitions):
+            used.add((table.name, None))
+
+    # follow measure, calculated column, calculated table and sort by column dependencies
+    to_visit = list(used)
+
+    while to_visit:
+        for dependency in graph.depends_on.get(to_visit.pop(), ()):
+            if dependency not in used:
+                used.add(dependency)
+                to_visit.append(dependency)
+
+    return used
+
+
+def _remove_from_m(expression_lines, source_columns):
+
+    '''Remove columns from a generated M query
+
+    The columns are taken out of the column lists of the "Changed Type" step (and the "Replaced Value" step older dashboards have), and a final Table.RemoveColumns step stops the query from returning them at all.
+    '''
+
+    text = "\n".join(expression_lines)
+
+    for column in source_columns:
+        name = re.escape(column.replace('"', '""'))
+
+        # {"column", type number} entries in Table.TransformColumnTypes, and {"column", each ..., type number} in Table.TransformColumns
+        entry = rf'\{{\s*"{name}"\s*,[^{{}}]*\}}'
+        text = re.sub(rf'\s*,\s*{entry}', "", text)
+        text = re.sub(rf'{entry}\s*,\s*', "", text)
+        text = re.sub(entry, "", text)
+
+        # "column" entries in Table.ReplaceValue
+        lines = text.split("\n")
+        for i, line in enumerate(lines):
+            if "Table.ReplaceValue" in line:
+                line = re.sub(rf',\s*"{name}"(?=[\s,}}])', "", line)
+                line = re.sub(rf'(?<=\{{)"{name}"\s*,\s*', "", line)
+                lines[i] = line
+        text = "\n".join(lines)
+
+    lines = text.split("\n")
+
+    # add a step that removes the columns, right before "in"
+    in_index = max((i for i, line in enumerate(lines) if line.strip() == "in"), default=None)
+
+    if in_index is None or in_index + 1 >= len(lines):
+        return lines
+
+    result_line = lines[in_index + 1]
+    result_step = result_line.strip()
+    step_indent = result_line[:len(result_line) - len(result_line.lstrip())]
+
+    column_list = ", ".join('"' + column.replace('"', '""') + '"' for column in source_columns)
+
+    # columns were already pruned once: add to the existing step
+    if result_step == f'#"{_STEP_NAME}"':
+        for i, line in enumerate(lines):
+            if line.strip().startswith(f'#"{_STEP_NAME}" ='):
+                lines[i] = line.replace("}, MissingField.Ignore)", f", {column_list}}}, MissingField.Ignore)")
+        return lines
+
+    last_step = max(i for i in range(in_index) if lines[i].strip())
+    lines[last_step] = lines[last_step] + ","
+    lines.insert(in_index, f'{step_indent}#"{_STEP_NAME}" = Table.RemoveColumns({result_step}, {{{column_list}}}, MissingField.Ignore)')
+    lines[in_index + 2] = f'{step_indent}#"{_STEP_NAME}"'
+
+    return lines
+
+
+def _drop_fields(table, unused):
+
+    '''Rewrite a table's TMDL file without the unused columns and measures'''
+
+    with open(table.path, "r", encoding="utf-8") as file:
+        lines = file.read().split("\n")
+
+    drop_lines = set()
+    source_columns = []
+
+    for obj in [*table.columns.values(), *table.measures.values()]:
+        if (table.name, obj["name"]) in unused:
+            drop_lines.update(range(obj["line"] - 1, obj["end_line"]))
+
+            if obj.get("source_column"):
+                source_columns.append(obj["source_column"])
+
+    # update the M code of the table's partitions
+    replacements = {}
+    replaced_lines = set()
+    if source_columns:
+        for partition in table.partitions:
+            if partition["kind"] == "m":
+                start, end = partition["line"] - 1, partition["end_line"]
+                replacements[start] = _remove_from_m(lines[start:end], source_columns)
+                replaced_lines.update(range(start + 1, end))
+
+    new_lines = []
+    skip_blank = False
+
+    for i, line in enumerate(lines):
+        if i in replacements:
+            new_lines.extend(replacements[i])
+            skip_blank = False
+            continue
+
+        if i in replaced_lines:
+            continue
+
+        if i in drop_lines:
+            skip_blank = True
+            continue
+
+        # don't leave a pile of blank lines where an object used to be
+        if skip_blank and not line.strip():
+            continue
+
+        skip_blank = False
+        new_lines.append(line)
+
+    with open(table.path, "w", encoding="utf-8") as file:
+        file.write("\n".join(new_lines))
+
+
+def _find_unused_fields(definition_folder,
+                        pages_folder,
+                        report_json_path,
+                        drop = False,
+                        datasets = None):
+
+    '''List (and optionally drop) the model columns and measures that the report never uses
+
+    Returns
+    -------
+    DataFrame
+        One row per unused column or measure.
+    '''
+
+    model = _TmdlModel(definition_folder)
+    used = _used_fields(model, _report_field_refs(pages_folder, report_json_path))
+
+    rows = []
+    for table in model.tables.values():
+        if table.name.startswith(_AUTO_TABLE_PREFIXES):
+            continue
+
+        for kind, objects in (("column", table.columns), ("measure", table.measures)):
+            for obj in objects.values():
+                if (table.name, obj["name"]) not in used:
+                    rows.append({"table": table.name,
+                                 "name": obj["name"],
+                                 "kind": kind,
+                                 "data_type": obj.get("data_type"),
+                                 "is_calculated": kind == "measure" or obj.get("expression") is not None,
+                                 "dropped": drop})
+
+    report = pd.DataFrame(rows, columns=["table", "name", "kind", "data_type", "is_calculated", "dropped"])
+
+    if drop and rows:
+        unused = set(zip(report["table"], report["name"]))
+
+        for table_name in report["table"].unique():
+            _drop_fields(model.tables[table_name], unused)
+
+        # keep the size estimates in step with the model
+        for dataset in datasets or []:
+            if getattr(dataset, "col_profiles", None):
+                dataset.col_profiles = [profile for profile in dataset.col_profiles
+                                        if (dataset.dataset_name, profile["column"]) not in unused]
+
+    return report
@@ -0,0 +1,535 @@
+'''Shrink GeoJSON and TopoJSON shape files before they are added to a report.
+    Shared borders are simplified once (Douglas-Peucker), coordinates are quantized and the result is written as TopoJSON.
+    You should never call these functions directly, instead use the simplify_shape_file() method attached to the Dashboard class or the simplify_tolerance argument of add_shape_map().
+'''
+
+import json
+import math
+import os
+
+import numpy as np # pylint: disable=import-error
+import pandas as pd # pylint: disable=import-error
+
+_GEOJSON_TYPES = {"FeatureCollection", "Feature", "GeometryCollection", "Point", "MultiPoint",
+                  "LineString", "MultiLineString", "Polygon", "MultiPolygon"}
+
+_REPORT_COLUMNS = ["input_format", "features", "input_bytes", "output_bytes", "pct_of_input",
+                   "input_points", "output_points", "arcs", "tolerance", "quantization"]
+
+
+def _load_shape_file(shape_file_path):
+
+    '''Read a shape file and work out whether it's GeoJSON or TopoJSON'''
+
+    with open(shape_file_path, "r", encoding="utf-8-sig") as file:
+        try:
+            data = json.load(file)
+        except json.JSONDecodeError as exc:
+            raise ValueError(f"{shape_file_path} isn't a GeoJSON or TopoJSON file (it isn't valid json)") from exc
+
+    shape_type = data.get("type") if isinstance(data, dict) else None
+
+    if shape_type == "Topology":
+        return "topojson", data
+
+    if shape_type in _GEOJSON_TYPES:
+        return "geojson", data
+
+    raise ValueError(f"{shape_file_path} isn't a GeoJSON or TopoJSON file. Only these can be simplified.")
+
+
+class _Quantizer:
+
+    '''Convert between real coordinates and the integer grid of a TopoJSON transform'''
+
+    def __init__(self, bbox, quantization):
+        x0, y0, x1, y1 = bbox
+        self.translate = (x0, y0)
+        self.scale = ((x1 - x0) / (quantization - 1) if x1 > x0 else 1,
+                      (y1 - y0) / (quantization - 1) if y1 > y0 else 1)
+
+    def quantize(self, position):
+        return (round((position[0] - self.translate[0]) / self.scale[0]),
+                round((position[1] - self.translate[1]) / self.scale[1]))
+
+    def dequantize(self, points):
+        return points * np.array(self.scale) + np.array(self.translate)
+
+    def transform(self):
+        return {"scale": list(self.scale), "translate": list(self.translate)}
+
+
+def _decode_arcs(topology):
+
+    '''The arcs of a TopoJSON file as arrays of absolute, real coordinates'''
+
+    transform = topology.get("transform")
+    arcs = []
+
+    for arc in topology.get("arcs", []):
+        points = np.array([position[:2] for position in arc], dtype=float).reshape(-1, 2)
+
+        if transform:
+            points = np.cumsum(points, axis=0) * np.array(transform["scale"]) + np.array(transform["translate"])
+
+        arcs.append(points)
+
+    return arcs
+
+
+def _decode_position(topology, position):
+
+    transform = topology.get("transform")
+
+    if not transform:
+        return tuple(position[:2])
+
+    return tuple(value * scale + translate
+                 for value, scale, translate in zip(position[:2], transform["scale"], transform["translate"]))
+
+
+def _geometry_positions(geometry):
+
+    '''Every position in a GeoJSON geometry'''
+
+    if not geometry:
+        return
+
+    if geometry["type"] == "GeometryCollection":
+        for child in geometry.get("geometries", []):
+            yield from _geometry_positions(child)
+        return
+
+    # Point -> 1, LineString and MultiPoint -> 2, Polygon and MultiLineString -> 3, MultiPolygon -> 4
+    def walk(coordinates):
+        if coordinates and isinstance(coordinates[0], (int, float)):
+            yield coordinates
+        else:
+            for child in coordinates:
+                yield from walk(child)
+
+    yield from walk(geometry.get("coordinates", []))
+
+
+def _geojson_features(data):
+
+    '''Turn any GeoJSON object into a list of features'''
+
+    if data["type"] == "FeatureCollection":
+        return data.get("features", [])
+
+    if data["type"] == "Feature":
+        return [data]
+
+    return [{"type": "Feature", "properties": None, "geometry": data}]
+
+
+class _TopologyBuilder:
+
+    '''Build a TopoJSON topology (geometries made of shared arcs) from GeoJSON geometries
+
+    Lines and rings are cut wherever they meet a different line or ring, so a border shared by two polygons becomes one arc that both polygons use.
+    '''
+
+    def __init__(self, position_key):
+        self.position_key = position_key
+        self.lines = []
+        self.junctions = set()
+        self.neighbors = {}
+        self.arcs = []
+        self.arc_index = {}
+
+    def _positions(self, coordinates, ring):
+        points = []
+
+        for position in coordinates:
+            point = self.position_key(position)
+            # quantizing can collapse neighboring positions
+            if not points or point != points[-1]:
+                points.append(point)
+
+        if ring and len(points) > 1 and points[0] == points[-1]:
+            points.pop()
+
+        return points
+
+    def add(self, coordinates, ring):
+
+        '''Register a line or ring and return a handle used by arcs_of() once every line has been added'''
+
+        points = self._positions(coordinates, ring)
+        self.lines.append((points, ring))
+
+        count = len(points)
+        if not ring and points:
+            self.junctions.update((points[0], points[-1]))
+
+        for i, point in enumerate(points):
+            if not ring and i in (0, count - 1):
+                continue
+
+            before, after = points[i - 1], points[(i + 1) % count]
+            pair = (before, after) if before <= after else (after, before)
+
+            seen = self.neighbors.setdefault(point, pair)
+            if seen != pair:
+                self.junctions.add(point)
+
+        return len(self.lines) - 1
+
+    def _arc(self, points):
+        key = tuple(points)
+
+        if key in self.arc_index:
+            return self.arc_index[key]
+
+        reverse = key[::-1]
+        if reverse in self.arc_index:
+            return ~self.arc_index[reverse]
+
+        self.arcs.append(key)
+        self.arc_index[key] = len(self.arcs) - 1
+        return len(self.arcs) - 1
+
+    def arcs_of(self, handle):
+
+        '''The arc indexes (negative when reversed) that make up a registered line or ring'''
+
+        points, ring = self.lines[handle]
+
+        if not points:
+            return []
+
+        if ring:
+            starts = [i for i, point in enumerate(points) if point in self.junctions]
+
+            # a ring that touches nothing else: start it at its smallest point, so identical rings match
+            start = starts[0] if starts else points.index(min(points))
+            points = points[start:] + points[:start] + [points[start]]
+
+        elif len(points) == 1:
+            points = points * 2
+
+        cuts = [i for i, point in enumerate(points) if i == 0 or i == len(points) - 1 or point in self.junctions]
+
+        return [self._arc(points[start:end + 1]) for start, end in zip(cuts, cuts[1:])]
+
+
+def _topology_from_geojson(data, object_name, quantizer):
+
+    '''Convert GeoJSON to a TopoJSON topology with integer (quantized) or real arcs'''
+
+    position_key = quantizer.quantize if quantizer else lambda position: (float(position[0]), float(position[1]))
+
+    builder = _TopologyBuilder(position_key)
+
+    # pass 1: register every line and ring so junctions can be found
+    def register(geometry):
+        if not geometry:
+            return None
+
+        kind = geometry["type"]
+        coordinates = geometry.get("coordinates")
+
+        if kind == "GeometryCollection":
+            return [register(child) for child in geometry.get("geometries", [])]
+        if kind == "LineString":
+            return builder.add(coordinates, ring=False)
+        if kind == "MultiLineString":
+            return [builder.add(line, ring=False) for line in coordinates]
+        if kind == "Polygon":
+            return [builder.add(ring, ring=True) for ring in coordinates]
+        if kind == "MultiPolygon":
+            return [[builder.add(ring, ring=True) for ring in polygon] for polygon in coordinates]
+
+        return None
+
+    features = _geojson_features(data)
+    handles = [register(feature.get("geometry")) for feature in features]
+
+    # pass 2: cut the lines and rings into shared arcs
+    def convert(geometry, handle):
+        if not geometry:
+            return {"type": None}
+
+        kind = geometry["type"]
+        coordinates = geometry.get("coordinates")
+
+        if kind == "GeometryCollection":
+            return {"type": kind,
+                    "geometries": [convert(child, child_handle)
+                                   for child, child_handle in zip(geometry.get("geometries", []), handle)]}
+        if kind == "Point":
+            return {"type": kind, "coordinates": list(position_key(coordinates))}
+        if kind == "MultiPoint":
+            return {"type": kind, "coordinates": [list(position_key(position)) for position in coordinates]}
+        if kind == "LineString":
+            return {"type": kind, "arcs": builder.arcs_of(handle)}
+        if kind == "MultiLineString" or kind == "Polygon":
+            return {"type": kind, "arcs": [builder.arcs_of(line) for line in handle]}
+
+        return {"type": kind, "arcs": [[builder.arcs_of(ring) for ring in polygon] for polygon in handle]}
+
+    geometries = []
+    for feature, handle in zip(features, handles):
+        geometry = convert(feature.get("geometry"), handle)
+
+        if feature.get("properties") is not None:
+            geometry["properties"] = feature["properties"]
+        if feature.get("id") is not None:
+            geometry["id"] = feature["id"]
+
+        geometries.append(geometry)
+
+    arcs = [np.array(arc, dtype=float).reshape(-1, 2) for arc in builder.arcs]
+    if quantizer:
+        arcs = [quantizer.dequantize(arc) for arc in arcs]
+
+    objects = {object_name: {"type": "GeometryCollection", "geometries": geometries}}
+
+    return objects, arcs
+
+
+def _minimum_points(objects, arc_count):
+
+    '''The fewest points each arc can be simplified down to without collapsing a ring'''
+
+    minimum = [2] * arc_count
+
+    def rings(geometry):
+        kind = geometry.get("type")
+
+        if kind == "GeometryCollection":
+            for child in geometry.get("geometries", []):
+                yield from rings(child)
+        elif kind == "Polygon":
+            yield from geometry["arcs"]
+        elif kind == "MultiPolygon":
+            for polygon in geometry["arcs"]:
+                yield from polygon
+
+    for topology_object in objects.values():
+        for ring in rings(topology_object):
+            # a ring needs at least 3 distinct corners: 4 points for a ring made of 1 arc and 3 points per arc for a ring made of 2
+            needed = {1: 4, 2: 3}.get(len(ring), 2)
+
+            for index in ring:
+                index = index if index >= 0 else ~index
+                minimum[index] = max(minimum[index], needed)
+
+    return minimum
+
+
+def _importance(points):
+
+    '''How far each point is from the simplified line when Douglas-Peucker keeps it
+
+    Keeping every point whose importance is above a tolerance gives the same result as running Douglas-Peucker with that tolerance, so the importance only has to be worked out once.
+    '''
+
+    count = len(points)
+    importance = np.zeros(count)
+    importance[[0, -1]] = np.inf
+
+    stack = [(0, count - 1, np.inf)]
+
+    while stack:
+        start, end, parent = stack.pop()
+
+        if end - start < 2:
+            continue
+
+        first, last = points[start], points[end]
+        between = points[start + 1:end]
+        segment = last - first
+        length = segment @ segment
+
+        # distance from the segment (a closed ring starts and ends on the same point)
+        if length == 0:
+            offsets = between - first
+        else:
+            along = np.clip((between - first) @ segment / length, 0, 1)
+            offsets = between - (first + along[:, None] * segment)
+
+        distances = np.hypot(offsets[:, 0], offsets[:, 1])
+        farthest = int(np.argmax(distances))
+        split = start + 1 + farthest
+
+        # a point can't be more important than the point that split the line above it
+        importance[split] = min(distances[farthest], parent)
+
+        stack.append((start, split, importance[split]))
+        stack.append((split, end, importance[split]))
+
+    return importance
+
+
+def _simplify_arc(points, tolerance, minimum):
+
+    if tolerance is None or len(points) <= minimum:
+        return points
+
+    importance = _importance(points)
+    keep = importance > tolerance
+
+    if keep.sum() < minimum:
+        keep[np.argsort(-importance, kind="stable")[:minimum]] = True
+
+    return points[keep]
+
+
+def _encode_arc(points, quantizer):
+
+    '''Quantize and delta encode an arc, dropping points that land on the same spot'''
+
+    if not quantizer:
+        return [[float(x), float(y)] for x, y in points]
+
+    grid = np.rint((points - np.array(quantizer.translate)) / np.array(quantizer.scale)).astype(np.int64)
+
+    # keep the first and last points, so junctions stay where they are
+    same = np.zeros(len(grid), dtype=bool)
+    same[1:-1] = np.all(grid[1:-1] == grid[:-2], axis=1)
+    grid = grid[~same]
+
+    deltas = np.diff(grid, axis=0, prepend=np.zeros((1, 2), dtype=np.int64))
+
+    return deltas.tolist()
+
+
+def _topology_points(geometry):
+
+    '''The Point and MultiPoint positions of a TopoJSON geometry, as stored in the file'''
+
+    kind = geometry.get("type")
+
+    if kind == "GeometryCollection":
+        for child in geometry.get("geometries", []):
+            yield from _topology_points(child)
+    elif kind == "Point":
+        yield geometry["coordinates"]
+    elif kind == "MultiPoint":
+        yield from geometry["coordinates"]
+
+
+def _requantize_points(geometry, topology, quantizer):
+
+    '''Move Point and MultiPoint coordinates of a TopoJSON geometry onto the new grid'''
+
+    kind = geometry.get("type")
+
+    if kind == "GeometryCollection":
+        for child in geometry.get("geometries", []):
+            _requantize_points(child, topology, quantizer)
+
+    elif kind == "Point":
+        position = _decode_position(topology, geometry["coordinates"])
+        geometry["coordinates"] = list(quantizer.quantize(position)) if quantizer else list(position)
+
+    elif kind == "MultiPoint":
+        positions = [_decode_position(topology, position) for position in geometry["coordinates"]]
+        geometry["coordinates"] = [list(quantizer.quantize(position)) if quantizer else list(position)
+                                   for position in positions]
+
+
+def _keep_properties(geometry, properties):
+
+    if properties is None:
+        return
+
+    if geometry.get("properties") is not None:
+        geometry["properties"] = {key: value for key, value in geometry["properties"].items() if key in properties}
+
+    for child in geometry.get("geometries", []):
+        _keep_properties(child, properties)
+
+
+def _count_features(objects):
+    return sum(len(topology_object.get("geometries", [])) if topology_object.get("type") == "GeometryCollection" else 1
+               for topology_object in objects.values())
+
+
+def _simplify_shape_file(shape_file_path,
+                         output_path,
+                         tolerance = None,
+                         quantization = 100_000,
+                         properties = None):
+
+    '''Simplify, quantize and convert a GeoJSON or TopoJSON file to TopoJSON
+
+    Returns
+    -------
+    DataFrame
+        A single row comparing the size and number of points of the input and output files.
+    '''
+
+    if tolerance is not None and tolerance < 0:
+        raise ValueError("tolerance can't be negative")
+
+    if quantization is not None and (not isinstance(quantization, int) or quantization < 2):
+        raise ValueError("quantization should be a whole number of at least 2, for example 100000, or None to keep the full precision")
+
+    input_format, data = _load_shape_file(shape_file_path)
+
+    # the bounding box of everything in the file
+    if input_format == "geojson":
+        positions = [position for feature in _geojson_features(data)
+                     for position in _geometry_positions(feature.get("geometry"))]
+        input_points = len(positions)
+    else:
+        arcs = _decode_arcs(data)
+        positions = [point for arc in arcs for point in arc]
+        positions += [_decode_position(data, position)
+                      for topology_object in data["objects"].values()
+                      for position in _topology_points(topology_object)]
+        input_points = len(positions)
+
+    if not positions:
+        raise ValueError(f"{shape_file_path} doesn't have any coordinates")
+
+    coordinates = np.array([position[:2] for position in positions], dtype=float)
+    bbox = [*coordinates.min(axis=0).tolist(), *coordinates.max(axis=0).tolist()]
+
+    quantizer = _Quantizer(bbox, quantization) if quantization else None
+
+    if input_format == "geojson":
+        object_name = os.path.splitext(os.path.basename(shape_file_path))[0]
+        objects, arcs = _topology_from_geojson(data, object_name, quantizer)
+    else:
+        objects = data["objects"]
+        for topology_object in objects.values():
+            _requantize_points(topology_object, data, quantizer)
+
+    for topology_object in objects.values():
+        _keep_properties(topology_object, properties)
+
+    minimum = _minimum_points(objects, len(arcs))
+    arcs = [_simplify_arc(arc, tolerance, minimum[i]) for i, arc in enumerate(arcs)]
+    encoded_arcs = [_encode_arc(arc, quantizer) for arc in arcs]
+
+    topology = {"type": "Topology", "bbox": bbox}
+    if quantizer:
+        topology["transform"] = quantizer.transform()
+    topology["objects"] = objects
+    topology["arcs"] = encoded_arcs
+
+    with open(output_path, "w", encoding="utf-8") as file:
+        json.dump(topology, file, separators=(",", ":"))
+
+    input_bytes = os.path.getsize(shape_file_path)
+    output_bytes = os.path.getsize(output_path)
+
+    output_points = sum(len(arc) for arc in encoded_arcs)
+    output_points += sum(1 for topology_object in objects.values() for _ in _topology_points(topology_object))
+
+    return pd.DataFrame([{"input_format": input_format,
+                          "features": _count_features(objects),
+                          "input_bytes": input_bytes,
+                          "output_bytes": output_bytes,
+                          "pct_of_input": round(100 * output_bytes / input_bytes, 1) if input_bytes else math.nan,
+                          "input_points": input_points,
+                          "output_points": output_points,
+                          "arcs": len(encoded_arcs),
+                          "tolerance": tolerance,
+                          "quantization": quantization}],
+                        columns=_REPORT_COLUMNS)
@@ -0,0 +1,149 @@
+'''Shrink images before they are added to a report: downscale them to the page, re-encode them and drop their metadata.
+    Optimized images are cached by content, so the same image is only processed once.
+    You should never call these functions directly, instead use the optimize argument of add_background_image().
+'''
+
+import hashlib
+import io
+import os
+
+import pandas as pd # pylint: disable=import-error
+
+from powerbpy.cache import _cache_folder
+
+# formats Power BI can show as a background, and the extension to save them with
+_FORMATS = {"JPEG": ".jpg", "PNG": ".png"}
+
+# the EXIF tag that says how the camera was turned
+_EXIF_ORIENTATION = 0x0112
+
+_REPORT_COLUMNS = ["format", "original_width", "original_height", "width", "height",
+                   "original_bytes", "optimized_bytes", "pct_of_original", "cached"]
+
+
+def _pillow():
+
+    try:
+        from PIL import Image, ImageOps # pylint: disable=import-outside-toplevel
+    except ImportError as exc:
+        raise ImportError("Optimizing images needs Pillow. Install it with `pip install powerbpy[images]` or `pip install Pillow`.") from exc
+
+    return Image, ImageOps
+
+
+def _encode(image, image_format, quality, icc_profile):
+
+    '''Save an image the smallest way its format allows, without EXIF or other metadata'''
+
+    Image, _ = _pillow()
+
+    if image_format == "JPEG" and image.mode != "RGB":
+        # JPEG has no transparency: put transparent images on a white background
+        rgba = image.convert("RGBA")
+        flat = Image.new("RGB", rgba.size, (255, 255, 255))
+        flat.paste(rgba, mask=rgba.getchannel("A"))
+        image = flat
+
+    options = {"optimize": True}
+    if image_format == "JPEG":
+        options.update(quality=quality, progressive=True)
+    if icc_profile:
+        # keep the color profile, so colors don't shift
+        options["icc_profile"] = icc_profile
+
+    buffer = io.BytesIO()
+    image.save(buffer, format=image_format, **options)
+
+    return buffer.getvalue()
+
+
+def _encode_keeping_quality(original, icc_profile):
+
+    '''Save a JPEG again with the quality it was saved with, without EXIF or other metadata'''
+
+    options = {"quality": "keep", "subsampling": "keep", "optimize": True}
+    if icc_profile:
+        options["icc_profile"] = icc_profile
+
+    buffer = io.BytesIO()
+    original.save(buffer, format="JPEG", **options)
+
+    return buffer.getvalue()
+
+
+def _optimize_image(img_path,
+                    max_size,
+                    quality = 80,
+                    image_format = None):
+
+    '''Downscale, re-encode and strip an image, using the cached result if it was already done
+
+    Parameters
+    ----------
+    max_size: tuple
+        The (width, height) the image has to fit in. Smaller images are never enlarged.
+
+    Returns
+    -------
+    tuple
+        The path of the optimized image (in the cache folder) and a one row DataFrame comparing it to the original.
+    '''
+
+    if image_format is not None and image_format.upper() not in _FORMATS:
+        raise ValueError(f"image_format must be one of {', '.join(_FORMATS)} or None to keep the image's format")
+
+    if not 1 <= quality <= 95:
+        raise ValueError("quality must be a whole number between 1 and 95")
+
+    with open(img_path, "rb") as file:
+        content = file.read()
+
+    settings = f"{max_size[0]}x{max_size[1]}|{quality}|{image_format.upper() if image_format else 'auto'}"
+    key = hashlib.sha256(hashlib.sha256(content).digest() + settings.encode()).hexdigest()
+
+    Image, ImageOps = _pillow()
+
+    with Image.open(img_path) as original:
+        original_size = original.size
+        target_format = image_format.upper() if image_format else ("JPEG" if original.format in ("JPEG", "MPO") else "PNG")
+
+        cache_path = os.path.join(_cache_folder("images"), key + _FORMATS[target_format])
+        cached = os.path.exists(cache_path)
+
+        if not cached:
+            icc_profile = original.info.get("icc_profile")
+
+            # apply the camera's rotation before the EXIF data is dropped
+            image = ImageOps.exif_transpose(original)
+            image.thumbnail(max_size, Image.Resampling.LANCZOS)
+
+            data = _encode(image, target_format, quality, icc_profile)
+
+            # re-encoding an image that is already small and compressed can make it bigger.
+            # The original bytes still have its EXIF (maybe a GPS location), so a JPEG is saved again with its own quantization tables instead
+            if len(data) >= len(content) and image.size == original_size and target_format == original.format == "JPEG" \
+                    and original.getexif().get(_EXIF_ORIENTATION, 1) == 1:
+                data = min(data, _encode_keeping_quality(original, icc_profile), key=len)
+
+            temp_path = f"{cache_path}.{os.getpid()}.tmp"
+            with open(temp_path, "wb") as file:
+                file.write(data)
+            os.replace(temp_path, cache_path)
+
+    with Image.open(cache_path) as optimized:
+        size = optimized.size
+
+    optimized_bytes = os.path.getsize(cache_path)
+
+    report = pd.DataFrame([{"format": target_format,
+                            "original_width": original_size[0],
+                            "original_height": original_size[1],
+                            "width": size[0],
+                            "height": size[1],
+                            "original_bytes": len(content),
+                            "optimized_bytes": optimized_bytes,
+                            "pct_of_original": round(100 * optimized_bytes / len(content), 1),
+                            "cached": cached}],
+                          columns=_REPORT_COLUMNS)
+
+    return cache_path, report
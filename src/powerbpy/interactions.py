@@ -0,0 +1,110 @@
+'''Control which visuals on a page filter or highlight each other.
+    By default a click in any visual re-queries every other visual on the page, so on a page with many visuals one click can send dozens of queries.
+    You should never call these functions directly, instead use the set_interactions() method attached to the _Page class.
+'''
+
+import json
+
+import pandas as pd # pylint: disable=import-error
+
+from powerbpy.report_index import _iter_visuals
+
+# the names used by set_interactions() -> the names used in page.json
+_INTERACTION_TYPES = {"Filter": "DataFilter",
+                      "Highlight": "HighlightFilter",
+                      "None": "NoFilter",
+                      "Default": "Default"}
+
+_SLICER_TYPES = {"slicer", "advancedSlicerVisual", "listSlicer", "textSlicer"}
+
+_REPORT_COLUMNS = ["source", "target", "type"]
+
+
+def _page_json_type(interaction_type):
+
+    if interaction_type not in _INTERACTION_TYPES:
+        raise ValueError(f"Unknown interaction type {interaction_type!r}. Available options include: {', '.join(_INTERACTION_TYPES)}")
+
+    return _INTERACTION_TYPES[interaction_type]
+
+
+def _data_visuals(page):
+
+    '''visual_id -> visual_type for the visuals on a page that query data (text boxes, buttons, images and groups can't filter anything)'''
+
+    return {visual["visual_id"]: visual["visual_type"]
+            for visual in _iter_visuals(page.dashboard.pages_folder, [page.page_id])
+            if "query" in visual["visual"].get("visual", {})}
+
+
+def _set_interactions(page, interactions = None, default = None, slicers = None):
+
+    '''Work out the interaction for every pair of visuals on a page and write them to page.json
+
+    The most specific setting wins: a (source, target) pair, then a source, then slicers, then default.
+    Pairs that nothing applies to keep whatever page.json already had.
+
+    Returns
+    -------
+    DataFrame
+        The source, target and type of every interaction on the page that isn't the Power BI default.
+    '''
+
+    visuals = _data_visuals(page)
+
+    pairs = {}
+    sources = {}
+
+    for key, interaction_type in (interactions or {}).items():
+        interaction_type = _page_json_type(interaction_type)
+        ids = key if isinstance(key, tuple) else (key,)
+
+        for visual_id in ids:
+            if visual_id not in visuals:
+                raise ValueError(f"There isn't a visual with the id {visual_id!r} on {page.page_id} that can filter other visuals. "
+                                 f"Visuals on the page: {', '.join(sorted(visuals))}")
+
+        if isinstance(key, tuple):
+            pairs[key] = interaction_type
+        else:
+            sources[key] = interaction_type
+
+    default = _page_json_type(default) if default is not None else None
+    slicers = _page_json_type(slicers) if slicers is not None else None
+
+    with open(page.page_json_path, "r", encoding="utf-8") as file:
+        page_json = json.load(file)
+
+    matrix = {(interaction["source"], interaction["target"]): interaction["type"]
+              for interaction in page_json.get("visualInteractions", [])}
+
+    for source, source_type in visuals.items():
+        for target in visuals:
+            if source == target:
+                continue
+
+            interaction_type = pairs.get((source, target)) or sources.get(source)
+
+            if interaction_type is None and source_type in _SLICER_TYPES:
+                interaction_type = slicers
+
+            interaction_type = interaction_type or default
+
+            if interaction_type is not None:
+                matrix[(source, target)] = interaction_type
+
+    page_json["visualInteractions"] = [{"source": source, "target": target, "type": interaction_type}
+                                       for (source, target), interaction_type in sorted(matrix.items())
+                                       if interaction_type != "Default"]
+
+    if not page_json["visualInteractions"]:
+        del page_json["visualInteractions"]
+
+    with open(page.page_json_path, "w", encoding="utf-8") as file:
+        json.dump(page_json, file, indent = 2)
+
+    names = {value: key for key, value in _INTERACTION_TYPES.items()}
+
+    return pd.DataFrame([(interaction["source"], interaction["target"], names.get(interaction["type"], interaction["type"]))
+                         for interaction in page_json.get("visualInteractions", [])],
+                        columns=_REPORT_COLUMNS)
@@ -0,0 +1,314 @@
+'''Work out the columns of a JSON API from a sample of its response, and the M code that turns the response into those columns.
+    The sample is read one record at a time, so a big sample never has to fit in memory.
+    You should never call these functions directly, instead use the sample_json argument of add_web_json().
+'''
+
+import json
+import re
+
+import pandas as pd # pylint: disable=import-error
+
+from powerbpy.json_stream import _iter_json_array
+
+# how many flattened records to keep for _create_tmdl() (it only looks at the first 100 values of each column)
+_SAMPLE_ROWS = 100
+
+_DATE = re.compile("^\\d{4}-\\d{2}-\\d{2}$")
+_DATETIME = re.compile("^\\d{4}-\\d{2}-\\d{2}[T ]\\d{2}:\\d{2}(:\\d{2}(\\.\\d+)?)?(Z|[+-]\\d{2}:?\\d{2})?$")
+
+# the column types a JSON field can end up as -> their Power Query type
+_M_TYPES = {"number": "type number",
+            "date": "type date",
+            "datetime": "type datetimezone",
+            "text": "type text"}
+
+
+def _value_kind(value):
+
+    if value is None:
+        return None
+    if isinstance(value, dict):
+        return "record"
+    if isinstance(value, list):
+        return "list"
+    if isinstance(value, bool):
+        # _create_tmdl() has no boolean columns, so true/false are kept as text
+        return "text"
+    if isinstance(value, (int, float)):
+        return "number"
+    if _DATE.match(value):
+        return "date"
+    if _DATETIME.match(value):
+        return "datetime"
+
+    return "text"
+
+
+class _JsonField:
+
+    '''Everything seen in one JSON field across the sampled records'''
+
+    # pylint: disable=too-few-public-methods
+
+    def __init__(self):
+        self.kinds = set()
+        self.fields = {}
+        self.item_kinds = set()
+        self.item_fields = {}
+
+    def observe(self, value):
+
+        kind = _value_kind(value)
+
+        if kind is not None:
+            self.kinds.add(kind)
+
+        if kind == "record":
+            _observe_record(self.fields, value)
+
+        if kind == "list":
+            for item in value:
+                item_kind = _value_kind(item)
+
+                if item_kind is not None:
+                    self.item_kinds.add(item_kind)
+
+                if item_kind == "record":
+                    _observe_record(self.item_fields, item)
+
+    def shape(self):
+
+        '''How the field becomes columns: "record", "record_list", "list" (joined into text), "json" (mixed, kept as JSON text) or "value"'''
+
+        if self.kinds == {"record"}:
+            return "record"
+
+        if self.kinds == {"list"}:
+            if self.item_kinds == {"record"}:
+                return "record_list"
+            if "record" not in self.item_kinds and "list" not in self.item_kinds:
+                return "list"
+
+        if self.kinds & {"record", "list"}:
+            return "json"
+
+        return "value"
+
+    def column_type(self):
+
+        '''The type of the column a plain value field becomes'''
+
+        if self.shape() != "value":
+            return "text"
+
+        if self.kinds == {"number"}:
+            return "number"
+        if self.kinds == {"date"}:
+            return "date"
+        if self.kinds and self.kinds <= {"date", "datetime"}:
+            return "datetime"
+
+        return "text"
+
+
+def _observe_record(fields, record):
+
+    for name, value in record.items():
+        fields.setdefault(name, _JsonField()).observe(value)
+
+
+class _JsonSchema:
+
+    '''The union of the fields of every record in a sample JSON array, and the M code that expands them into columns
+
+    Nested records become "parent.child" columns, lists of records are expanded to new rows, lists of values are joined into text
+    and fields that mix records, lists and values are kept as JSON text.
+    '''
+
+    def __init__(self):
+        self.fields = {}
+        self.records = 0
+        self.rows = []
+
+    @classmethod
+    def from_file(cls, path, encoding = "utf-8"):
+
+        schema = cls()
+
+        # files saved by Windows tools often start with a byte order mark
+        if encoding.lower().replace("_", "-") in ("utf-8", "utf8"):
+            encoding = "utf-8-sig"
+
+        with open(path, "r", encoding = encoding) as file:
+            # _iter_json_array() would hand back a lone object as the only item
+            if not file.read(64).lstrip().startswith("["):
+                raise ValueError("The sample JSON has to be an array of records, like the API returns, e.g. [{\"id\": 1}, {\"id\": 2}]")
+            file.seek(0)
+
+            for record in _iter_json_array(file):
+                if not isinstance(record, dict):
+                    raise ValueError(f"Every item in the sample JSON has to be a record, but item {schema.records} is {json.dumps(record)[:50]}")
+
+                _observe_record(schema.fields, record)
+                schema.records += 1
+
+                if len(schema.rows) < _SAMPLE_ROWS:
+                    schema.rows.append(record)
+
+        if schema.records == 0:
+            raise ValueError("The sample JSON doesn't have any records to work out the columns from")
+
+        return schema
+
+    def columns(self, fields = None, prefix = ""):
+
+        '''(column name, field) for every column after expansion, in the order Power Query puts them'''
+
+        columns = []
+
+        for name, field in (self.fields if fields is None else fields).items():
+            shape = field.shape()
+
+            if shape == "record":
+                columns += self.columns(field.fields, f"{prefix}{name}.")
+            elif shape == "record_list":
+                columns += self.columns(field.item_fields, f"{prefix}{name}.")
+            else:
+                columns.append((f"{prefix}{name}", field))
+
+        return columns
+
+    def expansion_steps(self, previous):
+
+        '''The M steps that expand the single record column of ToTable into every column
+
+        Returns
+        -------
+        tuple
+            A list of (step name, expression) pairs and the name of the last step.
+        '''
+
+        steps = [("Expanded", f'Table.ExpandRecordColumn({previous}, "Column1", {_m_list(self.fields)})')]
+        previous = "Expanded"
+
+        pending = [(name, field) for name, field in self.fields.items()]
+
+        while pending:
+            column, field = pending.pop(0)
+            shape = field.shape()
+            quoted = _m_name(column)
+            step = f'#"Expanded {quoted}"'
+
+            if shape == "record_list":
+                steps.append((f'#"Expanded {quoted} rows"', f'Table.ExpandListColumn({previous}, "{quoted}")'))
+                previous = f'#"Expanded {quoted} rows"'
+
+            if shape in ("record", "record_list"):
+                children = field.fields if shape == "record" else field.item_fields
+                names = [f"{column}.{name}" for name in children]
+
+                steps.append((step, f'Table.ExpandRecordColumn({previous}, "{quoted}", {_m_list(children)}, {_m_list(names)})'))
+                previous = step
+
+                # expand the children in place of their parent, depth first
+                pending = list(zip(names, children.values())) + pending
+
+            elif shape == "list":
+                steps.append((f'#"Combined {quoted}"',
+                              f'Table.TransformColumns({previous}, {{{{"{quoted}", each if _ is null then null else Text.Combine(List.Transform(_, Text.From), ", "), type text}}}})'))
+                previous = f'#"Combined {quoted}"'
+
+            elif shape == "json":
+                steps.append((f'#"JSON {quoted}"',
+                              f'Table.TransformColumns({previous}, {{{{"{quoted}", each if _ is null then null else Text.FromBinary(Json.FromValue(_)), type text}}}})'))
+                previous = f'#"JSON {quoted}"'
+
+        return steps, previous
+
+    def type_transforms(self):
+
+        '''The type steps for every column, in the type_transforms format of add_web_json()'''
+
+        groups = {"TypedDates": [], "TypedNumbers": [], "TypedText": []}
+
+        for column, field in self.columns():
+            column_type = field.column_type()
+            group = {"number": "TypedNumbers", "text": "TypedText"}.get(column_type, "TypedDates")
+            groups[group].append({"name": column, "type": _M_TYPES[column_type]})
+
+        return [{"step_name": step_name, "columns": columns} for step_name, columns in groups.items() if columns]
+
+    def frame(self):
+
+        '''The first sampled records as a DataFrame with one column per expanded field, typed the way the whole sample needs'''
+
+        columns = self.columns()
+        data = {column: [] for column, _ in columns}
+
+        for record in self.rows:
+            flat = _flatten(record, self.fields)
+
+            for column, _ in columns:
+                data[column].append(flat.get(column))
+
+        frame = pd.DataFrame(data)
+
+        for column, field in columns:
+            column_type = field.column_type()
+
+            if column_type == "number":
+                frame[column] = pd.to_numeric(frame[column]).astype("float64")
+            elif column_type == "date":
+                frame[column] = pd.to_datetime(frame[column], format = "%Y-%m-%d")
+            elif column_type == "datetime":
+                frame[column] = pd.to_datetime(frame[column], format = "ISO8601", utc = True).dt.tz_localize(None)
+            else:
+                frame[column] = frame[column].map(_text, na_action = "ignore").astype("object")
+
+        return frame
+
+
+def _flatten(record, fields, prefix = ""):
+
+    '''One row of the expanded table for a record (the first item of a list of records stands in for all of them)'''
+
+    flat = {}
+
+    for name, field in fields.items():
+        value = record.get(name)
+        shape = field.shape()
+
+        if shape == "record_list":
+            value = value[0] if value else None
+            shape = "record"
+
+        if shape == "record":
+            flat.update(_flatten(value or {}, field.fields if field.shape() == "record" else field.item_fields, f"{prefix}{name}."))
+        elif shape == "list" and value is not None:
+            flat[f"{prefix}{name}"] = ", ".join(map(_text, value))
+        elif shape == "json" and value is not None:
+            flat[f"{prefix}{name}"] = json.dumps(value)
+        else:
+            flat[f"{prefix}{name}"] = value
+
+    return flat
+
+
+def _text(value):
+
+    if isinstance(value, bool):
+        return "true" if value else "false"
+
+    return str(value)
+
+
+def _m_name(name):
+
+    '''A column name inside an M string, where quotes are doubled'''
+
+    return name.replace('"', '""')
+
+
+def _m_list(names):
+
+    return "{" + ", ".join(f'"{_m_name(name)}"' for name in names) + "}"
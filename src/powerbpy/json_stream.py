@@ -0,0 +1,293 @@
+'''A small streaming JSON reader used to pull arrays out of large files (.vpax statistics, performance logs, shape files, API samples) without loading the whole document into memory.
+    These are internal helpers, you should never need to call them directly.
+'''
+
+import io
+import json
+import re
+
+_DECODER = json.JSONDecoder()
+
+_WHITESPACE = " \t\n\r"
+
+_NUMBER_CHARS = "-+0123456789.eE"
+
+# the characters skip_value() has to look at, outside and inside strings.
+# Runs of arrays that hold no other arrays, objects or strings ([x, y] coordinates for example) are skipped in one go.
+_STRUCTURE = re.compile(r'(?:\[[^\[\]{}"]*\][\s,]*)+|[\[\]{}"]')
+_STRING_SPECIAL = re.compile(r'["\\]')
+
+
+class _JsonStreamReader:
+
+    '''Reads JSON values one at a time from a text stream, keeping only a small window of the file in memory'''
+
+    def __init__(self,
+                 stream,
+                 chunk_size = 65536):
+
+        # accept binary streams (for example files opened from a zip archive)
+        if isinstance(stream.read(0), bytes):
+            stream = io.TextIOWrapper(stream, encoding="utf-8-sig")
+
+        self.stream = stream
+        self.chunk_size = chunk_size
+        self.buffer = ""
+        self.pos = 0
+        self.eof = False
+
+    def _fill(self, min_size = 0):
+        '''Drop the consumed part of the buffer and read more of the stream. Returns False at the end of the stream.'''
+
+        if self.eof:
+            return False
+
+        self.buffer = self.buffer[self.pos:]
+        self.pos = 0
+
+        chunk = self.stream.read(max(self.chunk_size, min_size))
+
+        if not chunk:
+            self.eof = True
+            return False
+
+        self.buffer += chunk
+        return True
+
+    def peek(self):
+        '''Return the next non whitespace character without consuming it, or "" at the end of the stream'''
+
+        while True:
+            while self.pos < len(self.buffer) and self.buffer[self.pos] in _WHITESPACE:
+                self.pos += 1
+
+            if self.pos < len(self.buffer):
+                return self.buffer[self.pos]
+
+            if not self._fill():
+                return ""
+
+    def expect(self, char):
+        '''Consume the next non whitespace character, which must be char'''
+
+        found = self.peek()
+
+        if found != char:
+            raise ValueError(f"Malformed JSON: expected '{char}' but found '{found}'")
+
+        self.pos += 1
+
+    def decode_value(self):
+        '''Decode and return the next complete JSON value'''
+
+        if self.peek() in _NUMBER_CHARS:
+            self._fill_number()
+
+        while True:
+            try:
+                value, end = _DECODER.raw_decode(self.buffer, self.pos)
+
+            except json.JSONDecodeError:
+                # the value is (probably) cut off by the end of the buffer,
+                # read at least as much again so big values are not re-parsed over and over
+                if not self._fill(min_size = len(self.buffer) - self.pos):
+                    raise
+                continue
+
+            self.pos = end
+            return value
+
+    def _fill_number(self):
+        '''Make sure a number isn't cut in half by the end of the buffer'''
+
+        end = self.pos
+
+        while True:
+            while end < len(self.buffer) and self.buffer[end] in _NUMBER_CHARS:
+                end += 1
+
+            if end < len(self.buffer):
+                return
+
+            end -= self.pos
+
+            if not self._fill():
+                return
+
+    def skip_value(self):
+        '''Move past the next JSON value without building python objects for it'''
+
+        char = self.peek()
+
+        if char not in "{[":
+            self.decode_value()
+            return
+
+        self.pos += 1
+        depth = 1
+        in_string = False
+        escaped = False
+
+        # jump between the characters that matter instead of looking at every character,
+        # which keeps skipping big arrays of numbers (TopoJSON arcs for example) fast
+        while True:
+            if escaped and self.pos < len(self.buffer):
+                self.pos += 1
+                escaped = False
+
+            match = (_STRING_SPECIAL if in_string else _STRUCTURE).search(self.buffer, self.pos)
+
+            if match is None:
+                self.pos = len(self.buffer)
+                if not self._fill():
+                    raise ValueError("Malformed JSON: unexpected end of file")
+                continue
+
+            char = match.group()
+            self.pos = match.end()
+
+            if len(char) > 1:
+                continue
+
+            if in_string:
+                if char == "\\":
+                    escaped = True
+                else:
+                    in_string = False
+
+            elif char == '"':
+                in_string = True
+
+            elif char in "{[":
+                depth += 1
+
+            else:
+                depth -= 1
+
+                if depth == 0:
+                    return
+
+
+def _walk(reader, patterns, depth):
+
+    '''Yield the requested values inside the next JSON value
+
+    patterns are the requested paths whose first depth keys match the keys that led to this value ("*" matches any key or array index)
+    '''
+
+    further = [pattern for pattern in patterns if len(pattern) > depth]
+
+    for pattern in patterns:
+        if len(pattern) != depth:
+            continue
+
+        # one of the arrays we're looking for: yield its items one at a time
+        if reader.peek() == "[":
+            yield from _walk_array(reader, lambda _: pattern)
+            return
+
+        # any other value is yielded whole, unless it's on the way to another requested path
+        if not further:
+            yield pattern, reader.decode_value()
+            return
+
+    def child(key):
+        return [pattern for pattern in further if pattern[depth] in ("*", key)]
+
+    # keep descending into objects and arrays that are on the way to a requested path
+    if further and reader.peek() == "{":
+        reader.expect("{")
+
+        if reader.peek() == "}":
+            reader.expect("}")
+            return
+
+        while True:
+            key = reader.decode_value()
+            reader.expect(":")
+
+            child_patterns = child(key)
+            if child_patterns:
+                yield from _walk(reader, child_patterns, depth + 1)
+            else:
+                reader.skip_value()
+
+            if reader.peek() == ",":
+                reader.expect(",")
+                continue
+
+            reader.expect("}")
+            return
+
+    if further and reader.peek() == "[":
+        yield from _walk_array(reader, lambda index: _walk(reader, child(index), depth + 1))
+        return
+
+    reader.skip_value()
+
+
+def _walk_array(reader, visit):
+
+    '''Go through the items of an array. visit(index) returns either the pattern to yield the item under, or a generator that consumes the item.'''
+
+    reader.expect("[")
+
+    if reader.peek() == "]":
+        reader.expect("]")
+        return
+
+    index = 0
+    while True:
+        result = visit(index)
+
+        if isinstance(result, tuple):
+            yield result, reader.decode_value()
+        else:
+            yield from result
+
+        index += 1
+
+        if reader.peek() == ",":
+            reader.expect(",")
+            continue
+
+        reader.expect("]")
+        return
+
+
+def _iter_json_arrays(stream,
+                      paths,
+                      chunk_size = 65536):
+
+    '''Stream the items of one or more arrays in a JSON document
+
+    Parameters
+    ----------
+    stream: file object
+        A text or binary file object positioned at the start of a JSON document.
+    paths: list
+        A list of key paths (tuples) of the arrays to read. Use () for a document that is itself an array and "*" to match any key or array index, for example ("objects", "*", "geometries") for TopoJSON or ("features", "*", "properties") for the properties of every GeoJSON feature.
+        A path that leads to something other than an array yields that value as a single item.
+    chunk_size: int
+        How many characters to read from the stream at a time.
+
+    Returns
+    -------
+    generator
+        Yields (path, item) tuples in the order the items appear in the file. Everything else in the document is skipped without being decoded.
+    '''
+
+    reader = _JsonStreamReader(stream, chunk_size = chunk_size)
+    paths = [tuple(path) for path in paths]
+
+    yield from _walk(reader, paths, 0)
+
+
+def _iter_json_array(stream,
+                     path = (),
+                     chunk_size = 65536):
+
+    '''Stream the items of a single array in a JSON document. See `_iter_json_arrays()`.'''
+
+    for _, item in _iter_json_arrays(stream, [path], chunk_size = chunk_size):
+        yield item
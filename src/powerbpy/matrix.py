@@ -55,7 +55,10 @@ class _Matrix(_Visual):
                  title_font_family=None,
                  title_bold=None,
                  border_color=None,
-                 border_width=None):
+                 border_width=None,
+                 top_n=None,
+                 top_n_by=None,
+                 top_n_direction="Top"):
         '''
         Parameters
         ----------
@@ -67,6 +70,12 @@ class _Matrix(_Visual):
             - Column with aggregation: {"column": "col", "aggregation": "Sum"}
         columns : list of dict, optional
             Column pivot fields. Each dict: {"column": "col_name"}.
+        top_n : int or bool, optional
+            Only query the top_n values of the first row field. True keeps 100.
+        top_n_by : dict, optional
+            What to rank the rows by, in the same format as values. Defaults to the first value.
+        top_n_direction : str
+            "Top" keeps the largest values, "Bottom" the smallest.
         '''
 
         super().__init__(page=page,
@@ -194,6 +203,13 @@ class _Matrix(_Visual):
             }
         }
 
+        if top_n is not None:
+            self._add_top_n_filter(data_source=data_source,
+                                   column=rows[0]["column"],
+                                   top_n=top_n,
+                                   top_n_by=top_n_by or values[0],
+                                   direction=top_n_direction)
+
         # Write out the json
         with open(self.visual_json_path, "w", encoding="utf-8") as file:
             json.dump(self.visual_json, file, indent=2)
@@ -0,0 +1,177 @@
+'''Estimate how much memory a generated semantic model will need once it is refreshed.
+    You should never call these functions directly, instead use the estimate_model_size() method attached to the Dashboard class.
+'''
+
+import math
+import warnings
+
+import pandas as pd # pylint: disable=import-error
+
+# Rough VertiPaq storage costs (bytes) --------------------------------------------------------
+# Each hash dictionary entry carries the value plus a hash bucket and a pointer
+_HASH_ENTRY_OVERHEAD = 20
+
+# Numbers and dates are stored in the dictionary as 8 byte values
+_NUMERIC_WIDTH = 8
+
+# Attribute hierarchies keep two 4 byte position maps per distinct value
+_HIERARCHY_BYTES_PER_VALUE = 8
+
+# Value encoding is only used when the range of a whole number column fits in 32 bits
+_MAX_VALUE_ENCODING_RANGE = 2 ** 32
+
+# A column whose distinct values are more than this share of its rows is treated as an identifier
+_UNIQUE_RATIO = 0.9
+
+
+def _scale_profile(profile, row_count):
+
+    '''Scale a column profile gathered from a sample up to the real number of rows
+
+    Notes
+    -----
+    Identifier-like columns (almost every value distinct) grow with the table, everything else is assumed to have already seen all its distinct values in the sample.
+    '''
+
+    scaled = dict(profile)
+
+    if row_count is None or profile["row_count"] == 0:
+        return scaled
+
+    ratio = row_count / profile["row_count"]
+    non_null_rows = profile["row_count"] - profile["null_count"]
+
+    scaled["row_count"] = row_count
+    scaled["null_count"] = round(profile["null_count"] * ratio)
+
+    if non_null_rows > 0 and profile["cardinality"] / non_null_rows > _UNIQUE_RATIO:
+        scaled["cardinality"] = round(profile["cardinality"] * ratio)
+
+    return scaled
+
+
+def _estimate_column_size(profile):
+
+    '''Estimate the dictionary, data and hierarchy size of a single column
+
+    Parameters
+    ----------
+    profile: dict
+        A column profile created by `_DataSet._profile_columns()`.
+
+    Returns
+    -------
+    dict
+        The encoding VertiPaq would probably pick and the estimated size of each structure in bytes.
+    '''
+
+    rows = profile["row_count"]
+    cardinality = profile["cardinality"]
+
+    # blanks get their own slot in the dictionary
+    distinct_ids = cardinality + (1 if profile["null_count"] > 0 else 0)
+
+    # HASH encoding: every value is replaced by its position in a dictionary of distinct values
+    if profile["data_type"] == "string":
+        # strings are stored as UTF-16
+        entry_width = profile["avg_width"] * 2
+    else:
+        entry_width = _NUMERIC_WIDTH
+
+    encoding = "HASH"
+    bits = max(1, math.ceil(math.log2(max(distinct_ids, 1) + 1)))
+    dictionary_bytes = round(distinct_ids * (entry_width + _HASH_ENTRY_OVERHEAD))
+
+    # VALUE encoding: whole numbers are stored as an offset from the minimum, with no dictionary
+    # VertiPaq picks it when the bit packed offsets are cheaper than the hash dictionary
+    if profile.get("is_whole_number") and profile["min"] is not None:
+        value_range = profile["max"] - profile["min"] + 1
+        value_bits = max(1, math.ceil(math.log2(value_range + 1)))
+
+        if value_range < _MAX_VALUE_ENCODING_RANGE and rows * value_bits / 8 <= rows * bits / 8 + dictionary_bytes:
+            encoding = "VALUE"
+            bits = value_bits
+            dictionary_bytes = 0
+
+    # bit packed segments, before run length encoding (so this is an upper bound)
+    data_bytes = math.ceil(rows * bits / 8)
+    hierarchy_bytes = distinct_ids * _HIERARCHY_BYTES_PER_VALUE
+
+    return {"encoding": encoding,
+            "bits_per_value": bits,
+            "dictionary_bytes": dictionary_bytes,
+            "data_bytes": data_bytes,
+            "hierarchy_bytes": hierarchy_bytes,
+            "total_bytes": dictionary_bytes + data_bytes + hierarchy_bytes}
+
+
+def _estimate_model_size(datasets,
+                         row_counts = None,
+                         level = "column",
+                         max_model_size_mb = None):
+
+    '''Estimate the size of every column (or table) in a list of datasets
+
+    Parameters
+    ----------
+    datasets: list
+        The datasets attached to a dashboard. Datasets without column profiles (for example TMDL datasets) are skipped.
+    row_counts: dict
+        Optional. The real number of rows for tables that were ingested from a sample, keyed by dataset name.
+    level: str
+        Either "column" or "table".
+    max_model_size_mb: float
+        Optional. Warn if the estimated model is bigger than this.
+
+    Returns
+    -------
+    DataFrame
+        A ranked report, biggest consumers first.
+    '''
+
+    if level not in ("column", "table"):
+        raise ValueError("level must be either 'column' or 'table'")
+
+    row_counts = row_counts or {}
+    rows = []
+
+    for dataset in datasets:
+        profiles = getattr(dataset, "col_profiles", None)
+
+        if not profiles:
+            continue
+
+        for profile in profiles:
+            profile = _scale_profile(profile, row_counts.get(dataset.dataset_name))
+
+            rows.append({"table": dataset.dataset_name,
+                         "column": profile["column"],
+                         "data_type": profile["data_type"],
+                         "rows": profile["row_count"],
+                         "cardinality": profile["cardinality"],
+                         **_estimate_column_size(profile)})
+
+    report = pd.DataFrame(rows, columns=["table", "column", "data_type", "rows", "cardinality",
+                                         "encoding", "bits_per_value", "dictionary_bytes",
+                                         "data_bytes", "hierarchy_bytes", "total_bytes"])
+
+    if level == "table":
+        report = report.groupby("table", as_index=False).agg(
+                                         rows=("rows", "max"),
+                                         columns=("column", "count"),
+                                         dictionary_bytes=("dictionary_bytes", "sum"),
+                                         data_bytes=("data_bytes", "sum"),
+                                         hierarchy_bytes=("hierarchy_bytes", "sum"),
+                                         total_bytes=("total_bytes", "sum"))
+
+    model_bytes = report["total_bytes"].sum()
+
+    report = report.sort_values("total_bytes", ascending=False).reset_index(drop=True)
+    report["pct_of_model"] = (report["total_bytes"] / model_bytes * 100).round(2) if model_bytes else 0.0
+
+    if max_model_size_mb is not None and model_bytes > max_model_size_mb * 1024 ** 2:
+        warnings.warn(f"The estimated model size ({model_bytes / 1024 ** 2:,.1f} MB) is larger than {max_model_size_mb:,} MB. "
+                      f"The biggest consumer is {report.loc[0, 'table']}"
+                      f"{'' if level == 'table' else '[' + str(report.loc[0, 'column']) + ']'}.")
+
+    return report
@@ -77,7 +77,11 @@ class _Page:
                              img_path,
                              *,
                              alpha = 51,
-                             scaling_method = "Fit"):
+                             scaling_method = "Fit",
+                             optimize = False,
+                             quality = 80,
+                             image_format = None,
+                             max_size = None):
 
 
         '''Add a background image to a page
@@ -89,6 +93,14 @@ class _Page:
             The transparency of the background image. Must be a whole integer between 1 and 100.
         scaling_method : str
             The method used to scale the image available options include ["Fit", ]
+        optimize : bool
+            Shrink the image before adding it to the report: downscale it to fit the page (images are never enlarged), re-encode it and drop its EXIF and other metadata. This needs Pillow (`pip install powerbpy[images]`). Defaults to False, which adds the original file.
+        quality : int
+            The JPEG quality (1-95) used when optimizing. Defaults to 80.
+        image_format : str
+            "JPEG" or "PNG" to convert the image to when optimizing. Defaults to keeping JPEGs as JPEG and saving everything else as PNG. Transparent images converted to JPEG are put on a white background.
+        max_size : tuple
+            The (width, height) in pixels the optimized image has to fit in. Defaults to the page's size (1280 x 720 unless you changed it).
 
         Notes
         ----
@@ -109,7 +121,11 @@ class _Page:
         background_image = _BackgroundImage(self,
                          img_path,
                          alpha,
-                         scaling_method)
+                         scaling_method,
+                         optimize = optimize,
+                         quality = quality,
+                         image_format = image_format,
+                         max_size = max_size)
 
         self.background_images.append(background_image)
         return background_image
@@ -148,7 +164,10 @@ class _Page:
                  title_bold=None,
                  border_color=None,
                  border_width=None,
-                 tooltip_page=None):
+                 tooltip_page=None,
+                 top_n=None,
+                 top_n_by=None,
+                 top_n_direction="Top"):
 
         '''Add a bar chart to a page
         Parameters
@@ -188,6 +207,32 @@ class _Page:
             This should be a valid id code for another Power BI visual. If supplied the current visual will be nested inside the parent group.
         z_position : int
             The z index for the visual. (Larger numbers mean more to the front, smaller numbers mean more to the back). Defaults to 6000.
+        top_n : int or bool
+            Optional. Only show the top (or bottom) top_n x_axis_var categories, ranked by top_n_by. This adds a visual level TopN filter, so a high cardinality axis doesn't pull every category into the visual. Pass True to keep 30 categories.
+        top_n_by : dict
+            Optional. What to rank the categories by, either {"measure": "measure name"} or {"column": "column name", "aggregation": "Sum"}. Defaults to the y axis value.
+        top_n_direction : str
+            "Top" keeps the largest values, "Bottom" the smallest. Defaults to "Top".
+
+        Notes
+        ----
+        Here's some example code that only shows the 10 states that lost the most colonies:
+
+        ```python
+        page.add_chart(visual_id="colonies_lost_by_state",
+                       data_source="colony",
+                       chart_title="Colonies Lost by State",
+                       x_axis_title="State",
+                       y_axis_title="Colonies Lost",
+                       x_axis_var="state",
+                       y_axis_var="colony_lost",
+                       y_axis_var_aggregation_type="Sum",
+                       x_position=0,
+                       y_position=0,
+                       height=300,
+                       width=600,
+                       top_n=10)
+        ```
         '''
 
         from powerbpy.chart import _Chart
@@ -224,7 +269,10 @@ class _Page:
                  title_bold=title_bold,
                  border_color=border_color,
                  border_width=border_width,
-                 tooltip_page=tooltip_page)
+                 tooltip_page=tooltip_page,
+                 top_n=top_n,
+                 top_n_by=top_n_by,
+                 top_n_direction=top_n_direction)
 
         self.visuals.append(chart)
         return chart
@@ -602,7 +650,9 @@ class _Page:
                   parent_group_id = None,
                  alt_text = "A shape map",
                  background_color = None,
-                 background_color_alpha=None):
+                 background_color_alpha=None,
+                 simplify_tolerance = None,
+                 quantization = None):
 
         '''Add a map to a page
         ![Example of a shape map created by the function](https://github.com/Russell-Shean/powerbpy/raw/main/docs/assets/images/page2.gif?raw=true "Example Shape Map")
@@ -622,7 +672,7 @@ class _Page:
         color_var : str
             The name of the column in data_source that you want to use for the color variable on the map. This variable should be numeric.
         filtering_var : str
-            Optional. The name of a column in data source that you want to use to filter the color variable on the map. This must be supplied if providing percentile_bin_breaks. If you want to use percentiles without filtering (ie on static data), you should calculate the percentiles yourself and pass them to static_bin_breaks. Do not provide both static_bin_breaks and a filtering_var.
+            Optional. The name of a column in data source that you want to use to filter the color variable on the map. If it is provided with percentile_bin_breaks, the bins are recalculated in Power BI whenever the data is filtered. Without it, percentile_bin_breaks are calculated once in python from the data loaded into the dashboard and used as static bins. Do not provide both static_bin_breaks and a filtering_var.
         static_bin_breaks : list
             This should be a list of numbers that you want to use to create bins in your data. There should be one more entry in the list than the number of bins you want and therefore the number of colors passed to the color_palette argument. The function will create bins between the first and second number, second and third, third and fourth, etc. A filtering_var cannot be provided if static_bin_breaks is provided. Use percentile bin breaks instead.
         color_palette : list
@@ -630,7 +680,7 @@ class _Page:
         add_legend : bool
             True or False, would you like to add the default legend? (By default legend, I mean this function's default, not the Power BI default).
         percentile_bin_breaks : list
-            This should be a list of percentiles between 0 and 1 that you want to us to create bins in your data. If provided, a filtering_var must also be provided. This will create Power BI measures that dynamically update when the data is filtered by things such as slicers. There should be one more entry in the list than the number of bins you want and therefore the number of colors passed to the color_palette argument. Here's an example use case: to create 5 equal sized bins pass this list: [0,0.2,0.4,0.6,0.8,1]
+            This should be a list of percentiles between 0 and 1 that you want to us to create bins in your data. If a filtering_var is also provided, this will create Power BI measures that dynamically update when the data is filtered by things such as slicers. There should be one more entry in the list than the number of bins you want and therefore the number of colors passed to the color_palette argument. Here's an example use case: to create 5 equal sized bins pass this list: [0,0.2,0.4,0.6,0.8,1]
         height : int
             The height of the map on the page.
         width : int
@@ -647,10 +697,15 @@ class _Page:
             This should be a valid id code for another Power BI visual. If supplied the current visual will be nested inside the parent group.
         alt_text : str
             Alternate text for the visualization can be provided as an argument. This is important for screen readers (accessibility) or if the visualization doesn't load properly.
+        simplify_tolerance : float
+            Optional. Simplify the shapes before adding them to the report: points closer than this distance (in the units of the shape file's coordinates, usually degrees) to a simplified border are removed. Shared borders are simplified once, so neighboring shapes still line up. GeoJSON files are converted to TopoJSON. The size and number of points before and after are stored in the map's `shape_file_report` attribute.
+        quantization : int
+            Optional. Round the coordinates to a grid this many steps wide and tall. Defaults to 100000 when simplify_tolerance is provided.
 
         Notes
         -----
         This function creates a new choropleth map on a page.
+        Large shape files make reports slow to open. Use `Dashboard.simplify_shape_file()` to try a few tolerances before adding the map.
         '''
 
         from powerbpy.shape_map import _ShapeMap
@@ -676,7 +731,9 @@ class _Page:
                   parent_group_id = parent_group_id,
                  alt_text = alt_text,
                  background_color=background_color,
-                 background_color_alpha=background_color_alpha)
+                 background_color_alpha=background_color_alpha,
+                 simplify_tolerance = simplify_tolerance,
+                 quantization = quantization)
 
         self.visuals.append(shape_map)
         return shape_map
@@ -687,15 +744,16 @@ class _Page:
                          visual_id,
                             data_source,
                             starting_var,
-                            starting_var_values,
                             ending_var,
-                            ending_var_values,
                             values_from_var,
                             x_position,
                             y_position,
                             height,
                             width,
                             chart_title,
+                            starting_var_values=None,
+                            ending_var_values=None,
+                            links_from_data=False,
                             link_colors=None,
                             alt_text="A sanky chart",
                             parent_group_id=None,
@@ -716,11 +774,13 @@ class _Page:
         starting_var : str
             Which variable from the data_source, do you want to use for the left side of the sanky chart?
         starting_var_values : list
-            Which individual values do you want to use for the left side of the sanky chart? In general, this will probably mean all the unique values in the starting_var column. This function assumes that you already know the structure of your data and can pass a list of unique values.
+            Which individual values do you want to use for the left side of the sanky chart? In general, this will probably mean all the unique values in the starting_var column. If not provided, the unique values are read from the data loaded into the dashboard (local or blob csv datasets only).
         ending_var : str
             Which variable from the data_source, do you want to use for the right side of the sanky chart?
         ending_var_values : list
-            Which individual values do you want to use for the right side of the sanky chart? In general, this will probably mean all the unique values in the starting_var column. This function assumes that you already know the structure of your data and can pass a list of unique values.
+            Which individual values do you want to use for the right side of the sanky chart? In general, this will probably mean all the unique values in the ending_var column. If not provided, the unique values are read from the data loaded into the dashboard (local or blob csv datasets only).
+        links_from_data : bool
+            By default a link is written for every combination of starting_var_values and ending_var_values. If True, links are only written for the pairs that actually occur in the data, which keeps visual.json small when there are many categories. Needs a local or blob csv dataset. Defaults to False.
         values_from_var : str
             This is the variable that you want to count unique instances of as grouped by starting and ending variables. For now it only counts unique variables, but I'd like to add the option to provide a sum too.
         chart_title : str
@@ -730,7 +790,7 @@ class _Page:
         chart_title_font_size : int
             Chart title font size
         link_colors : list
-            Here you can provide a list of Hex code colors for the connections between the different categories in the Sanky chart. In general this should be equal to the length of starting_var_values multiplied by the length of ending_var_values. If an argument is not provided the function assigns default colors.
+            Here you can provide a list of Hex code colors for the connections between the different categories in the Sanky chart. In general this should be equal to the length of starting_var_values multiplied by the length of ending_var_values, or the number of pairs in the data when links_from_data is True. If an argument is not provided the function assigns default colors.
         x_position : int
             The x coordinate of where you want to put the chart on the page. The origin is the page's top left corner.
         y_position : int
@@ -758,6 +818,7 @@ class _Page:
                             starting_var_values=starting_var_values,
                             ending_var=ending_var,
                             ending_var_values=ending_var_values,
+                            links_from_data=links_from_data,
                             values_from_var=values_from_var,
                             x_position=x_position,
                             y_position=y_position,
@@ -795,7 +856,10 @@ class _Page:
                             alt_text="A table",
                             parent_group_id=None,
                             background_color="#FFFFFF",
-                            background_color_alpha=None ):
+                            background_color_alpha=None,
+                            top_n=None,
+                            top_n_by=None,
+                            top_n_direction="Top"):
 
         '''Add a table to a page
         Parameters
@@ -829,6 +893,12 @@ class _Page:
             This should be a valid id code for another Power BI visual. If supplied the current visual will be nested inside the parent group.    
         alt_text : str
             Alternate text for the visualization can be provided as an argument. This is important for screen readers (accessibility) or if the visualization doesn't load properly.
+        top_n : int or bool
+            Optional. Only show the rows for the top (or bottom) top_n values of the first variable, ranked by top_n_by. This adds a visual level TopN filter. Pass True to keep 100 values.
+        top_n_by : dict
+            What to rank the first variable by, either {"measure": "measure name"} or {"column": "column name", "aggregation": "Sum"}. Required with top_n, because a table has no value of its own to rank by.
+        top_n_direction : str
+            "Top" keeps the largest values, "Bottom" the smallest. Defaults to "Top".
         '''
 
         from powerbpy.table import _Table
@@ -850,7 +920,10 @@ class _Page:
                             background_color=background_color,
                             background_color_alpha=background_color_alpha,
                             tab_order = tab_order,
-                            z_position = z_position)
+                            z_position = z_position,
+                            top_n=top_n,
+                            top_n_by=top_n_by,
+                            top_n_direction=top_n_direction)
 
         self.visuals.append(table)
         return table
@@ -880,7 +953,10 @@ class _Page:
                     title_font_family=None,
                     title_bold=None,
                     border_color=None,
-                    border_width=None):
+                    border_width=None,
+                    top_n=None,
+                    top_n_by=None,
+                    top_n_direction="Top"):
 
         '''Add a treemap to a page
 
@@ -904,6 +980,12 @@ class _Page:
             Show value labels on rectangles. Default False.
         x_position, y_position, height, width : int
             Position and size on the page.
+        top_n : int or bool, optional
+            Only show the top_n groups, ranked by top_n_by. True keeps 50.
+        top_n_by : dict, optional
+            {"measure": "measure name"} or {"column": "column name", "aggregation": "Sum"}. Defaults to the value.
+        top_n_direction : str
+            "Top" keeps the largest values, "Bottom" the smallest. Default "Top".
         '''
 
         from powerbpy.treemap import _Treemap
@@ -931,7 +1013,10 @@ class _Page:
                     title_font_family=title_font_family,
                     title_bold=title_bold,
                     border_color=border_color,
-                    border_width=border_width)
+                    border_width=border_width,
+                    top_n=top_n,
+                    top_n_by=top_n_by,
+                    top_n_direction=top_n_direction)
 
         self.visuals.append(treemap)
         return treemap
@@ -1179,7 +1264,10 @@ class _Page:
                     title_font_family=None,
                     title_bold=None,
                     border_color=None,
-                    border_width=None):
+                    border_width=None,
+                    top_n=None,
+                    top_n_by=None,
+                    top_n_direction="Top"):
 
         '''Add a scatter/bubble chart to a page
 
@@ -1201,6 +1289,12 @@ class _Page:
             DAX measure for bubble size.
         x_position, y_position, height, width : int
             Position and size on the page.
+        top_n : int or bool, optional
+            Only plot the top_n category_column values, ranked by top_n_by. True keeps 1000.
+        top_n_by : dict, optional
+            {"measure": "measure name"} or {"column": "column name", "aggregation": "Sum"}. Defaults to size_measure, or y_measure.
+        top_n_direction : str
+            "Top" keeps the largest values, "Bottom" the smallest. Default "Top".
         '''
 
         from powerbpy.scatter import _Scatter
@@ -1227,7 +1321,10 @@ class _Page:
                            title_font_family=title_font_family,
                            title_bold=title_bold,
                            border_color=border_color,
-                           border_width=border_width)
+                           border_width=border_width,
+                           top_n=top_n,
+                           top_n_by=top_n_by,
+                           top_n_direction=top_n_direction)
 
         self.visuals.append(scatter)
         return scatter
@@ -1256,7 +1353,10 @@ class _Page:
                    title_font_family=None,
                    title_bold=None,
                    border_color=None,
-                   border_width=None):
+                   border_width=None,
+                   top_n=None,
+                   top_n_by=None,
+                   top_n_direction="Top"):
 
         '''Add a matrix (pivot table) to a page
 
@@ -1278,6 +1378,12 @@ class _Page:
             Column pivot fields. Each: {"column": "col_name"}.
         x_position, y_position, height, width : int
             Position and size on the page.
+        top_n : int or bool, optional
+            Only show the top_n values of the first row field, ranked by top_n_by. True keeps 100.
+        top_n_by : dict, optional
+            In the same format as values. Defaults to the first value.
+        top_n_direction : str
+            "Top" keeps the largest values, "Bottom" the smallest. Default "Top".
         '''
 
         from powerbpy.matrix import _Matrix
@@ -1303,7 +1409,55 @@ class _Page:
                          title_font_family=title_font_family,
                          title_bold=title_bold,
                          border_color=border_color,
-                         border_width=border_width)
+                         border_width=border_width,
+                         top_n=top_n,
+                         top_n_by=top_n_by,
+                         top_n_direction=top_n_direction)
 
         self.visuals.append(matrix)
         return matrix
+
+    def set_interactions(self,
+                         interactions=None,
+                         *,
+                         default=None,
+                         slicers=None):
+
+        '''Choose which visuals on the page filter or highlight each other
+
+        Parameters
+        ----------
+        interactions : dict
+            Optional. Interactions for specific visuals. Use a visual_id as the key to set how that visual affects every other visual on the page, or a (source visual_id, target visual_id) tuple to set a single pair.
+        default : str
+            Optional. The interaction for every pair of visuals not covered by interactions or slicers.
+        slicers : str
+            Optional. How the slicers on the page affect every other visual.
+
+        Returns
+        -------
+        DataFrame
+            The source, target and type of every interaction on the page that isn't the Power BI default.
+
+        Notes
+        ----
+        The available interaction types are "Filter", "Highlight", "None" (clicking the source does nothing to the target) and "Default" (whatever Power BI does for that visual type).
+        By default a click in any visual re-queries every other visual on the page. On pages with many visuals that's a lot of queries, so turning off the interactions you don't need makes the page faster.
+        The most specific setting wins: a (source, target) pair, then a source visual, then slicers, then default. Pairs that none of them cover keep their current interaction.
+        Text boxes, buttons, images and visual groups don't query data, so they're left out. Run this after adding all the page's visuals, visuals added later use the Power BI default.
+
+        Here's some example code where the slicers filter everything, the map highlights the bar chart and the other visuals don't affect each other:
+
+        ```python
+        page1.set_interactions({("bee_map", "colonies_by_state"): "Highlight"},
+                               slicers = "Filter",
+                               default = "None")
+        ```
+        '''
+
+        from powerbpy.interactions import _set_interactions
+
+        return _set_interactions(self,
+                                 interactions=interactions,
+                                 default=default,
+                                 slicers=slicers)
@@ -0,0 +1,207 @@
+'''Read Power BI Desktop Performance Analyzer exports and attribute the time spent to the visuals and pages powerbpy generated.
+    You should never call these functions directly, instead use the load_performance_log() method attached to the Dashboard class.
+'''
+
+from datetime import datetime
+
+import pandas as pd # pylint: disable=import-error
+
+from powerbpy.json_stream import _iter_json_arrays
+from powerbpy.report_index import _field_refs, _iter_visuals
+
+# the event that wraps everything a visual does while it loads
+_LIFECYCLE_EVENT = "Visual Container Lifecycle"
+
+# Performance Analyzer's categories (everything else inside a visual's lifecycle is "other")
+_EVENT_CATEGORIES = {"Execute DAX Query": "dax_query_ms",
+                     "Execute Direct Query": "direct_query_ms",
+                     "Render": "visual_display_ms"}
+
+_TIMING_COLUMNS = ["dax_query_ms", "direct_query_ms", "visual_display_ms", "other_ms", "total_ms"]
+
+
+def _parse_time(value):
+
+    '''Parse a Performance Analyzer timestamp (ISO 8601, usually in UTC)'''
+
+    if value is None:
+        return None
+
+    try:
+        return datetime.fromisoformat(value.replace("Z", "+00:00"))
+    except ValueError:
+        # older pythons only accept 3 or 6 digit fractions
+        return pd.Timestamp(value).to_pydatetime()
+
+
+def _read_events(log_path):
+
+    '''Stream the events out of a Performance Analyzer export and keep only what's needed to time them
+
+    Returns
+    -------
+    dict
+        id -> {"name", "parent_id", "start", "end", "visual_id"}. Start and end records written separately for the same id are merged.
+    '''
+
+    events = {}
+
+    with open(log_path, "rb") as stream:
+        # exports are {"version": ..., "events": [...]}, but accept a bare list of events too
+        for _, event in _iter_json_arrays(stream, [("events",), ()]):
+            if not isinstance(event, dict):
+                continue
+
+            event_id = event.get("id") or f"__event_{len(events)}"
+            metrics = event.get("metrics") or {}
+
+            record = events.setdefault(event_id, {"name": event.get("name"),
+                                                  "parent_id": event.get("parentId"),
+                                                  "start": None,
+                                                  "end": None,
+                                                  "visual_id": None})
+
+            record["parent_id"] = record["parent_id"] or event.get("parentId")
+            record["visual_id"] = record["visual_id"] or metrics.get("visualId")
+
+            start = _parse_time(event.get("start"))
+            end = _parse_time(event.get("end"))
+
+            if start is not None and (record["start"] is None or start < record["start"]):
+                record["start"] = start
+            if end is not None and (record["end"] is None or end > record["end"]):
+                record["end"] = end
+
+    return events
+
+
+def _lifecycle_of(event_id, events, cache):
+
+    '''Follow the parentId chain up to the visual's lifecycle event'''
+
+    chain = []
+    root = None
+
+    while event_id is not None:
+        if event_id in cache:
+            root = cache[event_id]
+            break
+
+        event = events.get(event_id)
+
+        # guard against missing parents and (malformed) cycles
+        if event is None or len(chain) > len(events):
+            break
+
+        chain.append(event_id)
+
+        if event["name"] == _LIFECYCLE_EVENT:
+            root = event_id
+            break
+
+        event_id = event["parent_id"]
+
+    for seen in chain:
+        cache[seen] = root
+
+    return root
+
+
+def _duration_ms(event):
+    if event["start"] is None or event["end"] is None:
+        return 0.0
+
+    return (event["end"] - event["start"]).total_seconds() * 1000
+
+
+def _load_performance_log(log_path,
+                          pages_folder,
+                          by = "visual"):
+
+    '''Aggregate a Performance Analyzer export per visual or per page
+
+    Parameters
+    ----------
+    log_path: str
+        The path to the exported json file.
+    pages_folder: str
+        The report's pages folder, used to map visual ids back to pages and fields.
+    by: str
+        Either "visual" or "page".
+
+    Returns
+    -------
+    DataFrame
+        The time spent in each category, slowest first.
+    '''
+
+    # pylint: disable=too-many-locals
+
+    if by not in ("visual", "page"):
+        raise ValueError("by must be either 'visual' or 'page'")
+
+    events = _read_events(log_path)
+
+    # time every lifecycle, then add its children's time to the right category
+    lifecycles = {event_id: {"visual_id": event["visual_id"], "total_ms": _duration_ms(event),
+                             "dax_query_ms": 0.0, "direct_query_ms": 0.0, "visual_display_ms": 0.0}
+                  for event_id, event in events.items() if event["name"] == _LIFECYCLE_EVENT}
+
+    cache = {}
+    for event_id, event in events.items():
+        category = _EVENT_CATEGORIES.get(event["name"])
+
+        if category is None:
+            continue
+
+        root = _lifecycle_of(event["parent_id"], events, cache)
+
+        if root is not None:
+            lifecycles[root][category] += _duration_ms(event)
+
+    visuals = {visual["visual_id"]: visual for visual in _iter_visuals(pages_folder)}
+    rows = {}
+
+    for lifecycle in lifecycles.values():
+        visual_id = lifecycle["visual_id"]
+        visual = visuals.get(visual_id, {})
+
+        row = rows.setdefault(visual_id, {"page_id": visual.get("page_id"),
+                                          "page_name": visual.get("page_name"),
+                                          "visual_id": visual_id,
+                                          "visual_type": visual.get("visual_type"),
+                                          "visual_title": visual.get("visual_title"),
+                                          "in_report": visual_id in visuals,
+                                          "fields": sorted(f"{table}[{field}]" for table, field, _ in _field_refs(visual.get("visual", {}))),
+                                          "loads": 0,
+                                          "max_total_ms": 0.0,
+                                          **{column: 0.0 for column in _TIMING_COLUMNS}})
+
+        other_ms = lifecycle["total_ms"] - lifecycle["dax_query_ms"] - lifecycle["direct_query_ms"] - lifecycle["visual_display_ms"]
+
+        row["loads"] += 1
+        row["dax_query_ms"] += lifecycle["dax_query_ms"]
+        row["direct_query_ms"] += lifecycle["direct_query_ms"]
+        row["visual_display_ms"] += lifecycle["visual_display_ms"]
+        row["other_ms"] += max(other_ms, 0.0)
+        row["total_ms"] += lifecycle["total_ms"]
+        row["max_total_ms"] = max(row["max_total_ms"], lifecycle["total_ms"])
+
+    report = pd.DataFrame(list(rows.values()),
+                          columns=["page_id", "page_name", "visual_id", "visual_type", "visual_title", "in_report",
+                                   "fields", "loads", *_TIMING_COLUMNS, "max_total_ms"])
+
+    if by == "page":
+        report = report.groupby(["page_id", "page_name"], as_index=False, dropna=False).agg(
+                                visuals=("visual_id", "count"),
+                                loads=("loads", "sum"),
+                                **{column: (column, "sum") for column in _TIMING_COLUMNS})
+
+        slowest = (pd.DataFrame(list(rows.values()), columns=["page_id", "visual_id", "total_ms"])
+                   .sort_values("total_ms", ascending=False)
+                   .drop_duplicates("page_id"))
+        report["slowest_visual"] = report["page_id"].map(dict(zip(slowest["page_id"], slowest["visual_id"])))
+
+    report[_TIMING_COLUMNS] = report[_TIMING_COLUMNS].round(1)
+
+    return report.sort_values("total_ms", ascending=False).reset_index(drop=True)
@@ -0,0 +1,150 @@
+'''Keep track of the files (images, shape files) a report uses in its StaticResources/RegisteredResources folder.
+    You should never need to use this class directly, background images and shape maps register their files through it.
+'''
+
+import hashlib
+import json
+import os
+import shutil
+
+_PACKAGE_NAME = "RegisteredResources"
+
+
+def _file_hash(path):
+
+    '''The sha256 of a file's content'''
+
+    digest = hashlib.sha256()
+
+    with open(path, "rb") as file:
+        for chunk in iter(lambda: file.read(1 << 20), b""):
+            digest.update(chunk)
+
+    return digest.hexdigest()
+
+
+class _ResourceRegistry:
+
+    '''A content addressed store for a dashboard's registered resources
+
+    Every unique file is copied into the RegisteredResources folder once, however many pages or visuals use it.
+    Different files that happen to have the same name get different names in the report instead of overwriting each other.
+    report.json is kept in memory between calls and only read again if something else changed it on disk.
+    '''
+
+    def __init__(self, dashboard):
+        self.dashboard = dashboard
+        self.folder = dashboard.registered_resources_folder
+
+        self._hashes = None
+        self._report_json = None
+        self._report_json_stamp = None
+
+    def _index(self):
+
+        '''content hash -> file name for every file already in the folder (for example in a dashboard that was loaded)'''
+
+        if self._hashes is None:
+            self._hashes = {}
+
+            if os.path.isdir(self.folder):
+                for name in sorted(os.listdir(self.folder)):
+                    path = os.path.join(self.folder, name)
+
+                    if os.path.isfile(path):
+                        self._hashes.setdefault(_file_hash(path), name)
+
+        return self._hashes
+
+    def _stamp(self):
+        stat = os.stat(self.dashboard.report_json_path)
+        return stat.st_mtime_ns, stat.st_size
+
+    def report_json(self):
+
+        '''The parsed report.json, read from disk only when it changed since the last call'''
+
+        stamp = self._stamp()
+
+        if self._report_json is None or stamp != self._report_json_stamp:
+            with open(self.dashboard.report_json_path, "r", encoding="utf-8") as file:
+                self._report_json = json.load(file)
+
+            self._report_json_stamp = stamp
+
+        return self._report_json
+
+    def _package(self, report_json):
+
+        for package in report_json.setdefault("resourcePackages", []):
+            if package.get("name") == _PACKAGE_NAME:
+                return package
+
+        package = {"name": _PACKAGE_NAME, "type": _PACKAGE_NAME, "items": []}
+        report_json["resourcePackages"].append(package)
+        return package
+
+    def _register_item(self, name, resource_type):
+
+        '''Make sure report.json lists the resource exactly once, and write it only if that changed anything'''
+
+        report_json = self.report_json()
+        package = self._package(report_json)
+
+        items = []
+        seen = set()
+        for item in package.get("items", []):
+            if item.get("path") not in seen:
+                seen.add(item.get("path"))
+                items.append(item)
+
+        if name not in seen:
+            items.append({"name": name, "path": name, "type": resource_type})
+
+        if items != package.get("items"):
+            package["items"] = items
+
+            with open(self.dashboard.report_json_path, "w", encoding="utf-8") as file:
+                json.dump(report_json, file, indent = 2)
+
+            self._report_json_stamp = self._stamp()
+
+    def add(self, source_path, resource_type, name = None):
+
+        '''Copy a file into the registered resources (unless the same content is already there) and list it in report.json
+
+        Parameters
+        ----------
+        source_path: str
+            The file to add.
+        resource_type: str
+            The report.json item type, for example "Image" or "ShapeMap".
+        name: str
+            The name to give the file in the report. Defaults to the basename of source_path.
+
+        Returns
+        -------
+        str
+            The name of the resource in the report. Use this in visual and page json, it isn't always the name you asked for.
+        '''
+
+        name = name or os.path.basename(source_path)
+        content_hash = _file_hash(source_path)
+        hashes = self._index()
+
+        if content_hash in hashes:
+            name = hashes[content_hash]
+
+        else:
+            # a different file already has this name: keep both
+            if os.path.exists(os.path.join(self.folder, name)):
+                stem, extension = os.path.splitext(name)
+                name = f"{stem}_{content_hash[:8]}{extension}"
+
+            os.makedirs(self.folder, exist_ok = True)
+            shutil.copyfile(source_path, os.path.join(self.folder, name))
+            hashes[content_hash] = name
+
+        self._register_item(name, resource_type)
+
+        return name
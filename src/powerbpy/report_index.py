@@ -0,0 +1,157 @@
+'''Helpers that walk a dashboard's report definition (pages and visuals) and find the model fields each object uses.
+    You should never call these functions directly, the Dashboard methods that need them call them for you.
+'''
+
+import json
+import os
+
+# the PBIR expression types that point at a field in the model
+_FIELD_KINDS = {"Column": "column", "Measure": "measure", "PropertyVariationSource": "column"}
+
+
+def _iter_pages(pages_folder, page_ids = None):
+
+    '''Yield (page_id, page_json) for every page in the report, or only the pages in page_ids'''
+
+    if not os.path.isdir(pages_folder):
+        return
+
+    for page_id in sorted(page_ids if page_ids is not None else os.listdir(pages_folder)):
+        page_json_path = os.path.join(pages_folder, page_id, "page.json")
+
+        if not os.path.exists(page_json_path):
+            continue
+
+        with open(page_json_path, "r", encoding="utf-8") as file:
+            yield page_id, json.load(file)
+
+
+def _iter_visuals(pages_folder, page_ids = None, containing = None):
+
+    '''Yield a dictionary describing every visual in the report, or only the visuals on the pages in page_ids
+
+    Parameters
+    ----------
+    containing: str
+        Optional. Skip the visuals whose visual.json doesn't contain this text, without parsing them.
+        For example '"Property"' skips text boxes, buttons and images, which don't reference any fields.
+
+    Returns
+    -------
+    generator
+        Dictionaries with the keys page_id, page_name, visual_id, visual_type, visual_title, path and visual (the parsed visual.json).
+    '''
+
+    for page_id, page_json in _iter_pages(pages_folder, page_ids):
+        visuals_folder = os.path.join(pages_folder, page_id, "visuals")
+
+        if not os.path.isdir(visuals_folder):
+            continue
+
+        for visual_folder in sorted(os.listdir(visuals_folder)):
+            visual_json_path = os.path.join(visuals_folder, visual_folder, "visual.json")
+
+            if not os.path.exists(visual_json_path):
+                continue
+
+            with open(visual_json_path, "r", encoding="utf-8") as file:
+                text = file.read()
+
+            if containing is not None and containing not in text:
+                continue
+
+            visual_json = json.loads(text)
+
+            yield {"page_id": page_id,
+                   "page_name": page_json.get("displayName", page_id),
+                   "visual_id": visual_json.get("name", visual_folder),
+                   "visual_type": visual_json.get("visual", {}).get("visualType"),
+                   "visual_title": _visual_title(visual_json),
+                   "path": visual_json_path,
+                   "visual": visual_json}
+
+
+def _visual_title(visual_json):
+
+    '''Return the literal title text of a visual, if it has one'''
+
+    try:
+        title = visual_json["visual"]["visualContainerObjects"]["title"][0]["properties"]["text"]
+        return title["expr"]["Literal"]["Value"].strip("'")
+
+    except (KeyError, IndexError, TypeError):
+        return None
+
+
+def _source_aliases(node, aliases = None):
+
+    '''Collect the alias -> table mappings declared in "From" clauses (used by filters)'''
+
+    if aliases is None:
+        aliases = {}
+
+    if isinstance(node, dict):
+        for source in node.get("From", []) if isinstance(node.get("From"), list) else []:
+            if isinstance(source, dict) and "Name" in source and "Entity" in source:
+                aliases[source["Name"]] = source["Entity"]
+
+        for value in node.values():
+            _source_aliases(value, aliases)
+
+    elif isinstance(node, list):
+        for value in node:
+            _source_aliases(value, aliases)
+
+    return aliases
+
+
+def _entity(expression, aliases):
+
+    '''Resolve the table a field expression points at'''
+
+    source_ref = expression.get("SourceRef", {}) if isinstance(expression, dict) else {}
+
+    if "Entity" in source_ref:
+        return source_ref["Entity"]
+
+    return aliases.get(source_ref.get("Source"))
+
+
+def _field_refs(node, aliases = None):
+
+    '''Find every model field used anywhere in a piece of report JSON
+
+    Parameters
+    ----------
+    node: dict or list
+        Any part of a visual.json, page.json or report.json file.
+
+    Returns
+    -------
+    set
+        (table, field, kind) tuples where kind is either "column" or "measure".
+    '''
+
+    if aliases is None:
+        aliases = _source_aliases(node)
+
+    refs = set()
+
+    if isinstance(node, dict):
+        for key, kind in _FIELD_KINDS.items():
+            field = node.get(key)
+
+            if isinstance(field, dict) and "Property" in field:
+                table = _entity(field.get("Expression"), aliases)
+
+                if table is not None:
+                    refs.add((table, field["Property"], kind))
+
+        for value in node.values():
+            refs |= _field_refs(value, aliases)
+
+    elif isinstance(node, list):
+        for value in node:
+            refs |= _field_refs(value, aliases)
+
+    return refs
@@ -35,6 +35,7 @@ class _SankyChart(_Visual):
                             #label_font_size,
                             tab_order,
                             z_position,
+                            links_from_data=False,
                             alt_text="A sankey chart"):
 
         '''This function adds a new chart to a page in a power BI dashboard report.
@@ -50,11 +51,13 @@ class _SankyChart(_Visual):
         starting_var: str
             Which variable from the data_source, do you want to use for the left side of the sanky chart?
         starting_var_values: list
-            Which individual values do you want to use for the left side of the sanky chart? In general, this will probably mean all the unique values in the starting_var column. This function is setup to assume that you already know the structure of your data and can pass a list of unique values.
+            Which individual values do you want to use for the left side of the sanky chart? In general, this will probably mean all the unique values in the starting_var column. If None, the unique values are read from the data loaded into the dashboard.
         ending_var: str
             Which variable from the data_source, do you want to use for the right side of the sanky chart?
         ending_var_values: list
-            Which individual values do you want to use for the right side of the sanky chart? In general, this will probably mean all the unique values in the starting_var column. This function is setup to assume that you already know the structure of your data and can pass a list of unique values.
+            Which individual values do you want to use for the right side of the sanky chart? In general, this will probably mean all the unique values in the ending_var column. If None, the unique values are read from the data loaded into the dashboard.
+        links_from_data: bool
+            If True, only write links for the (starting_var, ending_var) pairs that actually occur in the data loaded into the dashboard, instead of every combination of starting_var_values and ending_var_values. Needs a local or blob csv dataset. Defaults to False.
         values_from_var: str
             This is the variable that you want to count unique instances of as grouped by starting and ending variables. For now it only counts unique variables, but I'd like to add the option to provide a sum too
         chart_title: str
@@ -66,7 +69,7 @@ class _SankyChart(_Visual):
         label_font_size: int
             Font size for the labels on the various sanky nodes
         link_colors: list
-            Here you can provide a list of Hex code colors for the connections between the different categories in the Sanky chart. In general this should be equal to the length of starting_var_values multiplied by the length of ending_var_values. If an argument is not provided the function assigns default colors.
+            Here you can provide a list of Hex code colors for the connections between the different categories in the Sanky chart. In general this should be equal to the length of starting_var_values multiplied by the length of ending_var_values (or the number of observed pairs with links_from_data). If an argument is not provided the function assigns default colors.
         x_axis_var: str
             Column name of a column from data_source that you want to use for the x axis of the chart
         y_axis_var: str
@@ -254,81 +257,25 @@ class _SankyChart(_Visual):
             ]
 
 
-        # Create the links between the user provided values
-        # It may be possible with Power BI to specify complicated charts (ie not all the possible nodes link together)
-        # But for now we're just going to link all the provided nodes together
-        for left_var_value in starting_var_values:
-            for right_var_value in ending_var_values:
-                # append to the links list
-                self.visual_json["visual"]["objects"]["links"].append(
+        if links_from_data or starting_var_values is None or ending_var_values is None:
+            starting_var_values, ending_var_values, links = self._observed_links(page.dashboard,
+                                                                                 data_source=data_source,
+                                                                                 starting_var=starting_var,
+                                                                                 starting_var_values=starting_var_values,
+                                                                                 ending_var=ending_var,
+                                                                                 ending_var_values=ending_var_values)
 
-                 {
+            if not links_from_data:
+                # only the value lists were missing, keep linking every pair
+                links = [(left, right) for left in starting_var_values for right in ending_var_values]
 
-                    "properties": {
-                        "fill": {
-                            "solid": {
-                                "color": {
-                                    "expr": {
-                                        "ThemeDataColor": {
-                                            "ColorId": 4,
-                                            "Percent": 0
-                                        }
-                                    }
-                                }
-                            }
-                        }
-                    },
-
-                    "selector": {
-                        "data": [
-                            {
-                                "scopeId": {
-                                    "Comparison": {
-                                        "ComparisonKind": 0,
-                                        "Left": {
-                                            "Column": {
-                                                "Expression": {
-                                                    "SourceRef": {
-                                                        "Entity": data_source
-                                                    }
-                                                },
-                                                "Property": starting_var
-                                            }
-                                        },
-                                        "Right": {
-                                            "Literal": {
-                                                "Value": f"'{left_var_value}'"
-                                            }
-                                        }
-                                    }
-                                }
-                            },
-                            {
-                                "scopeId": {
-                                    "Comparison": {
-                                        "ComparisonKind": 0,
-                                        "Left": {
-                                            "Column": {
-                                                "Expression": {
-                                                    "SourceRef": {
-                                                        "Entity": data_source
-                                                    }
-                                                },
-                                                "Property": ending_var
-                                            }
-                                        },
-                                        "Right": {
-                                            "Literal": {
-                                                "Value": f"'{right_var_value}'"
-                                            }
-                                        }
-                                    }
-                                }
-                            }
-                        ]
-                    }
-                }
-            )
+        else:
+            # link all the provided nodes together
+            links = [(left, right) for left in starting_var_values for right in ending_var_values]
+
+        for left_var_value, right_var_value in links:
+            self.visual_json["visual"]["objects"]["links"].append(
+                self._link(data_source, starting_var, left_var_value, ending_var, right_var_value))
 
         if link_colors:
             # Check to make sure that the number of colors match the number of links
@@ -349,8 +296,13 @@ class _SankyChart(_Visual):
             # Provide some random default colors
             default_link_colors = []
 
-            for i in range(len(ending_var_values)):
-                default_link_colors.extend([i+2] * len(starting_var_values))
+            if links_from_data:
+                # color each link by the node it starts from
+                default_link_colors = [starting_var_values.index(left) + 2 for left, _ in links]
+
+            else:
+                for i in range(len(ending_var_values)):
+                    default_link_colors.extend([i+2] * len(starting_var_values))
 
 
             for i, color in enumerate(default_link_colors):
@@ -368,3 +320,87 @@ class _SankyChart(_Visual):
         # Write out the new json
         with open(self.visual_json_path, "w", encoding="utf-8") as file:
             json.dump(self.visual_json, file, indent = 2)
+
+    @staticmethod
+    def _observed_links(dashboard, *, data_source, starting_var, starting_var_values, ending_var, ending_var_values):
+
+        '''Find the value lists and the (starting, ending) pairs that occur in the data loaded into the dashboard
+
+        Returns
+        -------
+        tuple
+            The starting values, the ending values and the observed pairs. Value lists that were provided are kept (and limit the pairs), missing ones are the sorted unique values of their column.
+        '''
+
+        from powerbpy.dataset_csv import _full_frame
+
+        # web datasets and sampled blob datasets only keep a sample of their data, so they would miss links
+        frame = _full_frame(dashboard.datasets, data_source)
+
+        if frame is None:
+            raise ValueError(f"The data behind {data_source} isn't available in python, so the sanky chart's links can't be read from it. Please provide starting_var_values and ending_var_values and leave links_from_data as False")
+
+        pairs = frame.groupby([starting_var, ending_var], sort=True, observed=True).size().index
+
+        if starting_var_values is None:
+            starting_var_values = pairs.get_level_values(0).unique().tolist()
+
+        if ending_var_values is None:
+            ending_var_values = pairs.get_level_values(1).unique().sort_values().tolist()
+
+        starting_var_values = list(starting_var_values)
+        ending_var_values = list(ending_var_values)
+
+        keep = pairs.get_level_values(0).isin(starting_var_values) & pairs.get_level_values(1).isin(ending_var_values)
+
+        return starting_var_values, ending_var_values, pairs[keep].tolist()
+
+    @staticmethod
+    def _link(data_source, starting_var, left_var_value, ending_var, right_var_value):
+
+        '''The links object for one (starting, ending) pair, with a placeholder fill color'''
+
+        def comparison(variable, value):
+            return {
+                "scopeId": {
+                    "Comparison": {
+                        "ComparisonKind": 0,
+                        "Left": {
+                            "Column": {
+                                "Expression": {
+                                    "SourceRef": {
+                                        "Entity": data_source
+                                    }
+                                },
+                                "Property": variable
+                            }
+                        },
+                        "Right": {
+                            "Literal": {
+                                "Value": f"'{value}'"
+                            }
+                        }
+                    }
+                }
+            }
+
+        return {
+            "properties": {
+                "fill": {
+                    "solid": {
+                        "color": {
+                            "expr": {
+                                "ThemeDataColor": {
+                                    "ColorId": 4,
+                                    "Percent": 0
+                                }
+                            }
+                        }
+                    }
+                }
+            },
+            "selector": {
+                "data": [comparison(starting_var, left_var_value),
+                         comparison(ending_var, right_var_value)]
+            }
+        }
@@ -15,6 +15,9 @@ class _Scatter(_Visual):
     # pylint: disable=too-many-arguments
     # pylint: disable=duplicate-code
 
+    # a scatter chart can show many more points than a category axis
+    _default_top_n = 1000
+
     def __init__(self,
                  page,
                  *,
@@ -39,7 +42,10 @@ class _Scatter(_Visual):
                  title_font_family=None,
                  title_bold=None,
                  border_color=None,
-                 border_width=None):
+                 border_width=None,
+                 top_n=None,
+                 top_n_by=None,
+                 top_n_direction="Top"):
 
         super().__init__(page=page,
                   visual_id=visual_id,
@@ -153,6 +159,16 @@ class _Scatter(_Visual):
             }
         }
 
+        if top_n is not None:
+            if category_column is None:
+                raise ValueError("top_n needs a category_column to keep the top values of")
+
+            self._add_top_n_filter(data_source=data_source,
+                                   column=category_column,
+                                   top_n=top_n,
+                                   top_n_by=top_n_by or {"measure": size_measure or y_measure},
+                                   direction=top_n_direction)
+
         # Write out the json
         with open(self.visual_json_path, "w", encoding="utf-8") as file:
             json.dump(self.visual_json, file, indent=2)
@@ -0,0 +1,175 @@
+'''Check that the locations in a dataset match the features of a shape map's shape file.
+    A location that doesn't match any feature is silently left blank by Power BI, so the shape file's keys are indexed once and every location is looked up in that index.
+    You should never call these functions directly, instead use the check_shape_map_keys() method attached to the Dashboard class.
+'''
+
+import difflib
+import re
+
+import pandas as pd # pylint: disable=import-error
+
+from powerbpy.json_stream import _iter_json_arrays
+
+# where the feature properties are in GeoJSON and TopoJSON files
+_PROPERTY_PATHS = [("features", "*", "properties"),
+                   ("objects", "*", "geometries", "*", "properties")]
+
+_NOT_ALPHANUMERIC = re.compile(r"[\W_]+")
+
+# how similar (0 to 1) a feature key has to be to a location to be suggested
+_SUGGESTION_CUTOFF = 0.6
+
+_REPORT_COLUMNS = ["location", "rows", "matched", "key_property", "suggestion"]
+
+
+def _key_text(value):
+
+    '''The text Power BI compares: 53069 and 53069.0 both become "53069"'''
+
+    if isinstance(value, float) and value.is_integer():
+        value = int(value)
+
+    return str(value)
+
+
+def _normalize(text):
+    return _NOT_ALPHANUMERIC.sub("", text).casefold()
+
+
+class _KeyIndex:
+
+    '''All the values of every feature property in a shape file, with a normalized index for near misses'''
+
+    def __init__(self, shape_file_path):
+
+        self.values = {}
+        self.features = 0
+
+        with open(shape_file_path, "rb") as stream:
+            for _, properties in _iter_json_arrays(stream, _PROPERTY_PATHS):
+                self.features += 1
+
+                for key, value in (properties or {}).items():
+                    if value is not None and not isinstance(value, (dict, list)):
+                        self.values.setdefault(key, set()).add(_key_text(value))
+
+        self.normalized = {}
+        self.prefixes = {}
+
+    def best_property(self, locations):
+
+        '''The property that matches the most locations'''
+
+        if not self.values:
+            return None
+
+        return max(self.values, key=lambda key: len(self.values[key].intersection(locations)))
+
+    def _prepare(self, key_property):
+
+        if key_property in self.normalized:
+            return
+
+        normalized = {}
+        prefixes = {}
+
+        for value in self.values.get(key_property, ()):
+            normal = _normalize(value)
+            normalized.setdefault(normal, value)
+            prefixes.setdefault(normal[:2], []).append(normal)
+
+        self.normalized[key_property] = normalized
+        self.prefixes[key_property] = prefixes
+
+    def suggest(self, location, key_property):
+
+        '''The closest feature key to a location that didn't match, or None'''
+
+        self._prepare(key_property)
+        normalized = self.normalized[key_property]
+
+        normal = _normalize(location)
+
+        # differs only by case, spaces or punctuation
+        if normal in normalized:
+            return normalized[normal]
+
+        # only compare against keys that start the same way, so this stays fast with tens of thousands of features
+        candidates = self.prefixes[key_property].get(normal[:2]) or list(normalized)
+
+        # keys that contain the whole location ("Benton" -> "Benton County") are the most likely match
+        containing = [candidate for candidate in candidates if normal and candidate.startswith(normal)]
+        if len(containing) == 1:
+            return normalized[containing[0]]
+
+        matches = difflib.get_close_matches(normal, candidates, n=1, cutoff=_SUGGESTION_CUTOFF)
+
+        return normalized[matches[0]] if matches else None
+
+
+def _dataset_frame(datasets, data_source):
+
+    '''The pandas copy of a dataset's data (only a sample for web datasets), or None if the dataset doesn't keep one'''
+
+    return next((dataset.dataset for dataset in datasets
+                 if getattr(dataset, "dataset_name", None) == data_source and getattr(dataset, "dataset", None) is not None), None)
+
+
+def _check_shape_keys(shape_file_path, locations, key_property = None):
+
+    '''Look up every distinct location in the shape file's feature keys
+
+    Parameters
+    ----------
+    locations: Series
+        The location column of the dataset.
+
+    Returns
+    -------
+    DataFrame
+        One row per distinct location, the ones that don't match first.
+    '''
+
+    index = _KeyIndex(shape_file_path)
+
+    if not index.features:
+        raise ValueError(f"{shape_file_path} doesn't contain any GeoJSON or TopoJSON features")
+
+    counts = locations.dropna().map(_key_text).value_counts()
+
+    if key_property is None:
+        key_property = index.best_property(set(counts.index))
+
+    elif key_property not in index.values:
+        raise ValueError(f"None of the features in {shape_file_path} have a {key_property} property. "
+                         f"Available properties: {', '.join(sorted(index.values))}")
+
+    keys = index.values.get(key_property, set())
+
+    report = pd.DataFrame({"location": counts.index,
+                           "rows": counts.to_numpy(),
+                           "matched": counts.index.isin(keys),
+                           "key_property": key_property})
+
+    report["suggestion"] = [None if matched else index.suggest(location, key_property)
+                            for location, matched in zip(report["location"], report["matched"])]
+
+    return (report.sort_values(["matched", "rows"], ascending=[True, False], kind="stable")
+                  .reset_index(drop=True)[_REPORT_COLUMNS])
+
+
+def _coverage_warning(report, data_source, location_var):
+
+    '''A one line summary of the locations that won't show up on the map, or None if they all match'''
+
+    missing = report[~report["matched"]]
+
+    if missing.empty:
+        return None
+
+    examples = ", ".join(f"'{row.location}'" + (f" (did you mean '{row.suggestion}'?)" if row.suggestion else "")
+                         for row in missing.head(3).itertuples())
+
+    return (f"{len(missing)} of the {len(report)} {location_var} values in {data_source} "
+            f"({100 * len(missing) / len(report):.0f}%) don't match any shape in the map's shape file "
+            f"and will be left blank: {examples}. Run Dashboard.check_shape_map_keys() for the full list.")
@@ -1,9 +1,14 @@
 """ A subclass of the visual class, this represents a shapemap"""
 
+import collections
 import os
 import json
-import shutil
+import tempfile
 import uuid
+import math
+import warnings
+
+import numpy as np # pylint: disable=import-error
 
 from powerbpy.visual import _Visual
 
@@ -40,7 +45,9 @@ class _ShapeMap(_Visual):
                   parent_group_id = None,
                  alt_text = "A shape map",
                  background_color=None,
-                 background_color_alpha=None):
+                 background_color_alpha=None,
+                 simplify_tolerance = None,
+                 quantization = None):
 
 
         '''Add a map to a page
@@ -61,7 +68,7 @@ class _ShapeMap(_Visual):
         color_var: str
             The name of the column in data_source that you want to use for the color variable on the map.This variable should be numeric.
         filtering_var: str
-            Optional. The name of a column in data source that you want to use to filter the color variable on the map. This must be supplied if providing percentile_bin_breaks. If you want to use percentiles without filtering (ie on static data), you should calculate the percentiles yourself and pass them to static_bin_breaks. Do not provide both static_bin_breaks and a filtering_var.
+            Optional. The name of a column in data source that you want to use to filter the color variable on the map. If it is provided with percentile_bin_breaks, the bins are recalculated in Power BI whenever the data is filtered. Without it, percentile_bin_breaks are calculated once in python from the data loaded into the dashboard and used as static bins. Do not provide both static_bin_breaks and a filtering_var.
         static_bin_breaks: list
             This should be a list of numbers that you want to use to create bins in your data. There should be one more entry in the list than the number of bins you want and therefore the number of colors passed to the color_palette argument. The function will create bins between the first and second number, second and third, third and fourth, etc. A filtering_var cannot be provided if static_bin_breaks is provided. Use percentile bin breaks instead.
         color_palatte: list
@@ -69,7 +76,7 @@ class _ShapeMap(_Visual):
         add_legend: bool
             True or False, would you like to add the default legend? (By default legend, I mean this function's default, not the Power BI default)
         percentile_bin_breaks: list
-            This should be a list of percentiles between 0 and 1 that you want to us to create bins in your data. If provided, a filtering_var must also be provided. This will create power BI measures that dynamically update when the data is filtered by things such as slicers. There should be one more entry in the list than the number of bins you want and therefore the number of colors passed to the color_palette argument. Here's an example use case: to create 5 equal sized bins pass this list: [0,0.2,0.4,0.6,0.8,1]
+            This should be a list of percentiles between 0 and 1 that you want to us to create bins in your data. If a filtering_var is also provided, this will create power BI measures that dynamically update when the data is filtered by things such as slicers. There should be one more entry in the list than the number of bins you want and therefore the number of colors passed to the color_palette argument. Here's an example use case: to create 5 equal sized bins pass this list: [0,0.2,0.4,0.6,0.8,1]
         height: int
             Height of map on the page
         width: int
@@ -82,6 +89,10 @@ class _ShapeMap(_Visual):
             The z index for the visual. (Larger number means more to the front, smaller number means more to the back). Defaults to 6000
         tab_order: int
             The order which the screen reader reads different elements on the page. Defaults to -1001 for now. (I need to do more to figure out what the numbers correpond to. It should also be possible to create a function to automatically order this left to right top to bottom by looping through all the visuals on a page and comparing their x and y positions)
+        simplify_tolerance: float
+            Optional. Simplify the shapes before adding them to the report: points closer than this distance (in the units of the shape file's coordinates, usually degrees) to a simplified border are removed. Shared borders are simplified once, so neighboring shapes still line up. GeoJSON files are converted to TopoJSON.
+        quantization: int
+            Optional. Round the coordinates to a grid this many steps wide and tall. Defaults to 100000 when simplify_tolerance is provided.
 
         Notes
         -----
@@ -97,9 +108,6 @@ class _ShapeMap(_Visual):
         if not isinstance(color_palette, list):
             raise TypeError("color_palette should be a list! Please pass a list of hex codes")
 
-        if percentile_bin_breaks is not None and filtering_var is None:
-            raise ValueError("You must provide a filtering_var when using percentile_bin_breaks. If you want percentile breaks on static data, calculate percentiles in python and then pass them to static_bin_breaks")
-
         if percentile_bin_breaks is None and filtering_var is not None:
             raise ValueError("You can't provide a filtering_var if percentile_bin_breaks is not provided")
 
@@ -125,6 +133,15 @@ class _ShapeMap(_Visual):
             if len(percentile_bin_breaks) - len(color_palette) != 1:
                 raise ValueError("There should be one fewer colors than number of percentile_bin_breaks! Please make sure you specified one more break than the number of bins you want.")
 
+        # without a filtering_var the bins never change, so work them out once in python
+        # instead of making Power BI recalculate the percentiles every time the map is drawn
+        if percentile_bin_breaks is not None and filtering_var is None:
+            static_bin_breaks = self._quantile_breaks(page.dashboard,
+                                                      data_source = data_source,
+                                                      location_var = location_var,
+                                                      color_var = color_var,
+                                                      percentile_bin_breaks = percentile_bin_breaks)
+            percentile_bin_breaks = None
 
 
 
@@ -146,39 +163,32 @@ class _ShapeMap(_Visual):
 
 
         # Upload shape file to dashboard's registered resources ---------------------------------------------------
-        # create registered resources folder if it doesn't exist
-        if not os.path.exists(self.dashboard.registered_resources_folder):
-            os.makedirs(self.dashboard.registered_resources_folder)
-
-
         # This is the location of the fhape file within the dashboard
         shape_name = os.path.basename(shape_file_path)
+        self.shape_file_report = None
 
-        registered_shape_path = os.path.join(self.dashboard.registered_resources_folder, shape_name)
+        # pylint: disable=protected-access
+        if simplify_tolerance is None and quantization is None:
+            shape_name = self.dashboard._resources().add(shape_file_path, "ShapeMap")
 
-        # move shape file to registered resources folder
-        shutil.copy(shape_file_path, registered_shape_path)
+        else:
+            from powerbpy.geo_simplify import _simplify_shape_file
 
-        # add new registered resource (the shape file) to report.json ----------------------------------------------
-        with open(self.dashboard.report_json_path,'r', encoding="utf-8") as file:
-            report_json = json.load(file)
+            # the simplified file is always TopoJSON
+            with tempfile.TemporaryDirectory() as temp_folder:
+                simplified_path = os.path.join(temp_folder, f"{os.path.splitext(shape_name)[0]}.json")
 
+                self.shape_file_report = _simplify_shape_file(shape_file_path,
+                                                              simplified_path,
+                                                              tolerance = simplify_tolerance,
+                                                              quantization = quantization or 100_000)
 
-        # add the shape file as an item to the registered resources items list
-        for resource_package in report_json["resourcePackages"]:
-            if resource_package["name"] == "RegisteredResources":
-                resource_package["items"].append(
-                                                    {
-                                                                        "name": shape_name,
-                                                                        "path": shape_name,
-                                                                        "type": "ShapeMap"
-                                                                     }
-                                                            )
+                shape_name = self.dashboard._resources().add(simplified_path, "ShapeMap")
 
+        registered_shape_path = os.path.join(self.dashboard.registered_resources_folder, shape_name)
 
-        # write to file
-        with open(self.dashboard.report_json_path,'w', encoding="utf-8") as file:
-            json.dump(report_json, file, indent = 2)
+        # warn about locations that don't match a shape, Power BI just leaves them blank
+        self._check_keys(registered_shape_path, data_source, location_var)
 
 
         # If percentile breaks are provided, calculate the associated measures
@@ -194,6 +204,9 @@ class _ShapeMap(_Visual):
                                     #data_filtering_condition = {"metric":"adj_rate"}
                                     )
 
+            # check the generated DAX now, rather than finding a slow map in production
+            self._lint_bin_measures(data_source, percentile_bin_breaks)
+
 
             # shift x position to the right the width of the slicer
             # to make room for the slicer
@@ -375,7 +388,8 @@ class _ShapeMap(_Visual):
                     },
                     "Right": {
                         "Comparison": {
-                            "ComparisonKind": 3,
+                            # the last bin includes its upper break, so the largest value still gets a color
+                            "ComparisonKind": 3 if i < len(color_palette) - 1 else 4,
                             "Left": {
                                 "Aggregation": {
                                     "Expression": {
@@ -540,7 +554,7 @@ class _ShapeMap(_Visual):
                 # add text box legends for static maps
                 if static_bin_breaks is not None:
                     self.page.add_text_box(text = f"{static_bin_breaks[i]} - {static_bin_breaks[i + 1]}",
-                                     text_box_id = f"{visual_id}_legend_box{i + 1}",
+                                     visual_id = f"{visual_id}_legend_box{i + 1}",
                                      height = legend_height,
                                      width = box_width,
 
@@ -552,7 +566,6 @@ class _ShapeMap(_Visual):
 
                                      # Make sure that the z index is more than the map's z_index
                                      z_position =  z_position + 2000,      #z_position + 1,
-                                     text_align = "center",
                                      font_weight = "bold",
                                         font_size=12,
                                         font_color="#ffffff" ,
@@ -591,69 +604,118 @@ class _ShapeMap(_Visual):
 
 
 
+    def _check_keys(self, shape_file_path, data_source, location_var):
+
+        '''Warn if some of the dataset's locations don't match any feature in the shape file'''
+
+        from powerbpy.shape_keys import _check_shape_keys, _coverage_warning, _dataset_frame
+
+        frame = _dataset_frame(self.dashboard.datasets, data_source)
+
+        if frame is None or location_var not in frame.columns:
+            return
+
+        message = _coverage_warning(_check_shape_keys(shape_file_path, frame[location_var]), data_source, location_var)
+
+        if message:
+            warnings.warn(message)
+
+
+    @staticmethod
+    def _quantile_breaks(dashboard, *, data_source, location_var, color_var, percentile_bin_breaks):
+
+        '''Turn percentile_bin_breaks into static_bin_breaks using the data loaded into the dashboard
+
+        Returns
+        -------
+        list
+            The bin breaks, rounded to 2 decimal places. The first break is rounded down and the last one up so that every location falls in a bin.
+        '''
+
+        if max(percentile_bin_breaks) > 1 or min(percentile_bin_breaks) < 0:
+            raise ValueError("Sorry the percentile_bin_breaks should express decimal percentiles between 0 and 1. For example the 20th percentile should be written as 0.2")
+
+        from powerbpy.dataset_csv import _full_frame
+
+        # web datasets and sampled blob datasets only keep a sample of their data, so they can't be used here
+        frame = _full_frame(dashboard.datasets, data_source)
+
+        if frame is None:
+            raise ValueError(f"The data behind {data_source} isn't available in python, so the percentiles can't be calculated ahead of time. Please provide a filtering_var or calculate the breaks yourself and pass them to static_bin_breaks")
+
+        # the map colors each location by the sum of color_var
+        values = frame.groupby(location_var)[color_var].sum().to_numpy(dtype=float)
+
+        if values.size == 0:
+            raise ValueError(f"{data_source} doesn't have any {color_var} values to calculate percentiles from")
+
+        breaks = np.quantile(values, percentile_bin_breaks)
+
+        static_bin_breaks = [round(float(value), 2) for value in breaks]
+        static_bin_breaks[0] = math.floor(breaks[0] * 100) / 100
+        static_bin_breaks[-1] = math.ceil(breaks[-1] * 100) / 100
+
+        return static_bin_breaks
+
+
     def _generate_bin_ranges(self,
                              *,
-                             bin_number,
-                                                 dataset_file_path,
-                                                 percentile_bin_breaks,
-                                                 dataset_name,
-                                                 color_var,
-                                                 location_var,
-                                                 filtering_dax):
+                             file,
+                             bin_number):
 
         '''An internal function for creating bins within the _add_bin_measures() function
 
         Parameters
         ----------
+        file: file object
+            The dataset's TMDL file, opened for appending by _add_bin_measures().
         bin_number: int
             The number of the bin being created
 
         Notes
         -----
-        from the original DAX
-        /*
-        Step 1: Calculate the percentiles again (same as Bin Assignment Measure)
-
-        Note that since the boundaries of the higher bins refer to those of the lower bins,
-        you need to make sure that all previous percentile calculations and bin boundaries are also calculated for each range.
-        Here is the final (fifth) bin range measure and it requires all percentiles and bin boundaries to create the range of the fifth bin.
-        */
+        The boundaries of the higher bins depend on those of the lower bins, so every range used to recalculate all the earlier percentiles and boundaries.
+        Now the range just picks its two boundaries out of the 'Bin Boundaries' measure, where each percentile is calculated once.
+        Step 3 from the original DAX: Format the bin boundaries as desired to display in a card visual (output of the measure).
 
+        '''
 
-        /*
-        Step 2: Calculate the bin boundaries again (same as Bin Assignment Measure)
-        */
+        file.write(f"\tmeasure 'Bin {bin_number} Range' =\n")
+        file.write("\t\t\tVAR bounds = [Bin Boundaries]\n")
+        file.write("\t\t\tRETURN\n")
+        file.write(f'\t\t\tPATHITEM ( bounds, {2 * bin_number - 1} ) & "-" & PATHITEM ( bounds, {2 * bin_number} )\n')
+        file.write(f'\t\tlineageTag: {str(uuid.uuid4())}\n\n')
 
-        /*
-        Step 3: Format the bin boundaries as desired to display in a card visual (output of the measure).
-        */
 
-        '''
-        with open(dataset_file_path, 'a', encoding="utf-8") as file:
-            file.write(f"\tmeasure 'Bin {bin_number} Range' =\n")
+    def _lint_bin_measures(self, dataset_name, percentile_bin_breaks):
 
-            for i in range(0, bin_number):
+        '''Raise a single warning summarizing any DAX performance findings in the generated bin measures'''
 
-                if i == 0:
-                    file.write(f'\t\t\tVAR perc_{round(percentile_bin_breaks[i] * 100)} =  CALCULATE ( PERCENTILE.INC ({dataset_name}[{color_var}], {percentile_bin_breaks[i]} ), REMOVEFILTERS({dataset_name}[{location_var}]){filtering_dax} )\n')
-                    file.write(f'\t\t\tVAR perc_{round(percentile_bin_breaks[i +1] * 100)} = CALCULATE ( PERCENTILE.INC ({dataset_name}[{color_var}], {percentile_bin_breaks[i+1]} ), REMOVEFILTERS({dataset_name}[{location_var}]){filtering_dax}  )\n')
+        from powerbpy.dax_lint import _lint_dax
+        from powerbpy.tmdl_model import _TmdlModel
 
-                else:
-                    file.write(f'\t\t\tVAR perc_{round(percentile_bin_breaks[i +1] * 100)} = CALCULATE ( PERCENTILE.INC ({dataset_name}[{color_var}], {percentile_bin_breaks[i+1]} ), REMOVEFILTERS({dataset_name}[{location_var}]){filtering_dax}  )\n')
+        bin_measures = ["Measure Value", "Bin Boundaries", "Bin Assignment Measure", "Empty Bin"]
+        bin_measures += [f"Bin {i} Range" for i in range(1, len(percentile_bin_breaks))]
+        bin_measures += [f"{round(percentile * 100)} percentile" for percentile in percentile_bin_breaks[1:]]
 
-            for i in range(0,bin_number):
+        # only the table the measures were just added to is read, not the whole model
+        measures = _TmdlModel(self.dashboard.sm_definition_folder, table_names = [dataset_name]).tables[dataset_name].measures
+        table_names = {os.path.splitext(file_name)[0] for file_name in os.listdir(self.dashboard.tables_folder)}
 
-                if i == 0:
-                    file.write(f'\t\t\tVAR bin{i +1}_LB = perc_{round(percentile_bin_breaks[i] * 100)}')
-                    file.write(f'\t\t\tVAR bin{i +1}_UB = IF ( perc_{round(percentile_bin_breaks[i] * 100)} == perc_{round(percentile_bin_breaks[i+1] * 100)}, bin{i+1}_LB + 0.01, ROUND( perc_{round(percentile_bin_breaks[i+1] * 100)}, 2) )\n')
+        findings = [finding
+                    for name in bin_measures if name in measures
+                    for finding in _lint_dax(measures[name]["expression"], dataset_name, name,
+                                             table_names = table_names,
+                                             measure_names = set(measures))]
 
-                else:
-                    file.write(f'\t\t\tVAR bin{i +1}_LB = bin{i}_UB + 0.01\n' )
-                    file.write(f'\t\t\tVAR bin{i+1}_UB = IF ( perc_{round(percentile_bin_breaks[i] * 100)} == perc_{round(percentile_bin_breaks[i + 1] * 100)} || perc_{round(percentile_bin_breaks[i + 1] * 100)} <= bin{i + 1}_LB, bin{i+1}_LB + 0.01, ROUND( perc_{round(percentile_bin_breaks[i + 1] * 100)}, 2) )\n')
+        # bin 0 is the grey "no data" bin, so turning blanks into 0 is on purpose there
+        findings = [finding for finding in findings
+                    if not (finding["object"] == "Bin Assignment Measure" and finding["rule"] == "blank-to-zero")]
 
-            file.write("\t\t\tRETURN\n")
-            file.write(f'\t\t\tbin{bin_number}_LB & "-" & bin{bin_number}_UB\n')
-            file.write(f'\t\tlineageTag: {str(uuid.uuid4())}\n')
+        if findings:
+            counts = ", ".join(f"{count} {rule}" for rule, count in collections.Counter(finding["rule"] for finding in findings).most_common())
+            warnings.warn(f"The shape map's bin measures in {dataset_name} have DAX performance findings ({counts}). "
+                          "Run Dashboard.lint_dax() for the details.")
 
 
     # pylint: disable=too-many-arguments, pointless-string-statement
@@ -758,11 +820,15 @@ class _ShapeMap(_Visual):
             */
             '''
             # start adding quintiles
-            file.write("\tmeasure 'Bin Assignment Measure' = ```\n\n")
+            # Every percentile is calculated once, from a single scan of the color values, in a hidden measure
+            # that returns all the bin boundaries as a path: "bin1_LB|bin1_UB|bin2_LB|bin2_UB|...", followed by the percentiles themselves
+            # The bin assignment, bin range and percentile measures pick their values out of it with PATHITEM()
+            file.write("\tmeasure 'Bin Boundaries' = ```\n\n")
+            file.write("\t\t\tVAR bin_values =\n")
+            file.write(f'\t\t\t\tCALCULATETABLE ( SELECTCOLUMNS ( {dataset_name}, "@value", {dataset_name}[{color_var}] ), REMOVEFILTERS({dataset_name}[{location_var}]), NOT ISBLANK ( {dataset_name}[{color_var}] ){filtering_dax} )\n')
 
             for percentile in percentile_bin_breaks:
-                file.write(f"\t\t VAR perc_{round(percentile * 100)} = \n")
-                file.write(f'\t\t\t\tCALCULATE ( PERCENTILE.INC ({dataset_name}[{color_var}], {percentile} ), REMOVEFILTERS({dataset_name}[{location_var}]){filtering_dax} )\n')
+                file.write(f"\t\t\tVAR perc_{round(percentile * 100)} = PERCENTILEX.INC ( bin_values, [@value], {percentile} )\n")
 
             ''' Notes taken from original DAX
 
@@ -797,16 +863,26 @@ class _ShapeMap(_Visual):
             with only a few lines of code.....
 
             '''
-            for i in range(0, len(percentile_bin_breaks)):
+            bin_count = len(percentile_bin_breaks) - 1
+
+            for i in range(0, bin_count):
                 if i == 0:
                     file.write(f'\t\t\tVAR bin{i + 1}_LB = perc_{round(percentile_bin_breaks[i] * 100)}\n')
                     file.write(f'\t\t\tVAR bin{i + 1}_UB = IF ( perc_{round(percentile_bin_breaks[i] * 100)} == perc_{round(percentile_bin_breaks[i + 1] * 100)}, bin{i +1}_LB + 0.01, perc_{round(percentile_bin_breaks[i + 1] * 100)})\n')
 
-                elif i < (len(percentile_bin_breaks) -1):
+                else:
                     file.write(f'\t\t\tVAR bin{i + 1}_LB = bin{i}_UB + 0.01\n')
                     file.write(f'\t\t\tVAR bin{i + 1}_UB = IF ( perc_{round(percentile_bin_breaks[i] * 100)} == perc_{round(percentile_bin_breaks[i + 1] * 100)} || perc_{round(percentile_bin_breaks[i + 1] * 100)} <= bin{i+1}_LB, bin{i+1}_LB + 0.01, perc_{round(percentile_bin_breaks[i + 1] * 100)} )\n')
 
-            file.write("\t\t\tRETURN\n\n")
+            file.write("\t\t\tRETURN\n")
+            boundaries = [f"ROUND ( bin{i + 1}_{bound}, 2 )" for i in range(bin_count) for bound in ("LB", "UB")]
+            # the percentile measures read these after the boundaries, at 2 * bin_count + i
+            boundaries += [f"perc_{round(percentile * 100)}" for percentile in percentile_bin_breaks[1:]]
+            boundaries = ' & "|" & '.join(boundaries)
+            file.write(f"\t\t\t\t{boundaries}\n")
+            file.write("\t\t\t```\n")
+            file.write("\t\tisHidden\n")
+            file.write(f"\t\tlineageTag: {str(uuid.uuid4())}\n\n")
 
 
             '''From the original DAX
@@ -817,50 +893,42 @@ class _ShapeMap(_Visual):
             */
             '''
 
+            file.write("\tmeasure 'Bin Assignment Measure' = ```\n\n")
+            file.write("\t\t\tVAR bounds = [Bin Boundaries]\n")
+            file.write("\t\t\tVAR measure_value = [Measure Value]\n")
+            file.write("\t\t\tRETURN\n\n")
             file.write("\t\t\t\tSWITCH (\n")
             file.write("\t\t\t\t\tTRUE (),\n")
-            file.write("\t\t\t\t\tISBLANK([Measure Value]), 0,\n")
+            file.write("\t\t\t\t\tISBLANK(measure_value), 0,\n")
 
-            for i in range(0, len(percentile_bin_breaks)):
+            for i in range(0, bin_count):
+                file.write(f"\t\t\t\t\tmeasure_value >= VALUE ( PATHITEM ( bounds, {2 * i + 1} ) ) &&\n")
 
-                # make sure we have n -1 bins
-                if i < (len(percentile_bin_breaks) -1):
-                    file.write(f"\t\t\t\t\t[Measure Value] >= ROUND(bin{i+1}_LB,2) &&\n")
+                # Make sure the last line doesn't end with a comma
+                if i < bin_count - 1:
+                    file.write(f"\t\t\t\t\tmeasure_value <= VALUE ( PATHITEM ( bounds, {2 * i + 2} ) ), {i +1},\n")
 
-                    # Make sure the last line doesn't end with a comma
-                    if i < (len(percentile_bin_breaks) -2):
-                        file.write(f"\t\t\t\t\t[Measure Value] <= ROUND(bin{i+1}_UB,2), {i +1},\n")
-
-                    else:
-                        file.write(f"\t\t\t\t\t[Measure Value] <= ROUND(bin{i+1}_UB,2), {i +1}\n")
+                else:
+                    file.write(f"\t\t\t\t\tmeasure_value <= VALUE ( PATHITEM ( bounds, {2 * i + 2} ) ), {i +1}\n")
 
 
             file.write("\n\t\t\t\t)\n\t\t\t```\n")
             file.write("\t\tformatString: 0\n")
             file.write(f"\t\tlineageTag: {str(uuid.uuid4())}\n\n")
-            '''
-
 
-            '''
             # Generate bin ranges for each of the different bins we've been defining
             # see function definition above
-            for i in range(1,len(percentile_bin_breaks)):
-                self._generate_bin_ranges(           bin_number=i,
-                                                     percentile_bin_breaks = percentile_bin_breaks,
-                                                     dataset_file_path = dataset_file_path,
-                                                     dataset_name = dataset_name,
-                                                     color_var = color_var,
-                                                     location_var = location_var,
-                                                     filtering_dax = filtering_dax)
+            for i in range(1, bin_count + 1):
+                self._generate_bin_ranges(file = file, bin_number = i)
 
             # Create an empty bin measure
             file.write("\tmeasure 'Empty Bin' =\n\n")
             file.write('\t\t\t"No Data"\n')
             file.write(f"\t\tlineageTag: {str(uuid.uuid4())}\n\n")
 
-            # Create measures for percentiles
+            # Create measures for percentiles, from the percentiles 'Bin Boundaries' already calculated
             for i in range(1, len(percentile_bin_breaks)):
                 file.write(f"\tmeasure '{round(percentile_bin_breaks[i] * 100)} percentile' = ```\n\n")
-                file.write(f'\t\t\t\tCALCULATE ( PERCENTILE.INC ({dataset_name}[{color_var}], {percentile_bin_breaks[i]} ), REMOVEFILTERS({dataset_name}[{location_var}]){filtering_dax}  )\n\t\t\t```\n')
+                file.write(f'\t\t\t\tVALUE ( PATHITEM ( [Bin Boundaries], {2 * bin_count + i} ) )\n\t\t\t```\n')
                 file.write(f"\t\tlineageTag: {str(uuid.uuid4())}\n\n")
                 file.write('\t\tannotation PBI_FormatHint = {"isGeneralNumber":true}\n\n')
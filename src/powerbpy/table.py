@@ -31,7 +31,10 @@ class _Table(_Visual):
                             alt_text="A table",
                             parent_group_id=None,
                             background_color="#FFFFFF",
-                            background_color_alpha=None):
+                            background_color_alpha=None,
+                            top_n=None,
+                            top_n_by=None,
+                            top_n_direction="Top"):
 
         '''This function adds a new table to a page in a power BI dashboard report.
         Parameters
@@ -61,6 +64,12 @@ class _Table(_Visual):
             The order which the screen reader reads different elements on the page. Defaults to -1001 for now. (I need to do more to figure out what the numbers correpond to. It should also be possible to create a function to automatically order this left to right top to bottom by looping through all the visuals on a page and comparing their x and y positions)
         z_position: int
             The z index for the visual. (Larger number means more to the front, smaller number means more to the back). Defaults to 6000
+        top_n: int or bool
+            Optional. Only query the rows for the top (or bottom) top_n values of the first variable, ranked by top_n_by. True keeps 100 values.
+        top_n_by: dict
+            What to rank the first variable by, either {"measure": "measure name"} or {"column": "column name", "aggregation": "Sum"}. Required when top_n is used, because a table has no value to rank by.
+        top_n_direction: str
+            "Top" (the default) keeps the largest values, "Bottom" the smallest.
 
         '''
 
@@ -170,6 +179,16 @@ class _Table(_Visual):
                 total_entry["properties"]["totals"]["expr"]["Literal"]["Value"] = "true"
 
 
+        if top_n is not None:
+            if top_n_by is None:
+                raise ValueError("Tables don't have a value to rank rows by, please provide top_n_by along with top_n")
+
+            self._add_top_n_filter(data_source=data_source,
+                                   column=variables[0],
+                                   top_n=top_n,
+                                   top_n_by=top_n_by,
+                                   direction=top_n_direction)
+
         # Write out the new json
         with open(self.visual_json_path, "w", encoding="utf-8") as file:
             json.dump(self.visual_json, file, indent = 2)
@@ -0,0 +1,322 @@
+'''A lightweight reader for the TMDL files that make up a dashboard's semantic model.
+    It only understands the parts of TMDL that powerbpy's analysis tools need: tables, columns, measures, partitions and relationships.
+    You should never call these classes directly, the Dashboard methods that need them load the model for you.
+'''
+
+import os
+import re
+
+# an object declaration, for example:  column 'Full Name' = [First] & " " & [Last]
+_DECLARATION = re.compile(r"^(?P<kind>[A-Za-z]+)\s+(?P<name>'(?:[^']|'')*'|[^\s=]+)\s*(?:=\s*(?P<rest>.*))?$")
+
+# a property, for example:  dataType: string
+_PROPERTY = re.compile(r"^(?P<key>[A-Za-z]+)\s*:\s*(?P<value>.*)$")
+
+# a column reference in a relationship, for example:  'My Table'.'My Column'  or  sales.state_id
+_COLUMN_REF = re.compile(r"^(?P<table>'(?:[^']|'')*'|[^.']+)\.(?P<column>'(?:[^']|'')*'|.+)$")
+
+
+def _unquote(name):
+    '''Remove TMDL quoting from a table or object name'''
+
+    name = name.strip()
+
+    if len(name) >= 2 and name.startswith("'") and name.endswith("'"):
+        return name[1:-1].replace("''", "'")
+
+    return name
+
+
+def _split_column_ref(ref):
+    '''Split a TMDL column reference into (table, column)'''
+
+    match = _COLUMN_REF.match(ref.strip())
+
+    if match is None:
+        raise ValueError(f"Unable to parse the column reference {ref}")
+
+    return _unquote(match["table"]), _unquote(match["column"])
+
+
+def _indent(line):
+    return len(line) - len(line.lstrip("\t"))
+
+
+def _is_property(stripped):
+    '''True if a line is an object property rather than part of an expression'''
+
+    return (_PROPERTY.match(stripped) is not None
+            or stripped == "isHidden"
+            or stripped.split(" ", 1)[0] in ("annotation", "changedProperty", "extendedProperty", "variation"))
+
+
+class _TmdlTable:
+
+    # pylint: disable=too-few-public-methods
+
+    '''A table parsed from a TMDL file
+
+    Columns, measures and partitions are stored as dictionaries with (at least) the keys name, line and end_line (the first and last lines of the object in the file).
+    Calculated columns and measures also have an expression (and the expression_line it starts on), and imported columns have a source_column.
+    '''
+
+    def __init__(self, name, path):
+        self.name = name
+        self.path = path
+        self.lineage_tag = None
+        self.columns = {}
+        self.measures = {}
+        self.partitions = []
+
+
+class _TmdlModel:
+
+    '''The tables and relationships of a semantic model, read from its TMDL definition folder
+
+    Parameters
+    ----------
+    definition_folder: str
+        The path to the semantic model's definition folder (the folder containing model.tmdl and the tables folder).
+    table_names: list
+        Optional. Only read these tables, instead of every table in the model.
+    '''
+
+    def __init__(self, definition_folder, table_names = None):
+
+        self.definition_folder = definition_folder
+        self.tables = {}
+        self.relationships = []
+
+        tables_folder = os.path.join(definition_folder, "tables")
+
+        if os.path.isdir(tables_folder):
+            file_names = sorted(os.listdir(tables_folder)) if table_names is None else [f"{name}.tmdl" for name in table_names]
+
+            for file_name in file_names:
+                if file_name.endswith(".tmdl"):
+                    self._parse_table_file(os.path.join(tables_folder, file_name))
+
+        relationships_path = os.path.join(definition_folder, "relationships.tmdl")
+
+        if os.path.exists(relationships_path):
+            self._parse_relationships(relationships_path)
+
+    def column(self, table, column):
+        '''Return the parsed column, or None if the model doesn't have it'''
+
+        if table not in self.tables:
+            return None
+
+        return self.tables[table].columns.get(column)
+
+    def _parse_table_file(self, path):
+
+        # pylint: disable=too-many-branches
+        # pylint: disable=too-many-statements
+
+        with open(path, "r", encoding="utf-8") as file:
+            lines = file.read().splitlines()
+
+        table = None
+        current = None
+
+        # where the lines of a multi-line expression are collected
+        expression = None
+        expression_mode = None
+        expression_indent = 0
+
+        # used to record the last line of each object, so it can be removed later
+        last_object = None
+        last_content_line = 0
+
+        for line_number, line in enumerate(lines, start=1):
+            stripped = line.strip()
+            indent = _indent(line)
+
+            # ```  fenced expressions run until the closing fence
+            if expression_mode == "fenced":
+                if stripped == "```":
+                    expression_mode = None
+                else:
+                    expression.append(line)
+                last_content_line = line_number
+                continue
+
+            # un-fenced expressions run for as long as the lines are indented deeper than the declaration's properties
+            # (powerbpy's add_measure() also accepts expressions indented at the property level, so allow those too)
+            if expression_mode == "indented":
+                if stripped == "" or indent > expression_indent or (indent == expression_indent and not _is_property(stripped)):
+                    expression.append(line)
+                    last_content_line = line_number if stripped else last_content_line
+                    continue
+
+                expression_mode = None
+
+            if stripped == "":
+                continue
+
+            # anything at the table level ends the previous object
+            if indent <= 1 and last_object is not None:
+                last_object["end_line"] = last_content_line
+                last_object = None
+
+            last_content_line = line_number
+
+            if stripped.startswith("///"):
+                continue
+
+            # table declaration
+            if indent == 0:
+                match = _DECLARATION.match(stripped)
+
+                if match and match["kind"] == "table":
+                    table = _TmdlTable(_unquote(match["name"]), path)
+                    self.tables[table.name] = table
+
+                current = None
+                continue
+
+            if table is None:
+                continue
+
+            # columns, measures, partitions, hierarchies...
+            if indent == 1:
+                current = None
+                match = _PROPERTY.match(stripped)
+
+                if match and match["key"] == "lineageTag":
+                    table.lineage_tag = match["value"].strip()
+                    continue
+
+                match = _DECLARATION.match(stripped)
+
+                if match is None:
+                    continue
+
+                kind = match["kind"]
+                rest = match["rest"]
+                obj = {"name": _unquote(match["name"]), "line": line_number, "end_line": line_number}
+
+                if kind == "column":
+                    obj.update({"data_type": None, "source_column": None, "expression": None,
+                                "sort_by_column": None, "is_hidden": False})
+                    table.columns[obj["name"]] = obj
+
+                elif kind == "measure":
+                    obj.update({"expression": None, "format_string": None, "is_hidden": False})
+                    table.measures[obj["name"]] = obj
+
+                elif kind == "partition":
+                    obj.update({"kind": rest, "mode": None, "expression": None})
+                    table.partitions.append(obj)
+                    current = last_object = obj
+                    continue
+
+                else:
+                    continue
+
+                current = last_object = obj
+
+                if rest is not None:
+                    expression = [] if rest in ("", "```") else [rest]
+                    obj["expression"] = expression
+                    obj["expression_line"] = line_number if expression else line_number + 1
+                    expression_mode = "fenced" if rest == "```" else "indented"
+                    expression_indent = 2
+
+                continue
+
+            if current is None:
+                continue
+
+            if indent == 2:
+                match = _PROPERTY.match(stripped)
+
+                if match:
+                    key, value = match["key"], match["value"].strip()
+
+                    if key == "dataType":
+                        current["data_type"] = value
+                    elif key == "sourceColumn":
+                        current["source_column"] = value
+                    elif key == "sortByColumn":
+                        current["sort_by_column"] = _unquote(value)
+                    elif key == "formatString":
+                        current["format_string"] = value
+                    elif key == "mode":
+                        current["mode"] = value
+                    continue
+
+                if stripped == "isHidden":
+                    current["is_hidden"] = True
+                    continue
+
+                # partition source
+                if stripped.startswith("source") and "=" in stripped:
+                    rest = stripped.split("=", 1)[1].strip()
+                    expression = [] if rest in ("", "```") else [rest]
+                    current["expression"] = expression
+                    current["expression_line"] = line_number if expression else line_number + 1
+                    expression_mode = "fenced" if rest == "```" else "indented"
+                    expression_indent = 2
+
+        if last_object is not None:
+            last_object["end_line"] = last_content_line
+
+        # turn the collected expression lines back into text
+        for table_obj in self.tables.values():
+            for obj in [*table_obj.columns.values(), *table_obj.measures.values(), *table_obj.partitions]:
+                if isinstance(obj.get("expression"), list):
+                    # point expression_line at the first line with any DAX or M on it
+                    leading_blank_lines = next((i for i, line in enumerate(obj["expression"]) if line.strip()), 0)
+                    obj["expression_line"] += leading_blank_lines
+                    obj["expression"] = _dedent(obj["expression"])
+
+    def _parse_relationships(self, path):
+
+        with open(path, "r", encoding="utf-8") as file:
+            lines = file.read().splitlines()
+
+        relationship = None
+
+        for line_number, line in enumerate(lines, start=1):
+            stripped = line.strip()
+
+            if not stripped:
+                continue
+
+            if _indent(line) == 0:
+                match = _DECLARATION.match(stripped)
+                relationship = None
+
+                if match and match["kind"] == "relationship":
+                    relationship = {"name": _unquote(match["name"]), "line": line_number,
+                                    "from_table": None, "from_column": None,
+                                    "to_table": None, "to_column": None}
+                    self.relationships.append(relationship)
+                continue
+
+            match = _PROPERTY.match(stripped)
+
+            if relationship is None or match is None:
+                continue
+
+            if match["key"] == "fromColumn":
+                relationship["from_table"], relationship["from_column"] = _split_column_ref(match["value"])
+            elif match["key"] == "toColumn":
+                relationship["to_table"], relationship["to_column"] = _split_column_ref(match["value"])
+            else:
+                relationship[match["key"]] = match["value"].strip()
+
+
+def _dedent(lines):
+    '''Join expression lines, removing the indentation they share'''
+
+    while lines and not lines[-1].strip():
+        lines.pop()
+
+    # the first line may have been written inline, after the =
+    indents = [_indent(line) for line in lines if line.strip() and _indent(line) > 0]
+    shared = min(indents) if indents else 0
+
+    return "\n".join(line[shared:] if line.strip() else "" for line in lines).strip()
@@ -27,6 +27,9 @@ class _Treemap(_Visual):
     # pylint: disable=too-many-arguments
     # pylint: disable=duplicate-code
 
+    # beyond this the smallest tiles are too small to read
+    _default_top_n = 50
+
     def __init__(self,
                  page,
                  *,
@@ -52,7 +55,10 @@ class _Treemap(_Visual):
                  title_font_family=None,
                  title_bold=None,
                  border_color=None,
-                 border_width=None):
+                 border_width=None,
+                 top_n=None,
+                 top_n_by=None,
+                 top_n_direction="Top"):
 
         super().__init__(page=page,
                   visual_id=visual_id,
@@ -187,6 +193,13 @@ class _Treemap(_Visual):
                 }
             ]
 
+        if top_n is not None:
+            self._add_top_n_filter(data_source=data_source,
+                                   column=group_var,
+                                   top_n=top_n,
+                                   top_n_by=top_n_by or {"column": value_var, "aggregation": value_aggregation_type},
+                                   direction=top_n_direction)
+
         # Write out the json
         with open(self.visual_json_path, "w", encoding="utf-8") as file:
             json.dump(self.visual_json, file, indent=2)
@@ -12,6 +12,9 @@ class _Visual:
     # pylint: disable=too-many-arguments
     # pylint: disable=import-outside-toplevel
 
+    # how many values top_n=True keeps, subclasses set one that suits how many values they can show
+    _default_top_n = 100
+
     def __init__(self,
                  page,
                  *,
@@ -303,3 +306,98 @@ class _Visual:
                     }
                 }
             ]
+
+    def _add_top_n_filter(self, *, data_source, column, top_n, top_n_by, direction="Top"):
+
+        '''Add a visual level TopN filter, so the visual only queries the top (or bottom) top_n values of a column
+
+        Parameters
+        ----------
+        column: str
+            The column to keep the top values of (usually the visual's axis or rows).
+        top_n: int or bool
+            How many values to keep. True keeps the visual type's default number of values.
+        top_n_by: dict
+            The value to rank the column by. Either {"measure": "Total Sales"} or {"column": "sales", "aggregation": "Sum"}.
+        direction: str
+            "Top" keeps the largest values, "Bottom" the smallest.
+        '''
+
+        from powerbpy.chart import _AGGREGATION_FUNCTION_CODES
+
+        if top_n is True:
+            top_n = self._default_top_n
+
+        if not isinstance(top_n, int) or isinstance(top_n, bool) or top_n < 1:
+            raise ValueError("top_n must be a positive whole number, or True to use the default for the visual type")
+
+        if direction not in ("Top", "Bottom"):
+            raise ValueError('top_n_direction must be either "Top" or "Bottom"')
+
+        # TopN filters refer to the table through the aliases declared in From
+        def column_ref(source, name):
+            return {"Column": {"Expression": {"SourceRef": {"Source": source}}, "Property": name}}
+
+        if "measure" in top_n_by:
+            order_by = {"Measure": {"Expression": {"SourceRef": {"Source": "c"}}, "Property": top_n_by["measure"]}}
+
+        elif "column" in top_n_by:
+            aggregation = top_n_by.get("aggregation", "Sum")
+
+            if aggregation not in _AGGREGATION_FUNCTION_CODES:
+                raise ValueError(f"Unknown aggregation {aggregation}. Available options include: {', '.join(_AGGREGATION_FUNCTION_CODES)}")
+
+            order_by = {"Aggregation": {"Expression": column_ref("c", top_n_by["column"]),
+                                        "Function": _AGGREGATION_FUNCTION_CODES[aggregation]}}
+
+        else:
+            raise ValueError('top_n_by must look like {"measure": "measure name"} or {"column": "column name", "aggregation": "Sum"}')
+
+        top_n_filter = {
+            "name": f"{self.visual_id}_top_n",
+            "field": {
+                "Column": {
+                    "Expression": {
+                        "SourceRef": {
+                            "Entity": data_source
+                        }
+                    },
+                    "Property": column
+                }
+            },
+            "type": "TopN",
+            "filter": {
+                "Version": 2,
+                "From": [
+                    {
+                        "Name": "subquery",
+                        "Expression": {
+                            "Subquery": {
+                                "Query": {
+                                    "Version": 2,
+                                    "From": [{"Name": "c", "Entity": data_source, "Type": 0}],
+                                    "Select": [dict(column_ref("c", column), Name="field")],
+                                    # 2 sorts descending (the top values), 1 ascending (the bottom values)
+                                    "OrderBy": [{"Direction": 2 if direction == "Top" else 1, "Expression": order_by}],
+                                    "Top": top_n
+                                }
+                            }
+                        },
+                        "Type": 2
+                    },
+                    {"Name": "c", "Entity": data_source, "Type": 0}
+                ],
+                "Where": [
+                    {
+                        "Condition": {
+                            "In": {
+                                "Expressions": [column_ref("c", column)],
+                                "Table": {"SourceRef": {"Source": "subquery"}}
+                            }
+                        }
+                    }
+                ]
+            }
+        }
+
+        self.visual_json.setdefault("filterConfig", {}).setdefault("filters", []).append(top_n_filter)
@@ -0,0 +1,211 @@
+'''Read VertiPaq Analyzer (.vpax) exports and map their storage statistics back onto the semantic model powerbpy generated.
+    You should never call these functions directly, instead use the analyze_vpax() method attached to the Dashboard class.
+'''
+
+import re
+import zipfile
+
+import pandas as pd # pylint: disable=import-error
+
+from powerbpy.json_stream import _iter_json_arrays
+from powerbpy.model_size import _UNIQUE_RATIO, _estimate_model_size
+from powerbpy.tmdl_model import _TmdlModel
+
+# the file inside the .vpax archive that holds the storage statistics
+_VPA_VIEW = "DaxVpaView.json"
+
+# a fully qualified column reference, for example:  'sales'[state_id]
+_FULL_COLUMN = re.compile(r"^'?(?P<table>.*?)'?\[(?P<column>.*)\]$")
+
+# datetime columns with more distinct values than this almost certainly include a time part
+_DATETIME_CARDINALITY = 1000
+
+# relationships with more keys than this on the one side are slow to filter across
+_RELATIONSHIP_CARDINALITY = 100_000
+
+_REPORT_COLUMNS = ["kind", "table", "name", "in_generated_model", "generated_data_type", "vpax_data_type",
+                   "encoding", "rows", "cardinality", "dictionary_bytes", "data_bytes", "hierarchy_bytes",
+                   "total_bytes", "estimated_bytes", "pct_of_model", "suggestion"]
+
+
+def _read_vpa_view(vpax_path):
+
+    '''Stream the tables, columns and relationships out of a .vpax file
+
+    Returns
+    -------
+    dict
+        A dictionary with the keys Tables, Columns and Relationships, each a list of dictionaries as written by VertiPaq Analyzer.
+    '''
+
+    view = {"Tables": [], "Columns": [], "Relationships": []}
+
+    try:
+        archive = zipfile.ZipFile(vpax_path)
+    except zipfile.BadZipFile as exc:
+        raise ValueError(f"{vpax_path} is not a .vpax file (it isn't a zip archive)") from exc
+
+    with archive:
+        if _VPA_VIEW not in archive.namelist():
+            raise ValueError(f"{vpax_path} doesn't contain {_VPA_VIEW}. Export it again from VertiPaq Analyzer or DAX Studio.")
+
+        with archive.open(_VPA_VIEW) as stream:
+            for path, item in _iter_json_arrays(stream, [(key,) for key in view]):
+                view[path[0]].append(item)
+
+    return view
+
+
+def _suggest(row, rows_in_table, generated):
+
+    '''Suggest a fix for one of the biggest consumers
+
+    Parameters
+    ----------
+    row: dict
+        A row of the report.
+    rows_in_table: int
+        The number of rows in the column's table.
+    generated: dict
+        The column as parsed from the generated TMDL, or None.
+    '''
+
+    # pylint: disable=too-many-return-statements
+
+    if row["kind"] == "relationship":
+        if (row["cardinality"] or 0) > _RELATIONSHIP_CARDINALITY:
+            return "High cardinality relationship: consider a narrower (integer) key on the one side."
+        return ""
+
+    if row["kind"] != "column":
+        return ""
+
+    cardinality = row["cardinality"] or 0
+    data_type = str(row["vpax_data_type"] or "").lower()
+    unique_ratio = cardinality / rows_in_table if rows_in_table else 0
+
+    if generated is None:
+        return "Not in the generated model: remove it from the model or add it to the powerbpy script."
+
+    if generated.get("expression"):
+        return "Calculated column: compute it in the source (M or python) so it compresses like an imported column."
+
+    if data_type == "datetime" and cardinality > _DATETIME_CARDINALITY:
+        return "Split the datetime into separate date and time columns (or drop the time part)."
+
+    if data_type in ("double", "decimal") and row["encoding"] == "HASH":
+        return "Hash encoded number: round it or change its type to a fixed decimal or whole number so it can be value encoded."
+
+    if data_type == "string" and unique_ratio > _UNIQUE_RATIO:
+        return "Almost unique text column: drop it if no visual needs it, or replace it with an integer key."
+
+    if unique_ratio > _UNIQUE_RATIO:
+        return "Identifier-like column: drop it if it isn't used by a relationship or visual."
+
+    return ""
+
+
+def _analyze_vpax(vpax_path,
+                  definition_folder,
+                  datasets = None,
+                  top_n = 25):
+
+    '''Map the statistics in a .vpax file onto the generated model and rank the biggest consumers
+
+    Parameters
+    ----------
+    vpax_path: str
+        The path to the .vpax file exported by VertiPaq Analyzer (DAX Studio, Tabular Editor or Bravo).
+    definition_folder: str
+        The semantic model's definition folder.
+    datasets: list
+        Optional. The dashboard's datasets, used to show the size estimated at build time next to the real size.
+    top_n: int
+        How many rows to return. Use None to return everything.
+
+    Returns
+    -------
+    DataFrame
+        One row per column and relationship, biggest first, with a suggested fix for the biggest consumers.
+    '''
+
+    # pylint: disable=too-many-locals
+
+    view = _read_vpa_view(vpax_path)
+    model = _TmdlModel(definition_folder)
+
+    rows_by_table = {table.get("TableName"): table.get("RowsCount") or 0 for table in view["Tables"]}
+
+    estimates = {}
+    if datasets:
+        estimate = _estimate_model_size(datasets, row_counts=rows_by_table)
+        estimates = {(row.table, row.column): row.total_bytes for row in estimate.itertuples()}
+
+    report = []
+
+    for column in view["Columns"]:
+        table_name = column.get("TableName")
+        column_name = column.get("ColumnName")
+
+        # skip the hidden row number column VertiPaq adds to every table
+        if column_name is None or column_name.startswith("RowNumber-") or column.get("ColumnType") == "RowNumber":
+            continue
+
+        generated = model.column(table_name, column_name)
+
+        row = {"kind": "column",
+               "table": table_name,
+               "name": column_name,
+               "in_generated_model": generated is not None,
+               "generated_data_type": generated["data_type"] if generated else None,
+               "vpax_data_type": column.get("DataType"),
+               "encoding": column.get("Encoding"),
+               "rows": rows_by_table.get(table_name),
+               "cardinality": column.get("ColumnCardinality"),
+               "dictionary_bytes": column.get("DictionarySize", 0),
+               "data_bytes": column.get("DataSize", 0),
+               "hierarchy_bytes": column.get("HierarchiesSize", 0),
+               "total_bytes": column.get("TotalSize"),
+               "estimated_bytes": estimates.get((table_name, column_name))}
+
+        if row["total_bytes"] is None:
+            row["total_bytes"] = row["dictionary_bytes"] + row["data_bytes"] + row["hierarchy_bytes"]
+
+        row["suggestion"] = _suggest(row, rows_by_table.get(table_name), generated)
+        report.append(row)
+
+    generated_relationships = {(rel["from_table"], rel["from_column"], rel["to_table"], rel["to_column"])
+                               for rel in model.relationships}
+
+    for relationship in view["Relationships"]:
+        from_match = _FULL_COLUMN.match(relationship.get("FromFullColumnName", ""))
+        to_match = _FULL_COLUMN.match(relationship.get("ToFullColumnName", ""))
+
+        key = (from_match["table"] if from_match else relationship.get("FromTableName"),
+               from_match["column"] if from_match else None,
+               to_match["table"] if to_match else relationship.get("ToTableName"),
+               to_match["column"] if to_match else None)
+
+        row = {"kind": "relationship",
+               "table": key[0],
+               "name": f"{relationship.get('FromFullColumnName')} -> {relationship.get('ToFullColumnName')}",
+               "in_generated_model": key in generated_relationships,
+               "cardinality": relationship.get("ToCardinality"),
+               "dictionary_bytes": 0,
+               "data_bytes": relationship.get("UsedSize", 0),
+               "hierarchy_bytes": 0,
+               "total_bytes": relationship.get("UsedSize", 0)}
+
+        row["suggestion"] = _suggest(row, None, None)
+        report.append(row)
+
+    report = pd.DataFrame(report, columns=_REPORT_COLUMNS)
+    report = report.sort_values("total_bytes", ascending=False).reset_index(drop=True)
+
+    model_bytes = report["total_bytes"].sum()
+    report["pct_of_model"] = (report["total_bytes"] / model_bytes * 100).round(2) if model_bytes else 0.0
+
+    if top_n is not None:
+        report = report.head(top_n)
+
+    return report
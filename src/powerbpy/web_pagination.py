@@ -0,0 +1,232 @@
+'''M code that reads a web API one page at a time, for add_web_json() and add_web_csv().
+    Every page is requested with Web.Contents(BaseUrl, [RelativePath = ..., Query = ...]) so the base url stays the same for every request.
+    That lets the Power BI service check the data source once, refresh it on a schedule and cache the pages.
+    You should never call these functions directly, instead use the pagination argument of add_web_json() or add_web_csv().
+'''
+
+from urllib.parse import parse_qsl, urlsplit
+
+# the settings each kind of pagination takes, and their defaults (None means it has to be given)
+_PAGINATION_TYPES = {
+    # ?offset=0&limit=1000, then ?offset=1000&limit=1000, ... until a page has fewer than page_size rows
+    "offset": {"offset_param": "offset", "limit_param": "limit", "page_size": 1000, "start": 0, "items_field": None},
+
+    # each response has the url of the next page, until it's null or missing
+    "next_link": {"next_field": "next", "items_field": None},
+
+    # each response has a cursor to pass back for the next page, until it's null or missing
+    "cursor": {"cursor_param": "cursor", "cursor_field": "next_cursor", "items_field": None},
+
+    # one request per date window, from start to end (today when end is None).
+    # end_inclusive is for APIs that return the rows on the end date too: each window then ends the day before the next one starts
+    "date_window": {"start_param": "start", "end_param": "end", "start": None, "end": None, "window_days": 30,
+                    "date_format": "yyyy-MM-dd", "end_inclusive": False, "items_field": None},
+}
+
+# csv pages have no body to read a next link or cursor from
+_CSV_PAGINATION_TYPES = ("offset", "date_window")
+
+
+def _check_pagination(pagination, response_format = "json"):
+
+    '''Fill in the defaults of a pagination dictionary, checking its keys
+
+    Parameters
+    ----------
+    pagination: dict
+        {"type": one of _PAGINATION_TYPES, ...the settings of that type}
+    response_format: str
+        "json" or "csv".
+
+    Returns
+    -------
+    dict
+        The pagination settings with every default filled in.
+    '''
+
+    if not isinstance(pagination, dict) or pagination.get("type") not in _PAGINATION_TYPES:
+        raise ValueError(f"pagination must be a dictionary with a type. Available types include: {', '.join(_PAGINATION_TYPES)}")
+
+    kind = pagination["type"]
+
+    if response_format == "csv" and kind not in _CSV_PAGINATION_TYPES:
+        raise ValueError(f"{kind} pagination reads the next page from the JSON response, so it can't be used with csv APIs. "
+                         f"Available types for csv include: {', '.join(_CSV_PAGINATION_TYPES)}")
+
+    unknown = set(pagination) - set(_PAGINATION_TYPES[kind]) - {"type"}
+    if unknown:
+        raise ValueError(f"Unknown settings for {kind} pagination: {', '.join(sorted(unknown))}. "
+                         f"Available settings include: {', '.join(_PAGINATION_TYPES[kind])}")
+
+    settings = {**_PAGINATION_TYPES[kind], **pagination}
+
+    if response_format == "csv" and settings.get("items_field") is not None:
+        raise ValueError("items_field can only be used with JSON APIs")
+
+    if kind == "offset" and (not isinstance(settings["page_size"], int) or settings["page_size"] < 1):
+        raise ValueError("page_size must be a positive whole number")
+
+    if kind == "date_window":
+        if settings["start"] is None:
+            raise ValueError("date_window pagination needs a start date, e.g. \"2024-01-01\"")
+
+        if not isinstance(settings["window_days"], int) or settings["window_days"] < 1:
+            raise ValueError("window_days must be a positive whole number")
+
+        if not isinstance(settings["end_inclusive"], bool):
+            raise ValueError("end_inclusive must be True or False")
+
+    return settings
+
+
+def _split_url(url):
+
+    '''(base url, relative path, query parameters) for Web.Contents'''
+
+    parts = urlsplit(url)
+
+    if not parts.scheme or not parts.netloc:
+        raise ValueError(f"{url!r} isn't a full url. It should start with https://")
+
+    return f"{parts.scheme}://{parts.netloc}", parts.path.lstrip("/"), parse_qsl(parts.query, keep_blank_values = True)
+
+
+def _m_text(value):
+
+    return '"' + str(value).replace('"', '""') + '"'
+
+
+def _m_record(pairs):
+
+    '''An M record literal, like [#"page size" = "100"]'''
+
+    return "[" + ", ".join(f"#{_m_text(name)} = {expression}" for name, expression in pairs) + "]"
+
+
+def _m_field(expression, path):
+
+    '''Read a (dotted) field from a record, giving null when any part of it is missing'''
+
+    for name in path.split("."):
+        expression = f"Record.FieldOrDefault({expression}, {_m_text(name)}, null)"
+
+    return expression
+
+
+def _m_date(value):
+
+    year, month, day = (int(part) for part in str(value).split("-"))
+
+    return f"#date({year}, {month}, {day})"
+
+
+def _paged_steps(url, pagination, response_format = "json", csv_options = None, result_step = "Source"):
+
+    '''The M steps that request every page of an API and combine them
+
+    Parameters
+    ----------
+    csv_options: str
+        The options record for Csv.Document, e.g. [Delimiter=",", Encoding=65001]. Only used for csv APIs.
+    result_step: str
+        The name of the last step, so the steps after it don't change.
+
+    Returns
+    -------
+    list
+        (step name, expression) pairs. The last step is a list of JSON items or (for csv) one table with the headers promoted.
+    '''
+
+    settings = _check_pagination(pagination, response_format)
+    kind = settings["type"]
+
+    base_url, relative_path, query = _split_url(url)
+
+    if response_format == "csv":
+        body = f"Table.PromoteHeaders(Csv.Document(Web.Contents(BaseUrl, [RelativePath = path, Query = query]), {csv_options}), [PromoteAllScalars=true])"
+        count = "Table.RowCount"
+    else:
+        body = "Json.Document(Web.Contents(BaseUrl, [RelativePath = path, Query = query]))"
+        count = "List.Count"
+
+    items = _m_field("page", settings["items_field"]) if settings.get("items_field") else "page"
+
+    steps = [("BaseUrl", _m_text(base_url)),
+             ("RelativePath", _m_text(relative_path)),
+             ("BaseQuery", _m_record((name, _m_text(value)) for name, value in query)),
+             ("GetPage", f"(path as text, query as record) => {body}"),
+             ("PageItems", f"(page) => {items}")]
+
+    if kind == "offset":
+        page_size = settings["page_size"]
+
+        def request(offset):
+            paging = _m_record([(settings["offset_param"], f"Text.From({offset})"),
+                                (settings["limit_param"], _m_text(page_size))])
+            return f"GetPage(RelativePath, Record.Combine({{BaseQuery, {paging}}}))"
+
+        # stop after the first page that isn't full, instead of asking for one more empty page
+        pages = ("List.Generate(\n"
+                 f"\t\t\t\t\t\t() => [Offset = {settings['start']}, Page = {request(settings['start'])}],\n"
+                 "\t\t\t\t\t\teach [Page] <> null,\n"
+                 f"\t\t\t\t\t\teach if {count}(PageItems([Page])) < {page_size} then [Offset = null, Page = null]\n"
+                 f"\t\t\t\t\t\t\telse [Offset = [Offset] + {page_size}, Page = {request(f'[Offset] + {page_size}')}],\n"
+                 "\t\t\t\t\t\teach PageItems([Page]))")
+
+    elif kind == "next_link":
+        # the next link is split up the same way, so every request still goes through BaseUrl
+        next_link = _m_field("_", settings["next_field"])
+        pages = ("List.Generate(\n"
+                 "\t\t\t\t\t\t() => GetPage(RelativePath, BaseQuery),\n"
+                 "\t\t\t\t\t\teach _ <> null,\n"
+                 f"\t\t\t\t\t\teach let next = {next_link} in if next = null or next = \"\" then null\n"
+                 "\t\t\t\t\t\t\telse let parts = Uri.Parts(next) in GetPage(Text.TrimStart(parts[Path], \"/\"), parts[Query]),\n"
+                 "\t\t\t\t\t\teach PageItems(_))")
+
+    elif kind == "cursor":
+        cursor = _m_field("_", settings["cursor_field"])
+        paging = _m_record([(settings["cursor_param"], "Text.From(cursor)")])
+        pages = ("List.Generate(\n"
+                 "\t\t\t\t\t\t() => GetPage(RelativePath, BaseQuery),\n"
+                 "\t\t\t\t\t\teach _ <> null,\n"
+                 f"\t\t\t\t\t\teach let cursor = {cursor} in if cursor = null or cursor = \"\" then null\n"
+                 f"\t\t\t\t\t\t\telse GetPage(RelativePath, Record.Combine({{BaseQuery, {paging}}})),\n"
+                 "\t\t\t\t\t\teach PageItems(_))")
+
+    else:
+        window_days = settings["window_days"]
+        end = _m_date(settings["end"]) if settings["end"] is not None else "Date.From(DateTime.LocalNow())"
+
+        if settings["date_format"] == "unix":
+            as_text = "(date) => Text.From(Duration.TotalSeconds(DateTime.From(date) - #datetime(1970, 1, 1, 0, 0, 0)))"
+        else:
+            as_text = f"(date) => Date.ToText(date, [Format = {_m_text(settings['date_format'])}, Culture = \"en-US\"])"
+
+        window_end = f"List.Min({{Date.AddDays(_, {window_days}), EndDate}})"
+
+        # the next window starts on this window's end date, so an API that includes its end date would return that day twice
+        if settings["end_inclusive"]:
+            if settings["date_format"] == "unix":
+                window_end = f"Text.From(Number.From(DateText({window_end})) - 1)"
+            else:
+                window_end = f"DateText(Date.AddDays({window_end}, -1))"
+        else:
+            window_end = f"DateText({window_end})"
+
+        window = _m_record([(settings["start_param"], "DateText(_)"),
+                            (settings["end_param"], window_end)])
+
+        steps += [("StartDate", _m_date(settings["start"])),
+                  ("EndDate", end),
+                  ("DateText", as_text)]
+
+        pages = ("List.Generate(\n"
+                 "\t\t\t\t\t\t() => StartDate,\n"
+                 "\t\t\t\t\t\teach _ < EndDate,\n"
+                 f"\t\t\t\t\t\teach Date.AddDays(_, {window_days}),\n"
+                 f"\t\t\t\t\t\teach PageItems(GetPage(RelativePath, Record.Combine({{BaseQuery, {window}}}))))")
+
+    steps.append(("Pages", pages))
+    steps.append((result_step, "Table.Combine(Pages)" if response_format == "csv" else "List.Combine(Pages)"))
+
+    return steps
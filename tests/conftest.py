@@ -0,0 +1,26 @@
+'''Fixtures shared by the test modules.
+'''
+
+import shutil
+from pathlib import Path
+
+import pytest
+
+from powerbpy import Dashboard
+
+
+@pytest.fixture
+def dashboard(tmp_path):
+    """A new, empty dashboard"""
+
+    return Dashboard.create(str(tmp_path / "test_dashboard"))
+
+
+@pytest.fixture
+def example_data(tmp_path):
+    """A copy of the example data files that the test can change"""
+
+    examples_dst = tmp_path / "examples/data"
+    shutil.copytree(Path("examples/data"), examples_dst)
+
+    return examples_dst
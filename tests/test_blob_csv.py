@@ -0,0 +1,294 @@
+'''Tests for csv datasets stored in Azure, using an in-memory stand-in for the storage account.
+'''
+
+import asyncio
+import hashlib
+import io
+import os
+from pathlib import Path
+from types import SimpleNamespace
+
+import pytest
+
+from powerbpy import Dashboard
+from powerbpy.blob_storage import _SampleCache, _StorageSession, _read_csv_sample
+
+
+class FakeDownloader:
+    """Behaves like the azure StorageStreamDownloader for one ranged download
+
+    Like the SDK, properties.size is the size of the range, and only content_range has the size of the whole file.
+    """
+
+    def __init__(self, content, offset, length):
+        end = len(content) if length is None else min(offset + length, len(content))
+        self.content = content[offset:end]
+        content_range = f"bytes {offset}-{end - 1}/{len(content)}" if length is not None else None
+        self.properties = SimpleNamespace(size=len(self.content), content_range=content_range)
+
+    def readinto(self, stream):
+        stream.write(self.content)
+        return len(self.content)
+
+
+class FakeFileClient:
+    """Behaves like a DataLakeFileClient for a file held in memory, recording every download"""
+
+    files = {}
+    downloads = []
+
+    def __init__(self, account_url=None, file_system_name=None, file_path=None):
+        self.key = (account_url, file_system_name, file_path)
+        self.url = f"{account_url}/{file_system_name}/{file_path}"
+
+    def get_file_properties(self):
+        content = FakeFileClient.files[self.key]
+        return SimpleNamespace(etag=hashlib.md5(content).hexdigest(), size=len(content))
+
+    def download_file(self, offset=None, length=None):
+        FakeFileClient.downloads.append((self.key, offset, length))
+        return FakeDownloader(FakeFileClient.files[self.key], offset or 0, length)
+
+
+class FakeServiceClient:
+    """Behaves like a DataLakeServiceClient, counting how many get created"""
+
+    created = []
+
+    def __init__(self, account_url, credential):
+        self.account_url = account_url
+        FakeServiceClient.created.append((account_url, credential))
+
+    def get_file_system_client(self, file_system):
+        return SimpleNamespace(get_file_client=lambda path: FakeFileClient(self.account_url, file_system, path))
+
+
+class FakeAsyncDownloader(FakeDownloader):
+    """The .aio downloader: readinto is a coroutine"""
+
+    async def readinto(self, stream):
+        stream.write(self.content)
+        return len(self.content)
+
+
+class FakeAsyncFileClient(FakeFileClient):
+    """A .aio file client that takes a moment to answer, and records how many downloads overlap"""
+
+    in_flight = 0
+    most_in_flight = 0
+
+    async def download_file(self, offset=None, length=None):
+        FakeAsyncFileClient.in_flight += 1
+        FakeAsyncFileClient.most_in_flight = max(FakeAsyncFileClient.most_in_flight, FakeAsyncFileClient.in_flight)
+
+        await asyncio.sleep(0.01)
+
+        FakeAsyncFileClient.in_flight -= 1
+        FakeFileClient.downloads.append((self.key, offset, length))
+        return FakeAsyncDownloader(FakeFileClient.files[self.key], offset or 0, length)
+
+
+    async def get_file_properties(self):
+        return FakeFileClient.get_file_properties(self)
+
+
+class FakeAsyncServiceClient(FakeServiceClient):
+    """A .aio service client"""
+
+    closed = 0
+
+    def get_file_system_client(self, file_system):
+        return SimpleNamespace(get_file_client=lambda path: FakeAsyncFileClient(self.account_url, file_system, path))
+
+    async def close(self):
+        FakeAsyncServiceClient.closed += 1
+
+
+@pytest.fixture
+def lake(dashboard, tmp_path, monkeypatch):
+    """Point the dashboard's storage session at the in-memory lake"""
+
+    monkeypatch.setenv("POWERBPY_CACHE_DIR", str(tmp_path / "cache"))
+
+    credentials = []
+
+    def login(tenant_id):
+        credentials.append(tenant_id)
+        return object()
+
+    dashboard._storage_session = _StorageSession(service_client_factory=FakeServiceClient,
+                                                 credential_factory=login,
+                                                 async_service_client_factory=FakeAsyncServiceClient)
+
+    FakeFileClient.files = {}
+    FakeFileClient.downloads = []
+    FakeServiceClient.created = []
+    FakeAsyncFileClient.most_in_flight = 0
+    FakeAsyncServiceClient.closed = 0
+
+    return SimpleNamespace(files=FakeFileClient.files, credentials=credentials)
+
+
+def test_sample_is_cut_at_a_row_boundary():
+    content = b"id,name\n" + b"".join(f"{i},store {i}\n".encode() for i in range(1000))
+    client = FakeFileClient()
+    FakeFileClient.files = {client.key: content}
+
+    frame, sampled = _read_csv_sample(client, sample_mb=100 / (1024 * 1024))
+
+    assert sampled
+    assert list(frame.columns) == ["id", "name"]
+    assert frame["name"].iloc[-1] == f"store {frame['id'].iloc[-1]}"
+
+    frame, sampled = _read_csv_sample(client, sample_mb=1)
+
+    assert not sampled
+    assert len(frame) == 1000
+
+
+def test_add_blob_csv_only_downloads_the_sample(dashboard, lake):
+    content = Path("examples/data/colony.csv").read_bytes()
+    lake.files[("https://lake.blob.core.windows.net", "bees", "colony.csv")] = content
+
+    dataset = dashboard.add_blob_csv(data_path="colony.csv",
+                                     account_url="https://lake.blob.core.windows.net",
+                                     blob_name="bees",
+                                     tenant_id="tenant",
+                                     sample_mb=0.01)
+
+    assert dataset.sampled
+    assert FakeFileClient.downloads == [(("https://lake.blob.core.windows.net", "bees", "colony.csv"), 0, 10485)]
+    assert 0 < len(dataset.dataset) < content.count(b"\n") - 1
+
+    tmdl = Path(dataset.dataset_file_path).read_text(encoding="utf-8")
+    assert "column 'colony_lost'" in tmdl
+
+
+def test_blob_datasets_share_one_login_and_client(dashboard, lake):
+    for name in ["colony", "sales_final_dataset", "dim_state"]:
+        lake.files[("https://lake.blob.core.windows.net", "tables", f"{name}.csv")] = Path(f"examples/data/{name}.csv").read_bytes()
+
+        dashboard.add_blob_csv(data_path=f"{name}.csv",
+                               account_url="https://lake.blob.core.windows.net",
+                               blob_name="tables",
+                               tenant_id="tenant")
+
+    assert lake.credentials == ["tenant"]
+    assert len(FakeServiceClient.created) == 1
+    assert [download[0][2] for download in FakeFileClient.downloads] == ["colony.csv", "sales_final_dataset.csv", "dim_state.csv"]
+
+
+def test_add_blob_csvs_downloads_concurrently_and_adds_in_order(dashboard, lake):
+    names = [f"table_{i}" for i in range(10)]
+
+    for i, name in enumerate(names):
+        lake.files[("https://lake.blob.core.windows.net", "tables", f"{name}.csv")] = f"id,value_{i}\n1,2\n".encode()
+
+    datasets = dashboard.add_blob_csvs([f"{name}.csv" for name in names[:-1]] + [{"data_path": f"{names[-1]}.csv", "sample_mb": 1}],
+                                       max_concurrency=3,
+                                       account_url="https://lake.blob.core.windows.net",
+                                       blob_name="tables",
+                                       tenant_id="tenant")
+
+    assert [dataset.dataset_name for dataset in datasets] == names
+    assert [list(dataset.dataset.columns) for dataset in datasets] == [["id", f"value_{i}"] for i in range(10)]
+    lengths = {key[2]: length for key, _, length in FakeFileClient.downloads}
+    assert lengths["table_0.csv"] is None
+    assert lengths["table_9.csv"] == 1024 * 1024
+    assert FakeAsyncFileClient.most_in_flight == 3
+    assert lake.credentials == ["tenant"]
+    assert FakeAsyncServiceClient.closed == 1
+
+    # the model lists the tables in the order they were given
+    model = Path(dashboard.model_path).read_text(encoding="utf-8")
+    assert model.index("ref table table_0") < model.index("ref table table_9")
+
+
+def test_unchanged_blobs_come_from_the_cache(dashboard, lake, tmp_path):
+    key = ("https://lake.blob.core.windows.net", "bees", "colony.csv")
+    lake.files[key] = Path("examples/data/colony.csv").read_bytes()
+
+    def build(name):
+        new_dashboard = Dashboard.create(str(tmp_path / name))
+        new_dashboard._storage_session = dashboard._storage_session
+        new_dashboard.add_blob_csv(data_path="colony.csv",
+                                   account_url="https://lake.blob.core.windows.net",
+                                   blob_name="bees",
+                                   tenant_id="tenant",
+                                   use_cache=True)
+        return new_dashboard
+
+    build("first_build")
+    second_build = build("second_build")
+
+    # the blob changed, so its ETag changed too
+    lake.files[key] = lake.files[key].replace(b"Alabama", b"Alabama (AL)")
+    build("third_build")
+
+    stats = second_build.get_blob_stats().iloc[0]
+
+    assert len(FakeFileClient.downloads) == 2
+    assert stats["files"] == 3
+    assert stats["cache_hits"] == 1
+    assert stats["bytes_from_cache"] == len(Path("examples/data/colony.csv").read_bytes())
+
+    # only this user can read the cached data
+    if os.name == "posix":
+        cached = list((tmp_path / "cache" / "blob_samples").iterdir())
+        assert cached and all(path.stat().st_mode & 0o077 == 0 for path in cached)
+        assert (tmp_path / "cache" / "blob_samples").stat().st_mode & 0o077 == 0
+
+
+def test_blobs_are_only_cached_when_asked(dashboard, lake, tmp_path):
+    lake.files[("https://lake.blob.core.windows.net", "bees", "colony.csv")] = Path("examples/data/colony.csv").read_bytes()
+
+    for _ in range(2):
+        dashboard.add_blob_csv(data_path="colony.csv",
+                               account_url="https://lake.blob.core.windows.net",
+                               blob_name="bees",
+                               tenant_id="tenant")
+
+    assert len(FakeFileClient.downloads) == 2
+    assert not (tmp_path / "cache" / "blob_samples").exists()
+
+
+def test_sample_cache_evicts_the_least_recently_used(tmp_path, monkeypatch):
+    monkeypatch.setenv("POWERBPY_CACHE_DIR", str(tmp_path))
+
+    # room for two samples
+    cache = _SampleCache(max_mb=2.5 / 1024)
+
+    for age, name in enumerate(["a", "b"]):
+        cache.put(name, io.BytesIO(b"x" * 1024), sampled=False)
+        os.utime(tmp_path / "blob_samples" / f"{name}.csv", (age, age))
+
+    # using a makes b the least recently used
+    cache.open("a")[0].close()
+    cache.put("c", io.BytesIO(b"x" * 1024), sampled=True)
+
+    assert cache.open("b") is None
+
+    for name, sampled in [("a", False), ("c", True)]:
+        file, cached_sampled = cache.open(name)
+        with file:
+            assert (file.read(), cached_sampled) == (b"x" * 1024, sampled)
+
+
+def test_big_downloads_are_read_in_chunks(dashboard, lake):
+    # the last row turns an integer column into text, and a chunked read still has to see it
+    rows = "".join(f"{i},{i * 1.5},{i}\n" for i in range(20000))
+    lake.files[("https://lake.blob.core.windows.net", "tables", "big.csv")] = f"id,amount,code\n{rows}20000,1.0,X1\n".encode()
+
+    dataset = dashboard.add_blob_csv(data_path="big.csv",
+                                     account_url="https://lake.blob.core.windows.net",
+                                     blob_name="tables",
+                                     tenant_id="tenant",
+                                     max_memory_mb=0.05)
+
+    assert dataset.sampled
+    assert 0 < len(dataset.dataset) < 20001
+    assert dataset.dataset["code"].dtype == "object"
+    assert dataset.dataset["id"].dtype == "int64"
+
+    tmdl = Path(dataset.dataset_file_path).read_text(encoding="utf-8")
+    assert "column 'code'\n\t\tdataType: string" in tmdl
@@ -0,0 +1,103 @@
+'''Tests for tables loaded from a folder of csv files.
+'''
+
+from pathlib import Path
+
+import pytest
+
+
+@pytest.fixture
+def drops(tmp_path):
+    """Daily drops over two months, where a column is added halfway and a code turns into text"""
+
+    folder = tmp_path / "drops"
+    folder.mkdir()
+
+    for day in ["2024-01-30", "2024-01-31"]:
+        (folder / f"sales_{day}.csv").write_text("store,amount,code\n1,10,5\n2,20,6\n", encoding="utf-8")
+
+    (folder / "sales_2024-02-01.csv").write_text("store,amount,code,channel\n1,1.5,X7,web\n", encoding="utf-8")
+
+    # neither of these are part of the table
+    (folder / "notes.txt").write_text("not a csv", encoding="utf-8")
+    (folder / "old").mkdir()
+    (folder / "old" / "sales_2023-12-31.csv").write_text("store\n1\n", encoding="utf-8")
+
+    return folder
+
+
+def test_add_csv_folder_unifies_the_files_and_reports_drift(dashboard, drops):
+    with pytest.warns(UserWarning, match="2 of the 3 files"):
+        dataset = dashboard.add_csv_folder(str(drops), "sales_*.csv")
+
+    assert dataset.dataset_name == "drops"
+    assert list(dataset.dataset.columns) == ["store", "amount", "code", "channel"]
+    assert len(dataset.dataset) == 5
+    assert [str(dtype) for dtype in dataset.dataset.dtypes] == ["int64", "float64", "object", "object"]
+
+    drift = dataset.schema_drift
+    # the january files are the ones that don't fit the table's columns
+    assert sorted(zip(drift["file"], drift["column"], drift["issue"], drift["file_dtype"])) == [
+        ("sales_2024-01-30.csv", "channel", "missing", None),
+        ("sales_2024-01-30.csv", "code", "type", "int64"),
+        ("sales_2024-01-31.csv", "channel", "missing", None),
+        ("sales_2024-01-31.csv", "code", "type", "int64")]
+
+    tmdl = Path(dataset.dataset_file_path).read_text(encoding="utf-8")
+    folder = str(drops).replace("/", "\\")
+
+    assert tmdl.count("\tpartition ") == 1
+    assert f'Source = Folder.Files("{folder}")' in tmdl
+    assert (f'Table.SelectRows(Source, each [Folder Path] = "{folder}\\" and '
+            'Text.StartsWith([Name], "sales_", Comparer.OrdinalIgnoreCase) and Text.EndsWith([Name], ".csv", Comparer.OrdinalIgnoreCase))') in tmdl
+    assert 'Table.Combine(#"Parsed Files"[Data])' in tmdl
+    assert 'Table.SelectColumns(#"Promoted Headers", {"store", "amount", "code", "channel"}, MissingField.UseNull)' in tmdl
+    assert "Columns=" not in tmdl
+    assert "column 'code'\n\t\tdataType: string" in tmdl
+
+
+def test_add_csv_folder_writes_a_partition_per_file_or_month(dashboard, drops):
+    with pytest.warns(UserWarning):
+        by_file = dashboard.add_csv_folder(str(drops), "sales_*.csv", table_name="sales_by_day", partition_by="file")
+        by_month = dashboard.add_csv_folder(str(drops), "sales_*.csv", table_name="sales_by_month", partition_by="month")
+
+    tmdl = Path(by_file.dataset_file_path).read_text(encoding="utf-8")
+    assert tmdl.count("\tpartition ") == 3
+    assert "\tpartition 'sales_2024-01-30' = m" in tmdl
+    assert "Folder.Files" not in tmdl
+
+    tmdl = Path(by_month.dataset_file_path).read_text(encoding="utf-8")
+    assert tmdl.count("\tpartition ") == 2
+    assert "\tpartition 'sales_by_month_2024-01' = m" in tmdl
+    assert 'and Text.Contains([Name], "2024-02")' in tmdl
+
+    # every partition ends in the same columns and types
+    assert tmdl.count('Table.SelectColumns(#"Promoted Headers", {"store", "amount", "code", "channel"}, MissingField.UseNull)') == 2
+    assert tmdl.count("annotation PBI_ResultType") == 1
+
+    with pytest.raises(ValueError):
+        dashboard.add_csv_folder(str(drops), "*.txt", table_name="notes", partition_by="month")
+
+
+def test_source_query_dimensions_need_a_single_partition(dashboard, drops):
+    with pytest.warns(UserWarning):
+        dashboard.add_csv_folder(str(drops), "sales_*.csv", table_name="sales_by_day", partition_by="file")
+        dashboard.add_csv_folder(str(drops), "sales_*.csv", table_name="sales", partition_by="folder")
+
+    # a shared expression made from the first partition would only have the first file's stores
+    with pytest.raises(ValueError, match="3 partitions"):
+        dashboard.add_dimension_table("dim_day_store", "sales_by_day", ["store"], from_source_query=True)
+
+    # nothing was staged
+    assert not (Path(dashboard.model_path).parent / "expressions.tmdl").exists()
+
+    # a calculated dimension reads every partition's rows from the loaded table
+    dim_day_store = dashboard.add_dimension_table("dim_day_store", "sales_by_day", ["store"])
+    assert "= calculated" in Path(dim_day_store.dataset_file_path).read_text(encoding="utf-8")
+
+    dim_store = dashboard.add_dimension_table("dim_store", "sales", ["store"], from_source_query=True)
+
+    expressions = (Path(dashboard.model_path).parent / "expressions.tmdl").read_text(encoding="utf-8")
+    assert "expression sales_source =" in expressions
+    assert expressions.count("Folder.Files") == 1
+    assert sorted(dim_store.dataset["store"]) == [1, 2]
@@ -0,0 +1,280 @@
+'''Tests for the functions that analyze a dashboard's semantic model.
+'''
+
+import json
+import re
+import zipfile
+from pathlib import Path
+
+import pytest
+
+
+@pytest.fixture
+def dashboard(dashboard, example_data):
+    """A new dashboard with the example csv files loaded"""
+
+    dashboard.add_local_csv(data_path=str(example_data / "colony.csv"))
+    dashboard.add_local_csv(data_path=str(example_data / "wa_bigfoot_by_county.csv"))
+
+    return dashboard
+
+
+def test_estimate_model_size_ranks_columns(dashboard):
+    report = dashboard.estimate_model_size()
+
+    assert set(report["table"]) == {"colony", "wa_bigfoot_by_county"}
+    assert report["total_bytes"].is_monotonic_decreasing
+    assert report["pct_of_model"].sum() == pytest.approx(100, abs=0.1)
+
+
+def test_estimate_model_size_scales_sampled_tables(dashboard):
+    small = dashboard.estimate_model_size(level="table")
+    big = dashboard.estimate_model_size(level="table", row_counts={"colony": 10_000_000})
+
+    small_colony = small.loc[small["table"] == "colony", "total_bytes"].item()
+    big_colony = big.loc[big["table"] == "colony", "total_bytes"].item()
+
+    assert big_colony > small_colony * 1000
+
+    with pytest.warns(UserWarning):
+        dashboard.estimate_model_size(row_counts={"colony": 10_000_000}, max_model_size_mb=1)
+
+
+def _cells_touched(tmdl, rows):
+    """A simple cost model for a csv query's refresh: every step that transforms columns reads each cell of the columns it lists once"""
+
+    cells = 0
+
+    for function, step in re.findall(r'Table\.(ReplaceValue|TransformColumnTypes|TransformColumns)\((.*)', tmdl):
+        if function == "ReplaceValue":
+            # the columns are the last list: {"a", "b"}
+            columns = re.findall(r'"[^"]*"', step[step.rindex("{"):])
+        else:
+            # one {"a", ...} entry per column
+            columns = re.findall(r'\{"[^"]*",', step)
+
+        cells += rows * len(columns)
+
+    return cells
+
+
+def test_csv_m_code_converts_each_cell_once(dashboard):
+    colony = dashboard.datasets[0]
+    tmdl = Path(colony.dataset_file_path).read_text(encoding="utf-8")
+    rows, columns = colony.dataset.shape
+
+    assert "Table.ReplaceValue" not in tmdl
+    assert "QuoteStyle=QuoteStyle.Csv" in tmdl
+
+    # columns without missing values skip the null check, and text columns without them aren't touched
+    assert '{"year", each Number.From(_, "en-US"), type number}' in tmdl
+    assert '{"colony_lost", each if _ = "NA" or _ = "null" or _ = "" then null else Number.From(_, "en-US"), type number}' in tmdl
+    assert '{"state",' not in tmdl
+
+    # the replace-then-convert query this replaced read every cell twice
+    before = rows * columns * 2
+
+    assert _cells_touched(tmdl, rows) == rows * 8
+    assert _cells_touched(tmdl, rows) < before / 2
+
+
+def test_analyze_vpax_maps_columns_to_the_generated_model(dashboard, tmp_path):
+    view = {"ModelName": "test_dashboard",
+            "Tables": [{"TableName": "colony", "RowsCount": 5_000_000}],
+            "Columns": [{"TableName": "colony", "ColumnName": "colony_n", "DataType": "Double",
+                         "Encoding": "HASH", "ColumnCardinality": 4_000_000, "DictionarySize": 90_000_000,
+                         "DataSize": 20_000_000, "HierarchiesSize": 30_000_000, "TotalSize": 140_000_000},
+                        {"TableName": "colony", "ColumnName": "state", "DataType": "String",
+                         "Encoding": "HASH", "ColumnCardinality": 47, "DictionarySize": 3_000,
+                         "DataSize": 4_000_000, "HierarchiesSize": 500, "TotalSize": 4_003_500},
+                        {"TableName": "colony", "ColumnName": "RowNumber-2662979B-1795-4F74-8F37-6A1BA8059B61",
+                         "DataType": "Int64", "TotalSize": 1_000},
+                        {"TableName": "colony", "ColumnName": "load_time", "DataType": "DateTime",
+                         "Encoding": "HASH", "ColumnCardinality": 2_000_000, "TotalSize": 50_000_000}],
+            "Relationships": []}
+
+    vpax_path = tmp_path / "model.vpax"
+    with zipfile.ZipFile(vpax_path, "w") as archive:
+        archive.writestr("DaxVpaView.json", json.dumps(view))
+
+    report = dashboard.analyze_vpax(str(vpax_path))
+
+    assert list(report["name"]) == ["colony_n", "load_time", "state"]
+    assert list(report["in_generated_model"]) == [True, False, True]
+    assert report.loc[0, "generated_data_type"] == "double"
+    assert "value encoded" in report.loc[0, "suggestion"]
+    assert "Not in the generated model" in report.loc[1, "suggestion"]
+    assert report.loc[0, "estimated_bytes"] > 0
+
+
+def test_dax_dependencies(dashboard):
+    colony = dashboard.datasets[0]
+    colony.add_measure("Lost", "SUM(colony[colony_lost])")
+    colony.add_measure("Lost Share", "DIVIDE([Lost], CALCULATE([Lost], ALL('colony')))")
+    colony.add_column("lost_double", "colony[colony_lost] * 2", "double", lint=False)
+
+    graph = dashboard.dax_dependencies()
+
+    impact = graph.impact("colony", "colony_lost")
+    assert list(zip(impact["name"], impact["distance"])) == [("Lost", 1), ("lost_double", 1), ("Lost Share", 2)]
+
+    order = graph.topological_order()
+    assert order.index(("colony", "Lost")) < order.index(("colony", "Lost Share"))
+    assert not graph.find_cycles()
+
+    graph.add("colony", "Lost", "measure", "[Lost Share] * 2")
+    assert graph.find_cycles() == [[("colony", "Lost"), ("colony", "Lost Share")]]
+
+    with pytest.raises(ValueError):
+        graph.topological_order()
+
+
+def test_lint_dax(dashboard):
+    colony = dashboard.datasets[0]
+
+    with pytest.warns(UserWarning, match="filter-whole-table"):
+        colony.add_measure("Big Losses", "CALCULATE(SUM(colony[colony_lost]), FILTER(colony, colony[colony_lost] > 1000))")
+
+    colony.add_measure("Lost", "SUM(colony[colony_lost])")
+    colony.add_measure("Lost Or Zero", "IF(ISBLANK([Lost]), 0, [Lost])", lint=False)
+
+    findings = dashboard.lint_dax()
+
+    assert set(zip(findings["object"], findings["rule"])) == {("Big Losses", "filter-whole-table"),
+                                                              ("Lost Or Zero", "blank-to-zero")}
+
+    finding = findings[findings["object"] == "Lost Or Zero"].iloc[0]
+    tmdl_line = Path(finding["path"]).read_text(encoding="utf-8").splitlines()[finding["line"] - 1]
+    assert "IF(ISBLANK([Lost]), 0, [Lost])" in tmdl_line
+
+
+def test_shape_map_bins_scan_the_data_once(dashboard, tmp_path, monkeypatch, recwarn):
+    page = dashboard.new_page("Map")
+
+    # only the generated measures are linted, not the whole model
+    def lint_model(definition_folder):
+        raise AssertionError("the whole model was linted")
+
+    monkeypatch.setattr("powerbpy.dax_lint._lint_model", lint_model)
+
+    page.add_shape_map(visual_id="bigfoots_by_county_map",
+                       data_source="wa_bigfoot_by_county",
+                       shape_file_path=str(tmp_path / "examples/data/2019_53_WA_Counties9467365124727016.json"),
+                       map_title="Washington State Bigfoot Sightings by County",
+                       location_var="county",
+                       color_var="count",
+                       filtering_var="season",
+                       percentile_bin_breaks=[0, 0.2, 0.4, 0.6, 0.8, 1],
+                       color_palette=["#efb5b9", "#e68f96", "#de6a73", "#a1343c", "#6b2328"],
+                       height=534,
+                       width=816,
+                       x_position=75,
+                       y_position=132,
+                       add_legend=True)
+
+    # the library's own blank-to-zero in the grey "no data" bin isn't reported
+    assert not [warning for warning in recwarn if "bin measures" in str(warning.message)]
+
+    graph = dashboard.dax_dependencies()
+    table = "wa_bigfoot_by_county"
+
+    def scans(name):
+        nodes = [(table, name), *graph.dependencies(table, name, transitive=True)]
+        return sum((graph.expressions[node][0] or "").count("CALCULATE") for node in nodes if node in graph.expressions)
+
+    # the map and each legend card used to recalculate every percentile they needed (27 scans in all, now 7)
+    assert scans("Bin Assignment Measure") == 2
+    assert [scans(f"Bin {i} Range") for i in range(1, 6)] == [1] * 5
+    assert graph.expressions[(table, "Bin Boundaries")][0].count("PERCENTILEX.INC") == 6
+
+    # the percentile measures reuse those percentiles too
+    for percentile in [20, 40, 60, 80, 100]:
+        assert scans(f"{percentile} percentile") == 1
+        assert "PERCENTILE" not in graph.expressions[(table, f"{percentile} percentile")][0]
+
+
+def test_shape_map_precomputes_unfiltered_percentile_bins(dashboard, tmp_path):
+    page = dashboard.new_page("Map")
+
+    shape_map = page.add_shape_map(visual_id="bigfoots_by_county_map",
+                                   data_source="wa_bigfoot_by_county",
+                                   shape_file_path=str(tmp_path / "examples/data/2019_53_WA_Counties9467365124727016.json"),
+                                   map_title="Washington State Bigfoot Sightings by County",
+                                   location_var="county",
+                                   color_var="count",
+                                   percentile_bin_breaks=[0, 0.5, 1],
+                                   color_palette=["#efb5b9", "#6b2328"],
+                                   height=534,
+                                   width=816,
+                                   x_position=75,
+                                   y_position=132)
+
+    totals = dashboard.datasets[1].dataset.groupby("county")["count"].sum()
+
+    visual = json.loads(Path(shape_map.visual_json_path).read_text(encoding="utf-8"))
+    cases = visual["visual"]["objects"]["dataPoint"][-1]["properties"]["fill"]["solid"]["color"]["expr"]["Conditional"]["Cases"]
+    breaks = [float(case["Condition"]["And"]["Left"]["Comparison"]["Right"]["Literal"]["Value"][:-1]) for case in cases]
+    last = cases[-1]["Condition"]["And"]["Right"]["Comparison"]
+
+    assert breaks == [totals.min(), round(totals.median(), 2)]
+    assert float(last["Right"]["Literal"]["Value"][:-1]) == totals.max()
+    assert last["ComparisonKind"] == 4
+
+    # no DAX percentile measures are needed
+    tmdl = Path(dashboard.datasets[1].dataset_file_path).read_text(encoding="utf-8")
+    assert "PERCENTILE" not in tmdl
+
+
+def test_dimension_tables_are_calculated_from_the_loaded_fact_table(dashboard):
+    colony = dashboard.datasets[0]
+    colony_tmdl = Path(colony.dataset_file_path).read_text(encoding="utf-8")
+
+    dim_period = dashboard.add_dimension_table("dim_period", "colony", ["year", "months"])
+
+    # the csv is only imported by the fact table, which is left alone
+    assert Path(colony.dataset_file_path).read_text(encoding="utf-8") == colony_tmdl
+    assert not (Path(dashboard.model_path).parent / "expressions.tmdl").exists()
+
+    tmdl = Path(dim_period.dataset_file_path).read_text(encoding="utf-8")
+    assert "\tpartition dim_period = calculated\n\t\tmode: import\n" in tmdl
+    assert "source = DISTINCT ( SELECTCOLUMNS ( 'colony', \"year\", 'colony'[year], \"months\", 'colony'[months] ) )" in tmdl
+    assert "column 'months'\n\t\tdataType: string" in tmdl
+    assert "sourceColumn: [months]" in tmdl
+    assert "Source" not in tmdl
+
+    # it isn't a Power Query query
+    model = Path(dashboard.model_path).read_text(encoding="utf-8")
+    assert "ref table dim_period" in model
+    assert "'dim_period'" not in re.search(r"annotation PBI_QueryOrder = (.*)", model).group(1)
+
+    graph = dashboard.dax_dependencies()
+    assert ("colony", "months") in graph.dependencies("dim_period", None)
+
+
+def test_dimension_tables_can_share_the_fact_tables_source(dashboard):
+    colony = dashboard.datasets[0]
+
+    dim_state = dashboard.add_dimension_table("dim_state", "colony", ["state"], from_source_query=True)
+    dim_period = dashboard.add_dimension_table("dim_period", "colony", ["year", "months"], from_source_query=True)
+
+    expressions = (Path(dashboard.model_path).parent / "expressions.tmdl").read_text(encoding="utf-8")
+
+    # the csv is only referenced by the shared expression, every table points at it
+    assert expressions.count("File.Contents") == 1
+    assert expressions.startswith("expression colony_source =\n\t\tlet\n")
+
+    for table in [colony, dim_state, dim_period]:
+        tmdl = Path(table.dataset_file_path).read_text(encoding="utf-8")
+        assert "File.Contents" not in tmdl
+        assert 'Source = #"colony_source"' in tmdl
+
+    dim_tmdl = Path(dim_state.dataset_file_path).read_text(encoding="utf-8")
+    assert 'Table.SelectColumns(Source, {"state"})' in dim_tmdl
+    assert "column 'state'" in dim_tmdl
+    assert len(dim_state.dataset) == colony.dataset["state"].nunique()
+
+    model = Path(dashboard.model_path).read_text(encoding="utf-8")
+    assert "ref table dim_period" in model
+
+    with pytest.raises(ValueError):
+        dashboard.add_dimension_table("dim_missing", "colony", ["not_a_column"])
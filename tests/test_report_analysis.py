@@ -0,0 +1,340 @@
+'''Tests for the functions that analyze a dashboard's report pages and visuals.
+'''
+
+import json
+from pathlib import Path
+
+import pytest
+
+
+@pytest.fixture
+def dashboard(dashboard, example_data):
+    """A new dashboard with two pages of charts"""
+
+    dashboard.add_local_csv(data_path=str(example_data / "colony.csv"))
+
+    page1 = dashboard.new_page("Bee Colonies")
+    page1.add_chart(visual_id="colonies_lost_by_year",
+                    chart_type="columnChart",
+                    data_source="colony",
+                    chart_title="Colonies Lost per Year",
+                    x_axis_title="Year",
+                    y_axis_title="Number of Colonies",
+                    x_axis_var="year",
+                    y_axis_var="colony_lost",
+                    y_axis_var_aggregation_type="Sum",
+                    x_position=0,
+                    y_position=0,
+                    height=300,
+                    width=300)
+
+    page2 = dashboard.new_page("States")
+    page2.add_chart(visual_id="colonies_by_state",
+                    chart_type="barChart",
+                    data_source="colony",
+                    chart_title="Colonies by State",
+                    x_axis_title="State",
+                    y_axis_title="Number of Colonies",
+                    x_axis_var="state",
+                    y_axis_var="colony_n",
+                    y_axis_var_aggregation_type="Sum",
+                    x_position=0,
+                    y_position=0,
+                    height=300,
+                    width=300)
+
+    return dashboard
+
+
+def _event(event_id, name, start_ms, end_ms, parent_id=None, visual_id=None):
+    event = {"name": name,
+             "component": "Report Canvas",
+             "id": event_id,
+             "start": f"2024-05-07T10:00:{start_ms // 1000:02d}.{start_ms % 1000:03d}Z",
+             "end": f"2024-05-07T10:00:{end_ms // 1000:02d}.{end_ms % 1000:03d}Z",
+             "metrics": {}}
+
+    if parent_id is not None:
+        event["parentId"] = parent_id
+    if visual_id is not None:
+        event["metrics"]["visualId"] = visual_id
+
+    return event
+
+
+def test_load_performance_log_attributes_time_to_visuals(dashboard, tmp_path):
+    events = [_event("1", "Visual Container Lifecycle", 0, 2000, visual_id="colonies_by_state"),
+              _event("2", "Query", 10, 1500, parent_id="1"),
+              _event("3", "Execute DAX Query", 20, 1420, parent_id="2"),
+              _event("4", "Render", 1500, 1900, parent_id="1"),
+              _event("5", "Visual Container Lifecycle", 0, 300, visual_id="colonies_lost_by_year"),
+              _event("6", "Execute DAX Query", 0, 100, parent_id="5"),
+              _event("7", "Visual Container Lifecycle", 0, 50, visual_id="not_ours")]
+
+    log_path = tmp_path / "PowerBIPerformanceData.json"
+    log_path.write_text(json.dumps({"version": "1.1.0", "events": events}), encoding="utf-8")
+
+    report = dashboard.load_performance_log(str(log_path))
+
+    slowest = report.iloc[0]
+    assert slowest["visual_id"] == "colonies_by_state"
+    assert slowest["page_name"] == "States"
+    assert slowest["dax_query_ms"] == pytest.approx(1400)
+    assert slowest["visual_display_ms"] == pytest.approx(400)
+    assert slowest["other_ms"] == pytest.approx(200)
+    assert "colony[state]" in slowest["fields"]
+    assert not report.loc[report["visual_id"] == "not_ours", "in_report"].item()
+
+    pages = dashboard.load_performance_log(str(log_path), by="page")
+    assert pages.iloc[0]["page_name"] == "States"
+    assert pages.iloc[0]["slowest_visual"] == "colonies_by_state"
+
+
+def test_find_unused_fields_lists_and_drops_fields(dashboard):
+    colony = dashboard.datasets[0]
+    colony.add_measure("Lost", "SUM(colony[colony_lost_pct])")
+    colony.add_measure("Lost Twice", "[Lost] * 2")
+
+    # a visual without field references (like a text box) is skipped before it's parsed
+    text_box = Path(dashboard.pages_folder) / dashboard.pages[0].page_id / "visuals" / "text_box" / "visual.json"
+    text_box.parent.mkdir()
+    text_box.write_text("not parsed", encoding="utf-8")
+
+    unused = dashboard.find_unused_fields()
+    unused_names = set(unused["name"])
+
+    assert {"year", "colony_lost", "state", "colony_n"}.isdisjoint(unused_names)
+    assert {"months", "colony_max", "Lost", "Lost Twice", "colony_lost_pct"} <= unused_names
+
+    dashboard.find_unused_fields(drop=True)
+
+    tmdl = Path(colony.dataset_file_path).read_text(encoding="utf-8")
+    assert "column 'months'" not in tmdl
+    assert "measure 'Lost'" not in tmdl
+    assert '{"months", type' not in tmdl
+    assert 'Table.RemoveColumns(#"Changed Type", {"months"' in tmdl
+    assert "column 'year'" in tmdl
+
+    assert dashboard.find_unused_fields().empty
+
+
+def test_simplify_shape_file_keeps_shared_borders(dashboard, tmp_path):
+    shape_file_path = tmp_path / "examples/data/2019_53_WA_Counties9467365124727016.json"
+    output_path = tmp_path / "wa_counties.json"
+
+    report = dashboard.simplify_shape_file(str(shape_file_path), str(output_path), tolerance=0.001, properties=["NAME"])
+
+    row = report.iloc[0]
+    assert row["features"] == 39
+    assert row["output_bytes"] < row["input_bytes"] / 4
+    assert row["output_points"] < row["input_points"] / 5
+
+    topology = json.loads(output_path.read_text(encoding="utf-8"))
+    counties = topology["objects"]["53_counties"]["geometries"]
+    assert counties[0]["properties"] == {"NAME": "Wahkiakum"}
+
+    # neighboring counties still share the arcs along their border
+    def arc_indexes(county):
+        polygons = [county["arcs"]] if county["type"] == "Polygon" else county["arcs"]
+        return [index if index >= 0 else ~index for polygon in polygons for ring in polygon for index in ring]
+
+    used = [index for county in counties for index in arc_indexes(county)]
+    assert len(used) > len(set(used)) == len(topology["arcs"])
+
+    page = dashboard.new_page("Map")
+
+    with pytest.warns(UserWarning, match="47 of the 47 state values"):
+        shape_map = page.add_shape_map(visual_id="wa_map",
+                                       data_source="colony",
+                                       shape_file_path=str(shape_file_path),
+                                       map_title="Map",
+                                       location_var="state",
+                                       color_var="colony_n",
+                                       static_bin_breaks=[0, 1000, 1_000_000],
+                                       color_palette=["#efb5b9", "#6b2328"],
+                                       height=300,
+                                       width=300,
+                                       x_position=0,
+                                       y_position=0,
+                                       simplify_tolerance=0.001)
+
+    registered = Path(dashboard.registered_resources_folder) / shape_file_path.name
+    assert registered.stat().st_size == shape_map.shape_file_report["output_bytes"].item()
+
+
+def test_check_shape_map_keys_suggests_near_misses(dashboard, tmp_path):
+    data_path = tmp_path / "sightings.csv"
+    data_path.write_text("county,count\nbenton county,1\nKings County,2\nKings County,3\nNowhere,4\nWhatcom County,5\n", encoding="utf-8")
+    dashboard.add_local_csv(data_path=str(data_path))
+
+    shape_file_path = str(tmp_path / "examples/data/2019_53_WA_Counties9467365124727016.json")
+
+    report = dashboard.check_shape_map_keys(shape_file_path, "sightings", "county")
+
+    assert (report["key_property"] == "NAMELSAD").all()
+    assert report["matched"].tolist() == [False, False, False, True]
+    assert dict(zip(report["location"], report["suggestion"])) == {"Kings County": "King County",
+                                                                   "benton county": "Benton County",
+                                                                   "Nowhere": None,
+                                                                   "Whatcom County": None}
+
+
+def test_registered_resources_are_stored_once(dashboard, tmp_path):
+    image_path = tmp_path / "examples/data/Taipei_skyline_at_sunset_20150607.jpg"
+
+    for page in dashboard.pages:
+        page.add_background_image(str(image_path))
+
+    # a different image with the same name must not overwrite the first one
+    other_image_path = tmp_path / "other" / image_path.name
+    other_image_path.parent.mkdir()
+    other_image_path.write_bytes(b"not really a jpeg")
+    dashboard.pages[0].add_background_image(str(other_image_path))
+
+    resources_folder = Path(dashboard.registered_resources_folder)
+    assert len(list(resources_folder.iterdir())) == 2
+    assert (resources_folder / image_path.name).read_bytes() == image_path.read_bytes()
+
+    report_json = json.loads(Path(dashboard.report_json_path).read_text(encoding="utf-8"))
+    items = next(package["items"] for package in report_json["resourcePackages"] if package["name"] == "RegisteredResources")
+    assert sorted(item["path"] for item in items) == sorted(path.name for path in resources_folder.iterdir())
+
+    page_json = json.loads(Path(dashboard.pages[0].page_json_path).read_text(encoding="utf-8"))
+    item_name = page_json["objects"]["background"][0]["properties"]["image"]["image"]["url"]["expr"]["ResourcePackageItem"]["ItemName"]
+    assert item_name != image_path.name and (resources_folder / item_name).read_bytes() == b"not really a jpeg"
+
+
+def test_background_images_are_optimized_once(dashboard, tmp_path, monkeypatch):
+    pytest.importorskip("PIL")
+    monkeypatch.setenv("POWERBPY_CACHE_DIR", str(tmp_path / "cache"))
+
+    image_path = tmp_path / "examples/data/Taipei_skyline_at_sunset_20150607.jpg"
+
+    first, second = (page.add_background_image(str(image_path), optimize=True, quality=70) for page in dashboard.pages)
+
+    report = first.optimization_report.iloc[0]
+    assert report["width"] <= 1280 and report["height"] <= 720
+    assert report["optimized_bytes"] < report["original_bytes"]
+    assert not report["cached"]
+    assert second.optimization_report["cached"].item()
+
+    # both pages use the same optimized file
+    registered = list(Path(dashboard.registered_resources_folder).iterdir())
+    assert [path.name for path in registered] == [image_path.name]
+    assert registered[0].stat().st_size == report["optimized_bytes"]
+
+
+def test_optimized_images_never_keep_their_metadata(dashboard, tmp_path, monkeypatch):
+    Image = pytest.importorskip("PIL.Image")
+    monkeypatch.setenv("POWERBPY_CACHE_DIR", str(tmp_path / "cache"))
+
+    # a small, heavily compressed photo with a GPS location, which re-encoding at quality 95 can't shrink
+    exif = Image.Exif()
+    exif[0x010F] = "Camera Maker"
+    exif[0x8825] = {1: "N", 2: (47.0, 36.0, 22.0)}
+
+    image_path = tmp_path / "photo.jpg"
+    Image.frombytes("RGB", (128, 128), bytes(range(256)) * 192).save(image_path, quality=20, exif=exif)
+
+    background = dashboard.pages[0].add_background_image(str(image_path), optimize=True, quality=95)
+    report = background.optimization_report.iloc[0]
+
+    optimized = next(Path(dashboard.registered_resources_folder).iterdir())
+    assert b"Exif" not in optimized.read_bytes()
+    assert report["optimized_bytes"] <= report["original_bytes"]
+
+    with Image.open(optimized) as image:
+        assert not image.getexif()
+
+
+def test_sanky_links_from_data_skip_missing_pairs(dashboard, tmp_path):
+    dashboard.add_local_csv(data_path=str(tmp_path / "examples/data/sales_final_dataset.csv"))
+    page = dashboard.new_page("Store Sizes")
+
+    sanky = page.add_sanky_chart(visual_id="store_sizes",
+                                 data_source="sales_final_dataset",
+                                 chart_title="Store Starting and Ending Size",
+                                 starting_var="Starting Size",
+                                 ending_var="Ending Size",
+                                 values_from_var="Name",
+                                 links_from_data=True,
+                                 x_position=0,
+                                 y_position=0,
+                                 height=800,
+                                 width=615)
+
+    with open(sanky.visual_json_path, encoding="utf-8") as file:
+        links = json.load(file)["visual"]["objects"]["links"]
+
+    pairs = [tuple(selector["scopeId"]["Comparison"]["Right"]["Literal"]["Value"] for selector in link["selector"]["data"])
+             for link in links]
+
+    # no store went from small to large, so that link isn't written
+    assert len(pairs) == 8
+    assert ("'Small'", "'Large'") not in pairs
+    assert pairs[0] == ("'Large'", "'Large'")
+
+
+def test_top_n_adds_a_visual_level_filter(dashboard):
+    page = dashboard.pages[0]
+    chart = page.add_chart(visual_id="top_states",
+                           data_source="colony",
+                           chart_title="Colonies Lost by State",
+                           x_axis_title="State",
+                           y_axis_title="Colonies Lost",
+                           x_axis_var="state",
+                           y_axis_var="colony_lost",
+                           y_axis_var_aggregation_type="Sum",
+                           x_position=0,
+                           y_position=300,
+                           height=300,
+                           width=300,
+                           top_n=10)
+
+    with open(chart.visual_json_path, encoding="utf-8") as file:
+        (top_n_filter,) = json.load(file)["filterConfig"]["filters"]
+
+    query = top_n_filter["filter"]["From"][0]["Expression"]["Subquery"]["Query"]
+
+    assert top_n_filter["type"] == "TopN"
+    assert top_n_filter["field"]["Column"]["Property"] == "state"
+    assert query["Top"] == 10
+    assert query["OrderBy"] == [{"Direction": 2,
+                                 "Expression": {"Aggregation": {"Expression": {"Column": {"Expression": {"SourceRef": {"Source": "c"}},
+                                                                                          "Property": "colony_lost"}},
+                                                                "Function": 0}}}]
+
+    with pytest.raises(ValueError, match="top_n_by"):
+        page.add_table(visual_id="top_table", data_source="colony", variables=["state", "year"],
+                       x_position=300, y_position=0, height=300, width=300, top_n=True)
+
+
+def test_set_interactions_writes_the_page_matrix(dashboard):
+    page = dashboard.pages[0]
+    page.add_slicer(data_source="colony", column_name="state", visual_id="state_slicer",
+                    height=100, width=200, x_position=300, y_position=0)
+    page.add_chart(visual_id="colonies_added", chart_type="barChart", data_source="colony",
+                   chart_title="Colonies Added", x_axis_title="Year", y_axis_title="Colonies",
+                   x_axis_var="year", y_axis_var="colony_added", y_axis_var_aggregation_type="Sum",
+                   x_position=300, y_position=100, height=300, width=300)
+    page.add_text_box(text="Notes", visual_id="notes", height=50, width=200, x_position=600, y_position=0)
+
+    report = page.set_interactions({("colonies_added", "colonies_lost_by_year"): "Highlight"},
+                                   slicers="Filter",
+                                   default="None")
+
+    page_json = json.loads(Path(page.page_json_path).read_text(encoding="utf-8"))
+    matrix = {(item["source"], item["target"]): item["type"] for item in page_json["visualInteractions"]}
+
+    # 3 visuals that query data, text boxes are left out
+    assert len(report) == 6
+    assert matrix[("state_slicer", "colonies_added")] == "DataFilter"
+    assert matrix[("colonies_added", "colonies_lost_by_year")] == "HighlightFilter"
+    assert matrix[("colonies_lost_by_year", "colonies_added")] == "NoFilter"
+
+    # back to the default removes the entries
+    page.set_interactions(default="Default")
+    assert "visualInteractions" not in json.loads(Path(page.page_json_path).read_text(encoding="utf-8"))
+
+    with pytest.raises(ValueError, match="notes"):
+        page.set_interactions({"notes": "None"})
@@ -0,0 +1,316 @@
+'''Tests for datasets that Power BI loads from web APIs.
+'''
+
+import csv
+import datetime
+import http.server
+import io
+import json
+import re
+import threading
+import urllib.request
+from pathlib import Path
+from urllib.parse import parse_qsl, urlencode, urlsplit
+
+import pytest
+
+from powerbpy.json_stream import _iter_json_array
+
+
+def test_json_array_is_read_one_item_at_a_time():
+    items = [{"id": i, "name": f"store {i}", "tags": ["a", "b"]} for i in range(500)] + [12345]
+    text = json.dumps(items, indent=2)
+
+    # tiny chunks split items, strings and the last number across reads
+    assert list(_iter_json_array(io.StringIO(text), chunk_size=7)) == items
+
+
+def test_add_web_json_infers_every_field_from_a_json_sample(dashboard, tmp_path):
+    records = [{"id": 1, "placed": "2024-01-05T10:30:00Z", "customer": {"name": "Ann", "city": "Oslo"}, "tags": ["new"]},
+               {"id": 2, "placed": "2024-01-06T08:00:00+01:00", "customer": {"name": "Bo", "vip": True},
+                "lines": [{"sku": "A", "qty": 2}, {"sku": "B", "qty": 1}], "code": 7},
+               {"id": 3, "placed": None, "customer": None, "lines": [], "code": "X7", "extra": {"any": 1}},
+               {"id": 4, "extra": "plain"}]
+
+    sample = tmp_path / "orders.json"
+    sample.write_text(json.dumps(records), encoding="utf-8")
+
+    dataset = dashboard.add_web_json(table_name="orders",
+                                     url="https://api.example.com/orders",
+                                     sample_json=str(sample))
+
+    assert list(dataset.dataset.columns) == ["id", "placed", "customer.name", "customer.city", "customer.vip",
+                                             "tags", "lines.sku", "lines.qty", "code", "extra"]
+
+    tmdl = Path(dataset.dataset_file_path).read_text(encoding="utf-8")
+
+    # fields missing from the first record are still expanded
+    assert 'Expanded = Table.ExpandRecordColumn(ToTable, "Column1", {"id", "placed", "customer", "tags", "lines", "code", "extra"})' in tmdl
+    assert 'Table.ExpandRecordColumn(Expanded, "customer", {"name", "city", "vip"}, {"customer.name", "customer.city", "customer.vip"})' in tmdl
+    assert 'Table.ExpandListColumn(' in tmdl
+    assert 'Text.Combine(List.Transform(_, Text.From), ", ")' in tmdl
+    assert 'Text.FromBinary(Json.FromValue(_))' in tmdl
+    assert "FirstRow" not in tmdl
+
+    assert '{"placed", type datetimezone}' in tmdl
+    assert '{"lines.qty", type number}' in tmdl
+    assert '{"code", type text}' in tmdl
+    assert "column 'lines.qty'\n\t\tdataType: double" in tmdl
+    assert "column 'placed'\n\t\tdataType: dateTime" in tmdl
+
+
+def test_add_web_json_needs_one_sample(dashboard, tmp_path):
+    with pytest.raises(ValueError):
+        dashboard.add_web_json(table_name="orders", url="https://api.example.com/orders")
+
+    sample = tmp_path / "order.json"
+    sample.write_text('{"id": 1}', encoding="utf-8")
+
+    with pytest.raises(ValueError):
+        dashboard.add_web_json(table_name="orders", url="https://api.example.com/orders", sample_json=str(sample))
+
+
+def test_add_web_json_reads_a_sample_with_a_byte_order_mark(dashboard, tmp_path):
+    sample = tmp_path / "orders.json"
+    sample.write_text('[{"id": 1, "name": "Ann"}]', encoding="utf-8-sig")
+
+    dataset = dashboard.add_web_json(table_name="orders", url="https://api.example.com/orders", sample_json=str(sample))
+
+    assert list(dataset.dataset.columns) == ["id", "name"]
+
+
+class FakeApi(http.server.BaseHTTPRequestHandler):
+    """A paged API with 7 records, served four ways, that records every request it gets"""
+
+    records = [{"id": i, "day": f"2024-01-{i * 4 + 1:02d}"} for i in range(7)]
+    requests = []
+
+    def do_GET(self): # pylint: disable=invalid-name
+        parts = urlsplit(self.path)
+        query = dict(parse_qsl(parts.query))
+        FakeApi.requests.append((parts.path, query))
+
+        records = FakeApi.records
+
+        if parts.path in ("/api/v2/offset", "/api/v2/offset.csv"):
+            offset, limit = int(query["skip"]), int(query["take"])
+            page = records[offset:offset + limit]
+
+            if parts.path.endswith(".csv"):
+                body = "id,day\n" + "".join(f"{record['id']},{record['day']}\n" for record in page)
+                return self.reply(body, "text/csv")
+
+            body = {"results": page}
+
+        elif parts.path == "/api/v2/links":
+            page = int(query.get("page", 0))
+            more = (page + 1) * 3 < len(records)
+            body = {"items": records[page * 3:(page + 1) * 3],
+                    "next": f"http://{self.headers['Host']}/api/v2/links?page={page + 1}&status={query['status']}" if more else None}
+
+        elif parts.path == "/api/v2/cursor":
+            start = int(query.get("after", 0))
+            more = start + 3 < len(records)
+            body = {"data": records[start:start + 3], "meta": {"next": str(start + 3) if more else None}}
+
+        elif parts.path == "/api/v2/dated_inclusive":
+            # this one returns the rows on the end date too
+            body = [record for record in records if query["from"] <= record["day"] <= query["to"]]
+
+        else:
+            body = [record for record in records if query["from"] <= record["day"] < query["to"]]
+
+        return self.reply(json.dumps(body), "application/json")
+
+    def reply(self, body, content_type):
+        self.send_response(200)
+        self.send_header("Content-Type", content_type)
+        self.end_headers()
+        self.wfile.write(body.encode())
+
+    def log_message(self, *args): # pylint: disable=arguments-differ
+        pass
+
+
+@pytest.fixture
+def api():
+    server = http.server.ThreadingHTTPServer(("127.0.0.1", 0), FakeApi)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    FakeApi.requests = []
+
+    yield f"http://127.0.0.1:{server.server_address[1]}"
+
+    server.shutdown()
+
+
+def _fields(expression):
+    return re.findall(r'"([^"]+)", null\)', expression)
+
+
+def _refresh(tmdl):
+    """Do what Power Query does with the generated paging steps, by reading their settings out of the M code"""
+
+    steps = dict(re.findall(r'^\t{5}(\w+) = (.*?),?$', tmdl, re.M))
+    base_url = json.loads(steps["BaseUrl"])
+    base_query = dict(re.findall(r'#"([^"]+)" = "([^"]*)"', steps["BaseQuery"]))
+    items_field = _fields(steps["PageItems"])
+    pages = tmdl[tmdl.index("Pages = List.Generate("):]
+    paging = re.search(r'Record.Combine\(\{BaseQuery, (\[.*?\])\}\)', pages)
+    paging = re.findall(r'#"([^"]+)" = ([^,\]]+(?:\)[^,\]]*)?)', paging.group(1)) if paging else []
+
+    def get(path, query):
+        with urllib.request.urlopen(f"{base_url}/{path}?{urlencode(query)}") as response:
+            body = response.read().decode()
+
+        if tmdl.count("Csv.Document"):
+            return list(csv.DictReader(io.StringIO(body)))
+
+        page = json.loads(body)
+        for field in items_field:
+            page = page[field]
+        return page, json.loads(body)
+
+    path = json.loads(steps["RelativePath"])
+    items = []
+
+    if "Offset =" in pages:
+        # the loop below stops where List.Generate does
+        assert "each [Page] <> null," in pages
+        assert re.search(r"each if Table.RowCount|each if List.Count", pages)
+        offset = int(re.search(r"Offset = (\d+)", pages).group(1))
+        page_size = int(re.search(r"< (\d+) then", pages).group(1))
+        (offset_param, _), (limit_param, limit) = paging
+
+        while True:
+            page = get(path, {**base_query, offset_param: offset, limit_param: json.loads(limit)})
+            page = page if isinstance(page, list) else page[0]
+            items += page
+            if len(page) < page_size:
+                return items
+            offset += page_size
+
+    if "let next" in pages:
+        assert "each _ <> null," in pages
+        assert 'if next = null or next = "" then null' in pages
+        assert 'let parts = Uri.Parts(next) in GetPage(Text.TrimStart(parts[Path], "/"), parts[Query])' in pages
+        next_field = _fields(re.search(r"let next = (.*) in", pages).group(1))
+        response = get(path, base_query)
+
+        while True:
+            items += response[0]
+            link = response[1]
+            for field in next_field:
+                link = (link or {}).get(field)
+            if not link:
+                return items
+            parts = urlsplit(link)
+            assert f"{parts.scheme}://{parts.netloc}" == base_url
+            response = get(parts.path.lstrip("/"), dict(parse_qsl(parts.query)))
+
+    if "let cursor" in pages:
+        assert "each _ <> null," in pages
+        assert 'if cursor = null or cursor = "" then null' in pages
+        cursor_field = _fields(re.search(r"let cursor = (.*) in", pages).group(1))
+        (cursor_param, _), = paging
+        response = get(path, base_query)
+
+        while True:
+            items += response[0]
+            cursor = response[1]
+            for field in cursor_field:
+                cursor = (cursor or {}).get(field)
+            if not cursor:
+                return items
+            response = get(path, {**base_query, cursor_param: cursor})
+
+    assert "each _ < EndDate," in pages
+    start = datetime.date(*map(int, re.search(r"StartDate = #date\((.*)\)", tmdl).group(1).split(", ")))
+    end = datetime.date(*map(int, re.search(r"EndDate = #date\((.*)\)", tmdl).group(1).split(", ")))
+    window = int(re.search(r"each Date.AddDays\(_, (\d+)\),", pages).group(1))
+    (start_param, _), (end_param, _) = paging
+
+    # how far before the next window's start each window ends, as written in the M
+    end_offset = re.search(r"Date.AddDays\(List.Min\(\{Date.AddDays\(_, \d+\), EndDate\}\), (-\d+)\)", pages)
+    end_offset = int(end_offset.group(1)) if end_offset else 0
+
+    while start < end:
+        stop = min(start + datetime.timedelta(days=window), end)
+        items += get(path, {**base_query, start_param: start.isoformat(),
+                            end_param: (stop + datetime.timedelta(days=end_offset)).isoformat()})[0]
+        start = stop
+
+    return items
+
+
+@pytest.mark.parametrize("pagination, path", [
+    ({"type": "offset", "offset_param": "skip", "limit_param": "take", "page_size": 3, "items_field": "results"}, "offset"),
+    ({"type": "next_link", "items_field": "items"}, "links"),
+    ({"type": "cursor", "cursor_param": "after", "cursor_field": "meta.next", "items_field": "data"}, "cursor"),
+    ({"type": "date_window", "start_param": "from", "end_param": "to", "start": "2024-01-01", "end": "2024-02-01", "window_days": 10}, "dated"),
+])
+def test_paged_web_json_reads_every_page_through_one_base_url(dashboard, tmp_path, api, pagination, path):
+    sample = tmp_path / "sample.json"
+    sample.write_text(json.dumps(FakeApi.records[:2]), encoding="utf-8")
+
+    dataset = dashboard.add_web_json(table_name=f"paged_{path}",
+                                     url=f"{api}/api/v2/{path}?status=open",
+                                     sample_json=str(sample),
+                                     pagination=pagination)
+
+    tmdl = Path(dataset.dataset_file_path).read_text(encoding="utf-8")
+
+    assert f'BaseUrl = "{api}"' in tmdl
+    assert "Web.Contents(BaseUrl, [RelativePath = path, Query = query])" in tmdl
+    assert "List.Generate(" in tmdl
+    assert 'ToTable = Table.FromList(Source,' in tmdl
+
+    assert _refresh(tmdl) == FakeApi.records
+    assert all(query.get("status") == "open" for _, query in FakeApi.requests)
+
+
+def test_date_windows_dont_overlap_for_apis_with_an_inclusive_end(dashboard, tmp_path, api):
+    sample = tmp_path / "sample.json"
+    sample.write_text(json.dumps(FakeApi.records[:2]), encoding="utf-8")
+
+    # 2024-01-21 is the end of one window and the start of the next
+    pagination = {"type": "date_window", "start_param": "from", "end_param": "to", "start": "2024-01-01", "end": "2024-02-01", "window_days": 10}
+
+    overlapping = dashboard.add_web_json(table_name="overlapping", url=f"{api}/api/v2/dated_inclusive",
+                                         sample_json=str(sample), pagination=pagination)
+
+    ids = [record["id"] for record in _refresh(Path(overlapping.dataset_file_path).read_text(encoding="utf-8"))]
+    assert ids.count(5) == 2
+
+    dataset = dashboard.add_web_json(table_name="inclusive", url=f"{api}/api/v2/dated_inclusive",
+                                     sample_json=str(sample), pagination={**pagination, "end_inclusive": True})
+
+    tmdl = Path(dataset.dataset_file_path).read_text(encoding="utf-8")
+    assert "DateText(Date.AddDays(List.Min({Date.AddDays(_, 10), EndDate}), -1))" in tmdl
+    assert _refresh(tmdl) == FakeApi.records
+
+    with pytest.raises(ValueError):
+        dashboard.add_web_json(table_name="bad", url=f"{api}/api/v2/dated_inclusive",
+                               sample_json=str(sample), pagination={**pagination, "end_inclusive": "yes"})
+
+
+def test_paged_web_csv_promotes_each_page_then_combines_them(dashboard, tmp_path, api):
+    sample = tmp_path / "sample.csv"
+    sample.write_text("id,day\n0,2024-01-01\n", encoding="utf-8")
+
+    dataset = dashboard.add_web_csv(table_name="paged_csv",
+                                    url=f"{api}/api/v2/offset.csv",
+                                    sample_csv=str(sample),
+                                    pagination={"type": "offset", "offset_param": "skip", "limit_param": "take", "page_size": 3})
+
+    tmdl = Path(dataset.dataset_file_path).read_text(encoding="utf-8")
+
+    assert '#"Promoted Headers" = Table.Combine(Pages)' in tmdl
+    assert [int(row["id"]) for row in _refresh(tmdl)] == [record["id"] for record in FakeApi.records]
+    assert len(FakeApi.requests) == 3
+
+    with pytest.raises(ValueError):
+        dashboard.add_web_csv(table_name="cursor_csv",
+                              url=f"{api}/api/v2/cursor.csv",
+                              sample_csv=str(sample),
+                              pagination={"type": "cursor"})